@@ -3,11 +3,13 @@ Admin configuration for attendance models.
 """
 
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
-from django.db.models import Count
+from django.db.models import Count, Q
 from django.urls import reverse
 from django.utils import timezone
 
+from api.seasons.changes import mark_attendance_changed
 from .models import Event, Attendance
 
 
@@ -20,6 +22,8 @@ class EventAdmin(admin.ModelAdmin):
     search_fields = ['name', 'season__name']
     ordering = ['-date']
     readonly_fields = ['created_at', 'updated_at', 'attendance_count', 'present_count', 'attendance_percentage']
+    list_select_related = ['season', 'created_by']
+    raw_id_fields = ['created_by']
     
     fieldsets = (
         ('Podstawowe informacje', {
@@ -35,27 +39,34 @@ class EventAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """Annotate attendance counts so changelist rows do not query them one by one."""
+        return super().get_queryset(request).annotate(
+            total_attendances=Count('attendances'),
+            present_attendances=Count('attendances', filter=Q(attendances__present__gt=0)),
+        )
+    
     def attendance_count(self, obj):
         """Display total attendance records for this event."""
-        count = obj.attendances.count()
+        count = obj.total_attendances
         if count > 0:
             url = reverse('admin:attendance_attendance_changelist') + f'?event__id__exact={obj.id}'
             return format_html('<a href="{}">{} obecności</a>', url, count)
         return f'{count} obecności'
     attendance_count.short_description = 'Łącznie obecności'
+    attendance_count.admin_order_field = 'total_attendances'
     
     def present_count(self, obj):
         """Display number of present attendances."""
-        count = obj.attendances.filter(present__gt=0).count()
-        return f'{count} obecnych'
+        return f'{obj.present_attendances} obecnych'
     present_count.short_description = 'Obecni'
+    present_count.admin_order_field = 'present_attendances'
     
     def attendance_percentage(self, obj):
         """Display attendance percentage."""
-        total = obj.attendances.count()
+        total = obj.total_attendances
         if total > 0:
-            present = obj.attendances.filter(present__gt=0).count()
-            percentage = (present / total) * 100
+            percentage = (obj.present_attendances / total) * 100
             return f'{percentage:.1f}%'
         return '-'
     attendance_percentage.short_description = 'Frekwencja'
@@ -63,14 +74,9 @@ class EventAdmin(admin.ModelAdmin):
     actions = ['duplicate_events']
     
     def duplicate_events(self, request, queryset):
-        """Duplicate selected events."""
-        duplicated = 0
-        for event in queryset:
-            event.pk = None  # Create new instance
-            event.name = f"{event.name} (kopia)"
-            event.save()
-            duplicated += 1
-        self.message_user(request, f'{duplicated} wydarzeń zostało zduplikowanych.')
+        """Duplicate selected events together with their attendance rosters."""
+        duplicated = Event.duplicate(queryset.order_by(), name_suffix=' (kopia)', created_by=request.user)
+        self.message_user(request, f'{len(duplicated)} wydarzeń zostało zduplikowanych.')
     duplicate_events.short_description = "Duplikuj wydarzenia"
 
 
@@ -83,6 +89,10 @@ class AttendanceAdmin(admin.ModelAdmin):
     search_fields = ['event__name', 'user__first_name', 'user__last_name', 'user__username']
     ordering = ['-event__date', 'user__last_name']
     readonly_fields = ['created_at', 'updated_at']
+    list_select_related = ['event__season', 'user', 'marked_by']
+    # Plain selects would render every user and event of the database
+    autocomplete_fields = ['event', 'user']
+    raw_id_fields = ['marked_by']
     
     fieldsets = (
         ('Basic Information', {
@@ -118,21 +128,30 @@ class AttendanceAdmin(admin.ModelAdmin):
     
     actions = ['mark_present', 'mark_absent', 'mark_half_present']
     
+    @transaction.atomic
     def mark_present(self, request, queryset):
         """Mark selected attendances as present."""
-        updated = queryset.update(present=1.0)
+        event_ids = list(queryset.values_list('event_id', flat=True).distinct())
+        updated = queryset.update(present=1.0, updated_at=timezone.now())
+        mark_attendance_changed(event_ids)
         self.message_user(request, f'{updated} obecności zostały oznaczone jako "obecny".')
     mark_present.short_description = "Oznacz jako obecny"
     
+    @transaction.atomic
     def mark_absent(self, request, queryset):
         """Mark selected attendances as absent."""
-        updated = queryset.update(present=0.0)
+        event_ids = list(queryset.values_list('event_id', flat=True).distinct())
+        updated = queryset.update(present=0.0, updated_at=timezone.now())
+        mark_attendance_changed(event_ids)
         self.message_user(request, f'{updated} obecności zostały oznaczone jako "nieobecny".')
     mark_absent.short_description = "Oznacz jako nieobecny"
     
+    @transaction.atomic
     def mark_half_present(self, request, queryset):
         """Mark selected attendances as half present."""
-        updated = queryset.update(present=0.5)
+        event_ids = list(queryset.values_list('event_id', flat=True).distinct())
+        updated = queryset.update(present=0.5, updated_at=timezone.now())
+        mark_attendance_changed(event_ids)
         self.message_user(request, f'{updated} obecności zostały oznaczone jako "połowa".')
     mark_half_present.short_description = "Oznacz jako połowa"
 
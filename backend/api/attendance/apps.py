@@ -9,3 +9,7 @@ class AttendanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api.attendance'
     verbose_name = 'Attendance Management'
+
+    def ready(self):
+        """Import signals when the app is ready."""
+        import api.attendance.signals
@@ -0,0 +1,111 @@
+"""
+Self check-in of musicians at events.
+
+Check-in is built for bursts at the start of a rehearsal: it does not lock the
+event, and the attendance row is read once and then written with a single
+statement - ``INSERT ... ON CONFLICT DO NOTHING`` for a new row, or an update
+guarded by the values just read. Repeated or concurrent check-ins of the same
+musician are idempotent: a row that is already present, or that the board has
+marked, is left as it is and gets no new sync version. The season version
+bump, summary refresh and live
+notification of check-ins are coalesced per process (see
+``api.seasons.changes.defer_attendance_changed``), so concurrent check-ins do
+not queue on the season row.
+
+Optional event codes are derived from ``SECRET_KEY`` with HMAC over the event
+id and the current time slot, so every worker process can verify them without
+shared state.
+"""
+import hashlib
+import hmac
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.seasons.changes import defer_attendance_changed
+from .models import Attendance
+
+CHECKIN_CODE_TTL = 300  # seconds a code stays valid (plus the previous slot)
+CHECKIN_CODE_DIGITS = 6
+
+
+class CheckInError(Exception):
+    """Raised when a check-in is not allowed; carries a user-facing message."""
+
+
+def _code_for_slot(event_id, slot):
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), f'checkin:{event_id}:{slot}'.encode(), hashlib.sha256
+    ).digest()
+    return str(int.from_bytes(digest[:8], 'big') % 10 ** CHECKIN_CODE_DIGITS).zfill(CHECKIN_CODE_DIGITS)
+
+
+def make_checkin_code(event_id):
+    """Return ``(code, expires_at)`` of the event's current check-in code."""
+    slot = int(time.time()) // CHECKIN_CODE_TTL
+    expires_at = datetime.fromtimestamp((slot + 2) * CHECKIN_CODE_TTL, tz=dt_timezone.utc)
+    return _code_for_slot(event_id, slot), expires_at
+
+
+def verify_checkin_code(event_id, code):
+    """Accept codes of the current and the previous time slot."""
+    slot = int(time.time()) // CHECKIN_CODE_TTL
+    return any(
+        hmac.compare_digest(str(code), _code_for_slot(event_id, candidate))
+        for candidate in (slot, slot - 1)
+    )
+
+
+def check_in(event, user, code=None):
+    """
+    Mark ``user`` present at ``event``.
+
+    Raises ``CheckInError`` outside the event day, for musicians outside the
+    season roster and for missing or invalid codes (a code is only required
+    when ``ATTENDANCE_CHECKIN_REQUIRE_CODE`` is set).
+    """
+    from api.seasons.models import Season
+
+    if event.date != timezone.localdate():
+        raise CheckInError('Samodzielne potwierdzenie obecności jest możliwe tylko w dniu wydarzenia.')
+
+    if code:
+        if not verify_checkin_code(event.id, code):
+            raise CheckInError('Nieprawidłowy lub wygasły kod wydarzenia.')
+    elif getattr(settings, 'ATTENDANCE_CHECKIN_REQUIRE_CODE', False):
+        raise CheckInError('Wymagany jest kod wydarzenia.')
+
+    on_roster = Season.musicians.through.objects.filter(
+        season_id=event.season_id,
+        musicianprofile__user_id=user.id,
+        musicianprofile__active=True,
+    ).exists()
+    if not on_roster:
+        raise CheckInError('Nie należysz do składu tego sezonu.')
+
+    registration = {'user_id': user.id, 'event_id': event.id}
+    current = Attendance.objects.filter(**registration).first()
+    if current is None:
+        # A concurrent check-in of the same musician makes this a no-op
+        attendance = Attendance(present=1.0, marked_by_id=user.id, **registration)
+        Attendance.objects.bulk_create([attendance], ignore_conflicts=True)
+    elif current.present == 1 or current.marked_by_id not in (None, user.id):
+        # A retry, or a value set by the board - keep it
+        return current
+    else:
+        # Seeded absent row: update it unless it changed since it was read
+        now = timezone.now()
+        updated = Attendance.objects.filter(
+            pk=current.pk, present=current.present, marked_by_id=current.marked_by_id
+        ).update(present=1.0, marked_by_id=user.id, updated_at=now)
+        if not updated:
+            current.refresh_from_db()
+            return current
+        current.present, current.marked_by_id, current.updated_at = 1.0, user.id, now
+        attendance = current
+
+    # The writes skip signals - mark the change explicitly, flushed with the rest of the burst
+    defer_attendance_changed([event.id], [user.id])
+    return attendance
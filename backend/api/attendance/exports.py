@@ -0,0 +1,158 @@
+"""
+Exports of season attendance matrices (musicians x events) to CSV and XLSX.
+
+Rows are produced lazily: the roster and the event list of a season are small
+and loaded up front, while attendance rows are read through a server-side
+cursor (``QuerySet.iterator``) and merged into musician rows one at a time, so
+memory stays flat no matter how many seasons are exported.
+"""
+import csv
+import re
+
+from django.db.models import Case, When, Value, IntegerField
+
+from api.users.models import INSTRUMENT_CHOICES
+from .models import Event, Attendance
+
+EVENT_TYPE_LABELS = dict(Event.EVENT_TYPES)
+SECTION_LABELS = dict(INSTRUMENT_CHOICES)
+
+# Excel rejects these characters in sheet titles and titles over 31 characters
+INVALID_SHEET_TITLE_CHARS = re.compile(r'[\\/?*\[\]:]')
+MAX_SHEET_TITLE_LENGTH = 31
+
+
+def _section_order(field):
+    """Order musicians by section the same way INSTRUMENT_CHOICES lists them."""
+    return Case(
+        *[When(**{field: key}, then=Value(position)) for position, (key, _) in enumerate(INSTRUMENT_CHOICES)],
+        default=Value(len(INSTRUMENT_CHOICES)),
+        output_field=IntegerField(),
+    )
+
+
+def _sheet_title(name, used):
+    """Return a valid, not yet ``used`` Excel sheet title for ``name``."""
+    # Titles also cannot start or end with an apostrophe
+    base = INVALID_SHEET_TITLE_CHARS.sub('-', name).strip("'")[:MAX_SHEET_TITLE_LENGTH] or 'Sezon'
+    title, number = base, 1
+    while title.lower() in used:
+        number += 1
+        suffix = f' ({number})'
+        title = base[:MAX_SHEET_TITLE_LENGTH - len(suffix)] + suffix
+    used.add(title.lower())
+    return title
+
+
+def _rate(value, count):
+    return round(value / count * 100, 2) if count else 0
+
+
+def iter_season_matrix(season):
+    """
+    Yield the attendance matrix of a season as lists of cell values.
+
+    The first row is the header, then one row per active musician of the season
+    (grouped by section) with their total and attendance rate, and finally a row
+    of per-event totals and turnout. Missing attendance records are left empty.
+    """
+    events = list(season.events.order_by('date', 'created_at').values_list('id', 'name', 'date', 'type'))
+    event_index = {event_id: position for position, (event_id, *_) in enumerate(events)}
+
+    roster = season.musicians.filter(active=True)
+    musicians = list(
+        roster.annotate(section_order=_section_order('instrument'))
+        .order_by('section_order', 'user__last_name', 'user__first_name', 'user_id')
+        .values_list('user_id', 'instrument', 'user__first_name', 'user__last_name')
+    )
+    # Same ordering as the roster, so both streams can be merged without sorting in Python
+    attendances = (
+        Attendance.objects.filter(event__season=season, user__musicianprofile__in=roster)
+        .annotate(section_order=_section_order('user__musicianprofile__instrument'))
+        .order_by('section_order', 'user__last_name', 'user__first_name', 'user_id')
+        .values_list('user_id', 'event_id', 'present')
+    )
+
+    yield ['Sekcja', 'Imię', 'Nazwisko'] + [
+        f'{date:%Y-%m-%d} {name} ({EVENT_TYPE_LABELS.get(event_type, event_type)})'
+        for _, name, date, event_type in events
+    ] + ['Suma', 'Frekwencja [%]']
+
+    event_totals = [0.0] * len(events)
+
+    def musician_row(musician, values):
+        user_id, instrument, first_name, last_name = musician
+        total = 0.0
+        for position, value in enumerate(values):
+            if value is not None:
+                total += value
+                event_totals[position] += value
+        return [SECTION_LABELS.get(instrument, 'Inne'), first_name, last_name] + [
+            '' if value is None else value for value in values
+        ] + [total, _rate(total, len(events))]
+
+    roster_user_ids = {musician[0] for musician in musicians}
+    position = 0
+    values = [None] * len(events)
+    for user_id, event_id, present in attendances.iterator(chunk_size=2000):
+        if user_id not in roster_user_ids:
+            continue
+        # Musicians without any attendance record get an empty row
+        while musicians[position][0] != user_id:
+            yield musician_row(musicians[position], values)
+            position += 1
+            values = [None] * len(events)
+        values[event_index[event_id]] = float(present)
+    for musician in musicians[position:]:
+        yield musician_row(musician, values)
+        values = [None] * len(events)
+
+    yield ['Suma', '', ''] + event_totals + [
+        sum(event_totals), _rate(sum(event_totals), len(events) * len(musicians))
+    ]
+    yield ['Frekwencja [%]', '', ''] + [_rate(total, len(musicians)) for total in event_totals] + ['', '']
+
+
+class _Echo:
+    """File-like object returning what is written, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def iter_attendance_csv(seasons):
+    """Yield CSV lines of the attendance matrices of the given seasons."""
+    writer = csv.writer(_Echo())
+    # BOM so spreadsheet applications detect UTF-8 (Polish characters)
+    yield '\ufeff'
+    for number, season in enumerate(seasons):
+        if number:
+            yield writer.writerow([])
+        yield writer.writerow([f'Sezon {season.name}'])
+        for row in iter_season_matrix(season):
+            yield writer.writerow(row)
+
+
+def write_attendance_xlsx(job, output):
+    """
+    Report job handler: write the attendance matrices of ``job.params['season_ids']``
+    to an XLSX workbook, one sheet per season.
+    """
+    from openpyxl import Workbook
+    from api.seasons.models import Season
+
+    seasons = Season.objects.filter(id__in=job.params.get('season_ids', [])).order_by('start_date')
+
+    # Write-only mode streams rows to disk instead of keeping the sheet in memory
+    workbook = Workbook(write_only=True)
+    names, titles = [], set()
+    for season in seasons:
+        sheet = workbook.create_sheet(title=_sheet_title(season.name, titles))
+        for row in iter_season_matrix(season):
+            sheet.append(row)
+        names.append(season.name.replace('/', '-'))
+    if not names:
+        workbook.create_sheet(title='Brak danych')
+    workbook.save(output)
+
+    return f"obecnosci_{'_'.join(names) or 'brak'}.xlsx"
@@ -0,0 +1,113 @@
+"""
+Per-musician attendance calendar (heatmap) across all seasons.
+
+The series is read from the musician's attendance rows (the ``(user, event)``
+index) with one query; rolling 4- and 8-week rates are computed in the same
+query with SQL window functions framed over the event day number, so every
+event counts the attendance of the preceding 28/56 days.
+
+Results are cached per musician. The cache key embeds a fingerprint of the
+musician's rows (count and latest change of the rows and their events), so
+the entry is retired as soon as their attendance or one of their events changes.
+"""
+from django.core.cache import cache
+from django.db.models import Count, F, Func, IntegerField, Max, Sum, ValueRange, Window
+from django.utils import timezone
+
+from .models import Attendance
+from .sync import make_sync_token
+
+HEATMAP_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+ROLLING_WINDOWS = {'rate_4w': 28, 'rate_8w': 56}  # days
+
+
+class EpochDay(Func):
+    """Number of days since 1970-01-01 of a date, usable as a RANGE frame order."""
+    output_field = IntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, template="(%(expressions)s - DATE '1970-01-01')", **extra_context
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, template="CAST(julianday(%(expressions)s) - 2440587.5 AS INTEGER)",
+            **extra_context
+        )
+
+
+def heatmap_fingerprint(user_id):
+    """Return a short string that changes whenever the user's attendance or events change."""
+    state = Attendance.objects.filter(user_id=user_id).aggregate(
+        rows=Count('id'),
+        rows_changed=Max('updated_at'),
+        events_changed=Max('event__updated_at'),
+    )
+    stamp = lambda moment: make_sync_token(moment) if moment else '0'
+    return f"{state['rows']}:{stamp(state['rows_changed'])}:{stamp(state['events_changed'])}"
+
+
+def compute_attendance_heatmap(user_id, until=None):
+    """
+    Build the date -> attendance series of one user up to ``until`` (today).
+
+    Each day carries the mean attendance value of its events (several events
+    may share a date) and the weighted attendance rates over the 4 and 8 weeks
+    ending that day. Future events (seeded as absent) are left out.
+    """
+    until = until or timezone.localdate()
+    day = EpochDay('event__date')
+    windows = {
+        f'{name}_{part}': Window(
+            expression=aggregate, order_by=day.asc(), frame=ValueRange(start=-(days - 1), end=0)
+        )
+        for name, days in ROLLING_WINDOWS.items()
+        for part, aggregate in (('value', Sum('present')), ('count', Count('id')))
+    }
+    rows = (
+        Attendance.objects.filter(user_id=user_id, event__date__lte=until)
+        .annotate(**windows)
+        .values(
+            'present', date=F('event__date'), season_id=F('event__season_id'),
+            season_name=F('event__season__name'), **{name: F(name) for name in windows}
+        )
+        .order_by('event__date')
+    )
+
+    days = []
+    seasons = {}
+    for row in rows:
+        seasons[row['season_id']] = row['season_name']
+        if days and days[-1]['date'] == row['date']:
+            entry = days[-1]
+            entry['_total'] += float(row['present'])
+            entry['events'] += 1
+        else:
+            entry = {'date': row['date'], '_total': float(row['present']), 'events': 1, 'season_id': row['season_id']}
+            days.append(entry)
+        # Rows of the same day are peers in the RANGE frame and share the rates
+        for name in ROLLING_WINDOWS:
+            count = row[f'{name}_count']
+            entry[name] = round(float(row[f'{name}_value']) / count * 100, 2) if count else None
+
+    for entry in days:
+        entry['value'] = round(entry.pop('_total') / entry['events'], 2)
+
+    return {
+        'user_id': user_id,
+        'until': until,
+        'seasons': [{'id': season_id, 'name': name} for season_id, name in seasons.items()],
+        'days': days,
+    }
+
+
+def get_attendance_heatmap(user_id):
+    """Return the user's heatmap, computed on a cache miss."""
+    today = timezone.localdate()
+    key = f'attendance:heatmap:{user_id}:{heatmap_fingerprint(user_id)}:{today.isoformat()}'
+    data = cache.get(key)
+    if data is None:
+        data = compute_attendance_heatmap(user_id, until=today)
+        cache.set(key, data, HEATMAP_CACHE_TIMEOUT)
+    return data
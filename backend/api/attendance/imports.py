@@ -0,0 +1,289 @@
+"""
+Bulk import of attendance records from CSV files.
+
+The file is read row by row and processed in batches: every batch resolves its
+musicians, events and existing attendance with a few ``IN`` queries and writes
+new or changed rows with a single bulk upsert. A dry run performs the same
+validation and returns the diff without writing anything.
+
+Expected columns (header names are case-insensitive):
+
+* ``username`` or ``user_id`` - the musician,
+* ``event_id``, or ``date`` (``YYYY-MM-DD``) with an optional ``type`` when the
+  season has several events on the same day,
+* ``present`` - ``0``, ``0.5`` (also ``0,5``) or ``1``.
+"""
+import csv
+import io
+from datetime import date as date_type
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from api.seasons.changes import mark_attendance_changed, restore_marks, snapshot_marks
+from .models import Event, Attendance
+
+IMPORT_BATCH_SIZE = 500
+
+# Only this many diff entries and errors are returned, the counters always cover everything
+MAX_REPORTED_CHANGES = 1000
+MAX_REPORTED_ERRORS = 100
+
+PRESENT_VALUES = {Decimal('0.0'), Decimal('0.5'), Decimal('1.0')}
+EVENT_TYPE_VALUES = {key: key for key, _ in Event.EVENT_TYPES} | {
+    label.lower(): key for key, label in Event.EVENT_TYPES
+}
+
+
+class AttendanceImportError(ValueError):
+    """Raised when a file cannot be imported at all (e.g. missing columns)."""
+
+
+def open_csv_upload(uploaded_file):
+    """Wrap an uploaded file as a text stream; a UTF-8 BOM is skipped."""
+    return io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+
+
+def _parse_present(value):
+    try:
+        present = Decimal(value.strip().replace(',', '.'))
+    except ArithmeticError:
+        return None
+    # NaN and infinities cannot be compared with the allowed values
+    if not present.is_finite():
+        return None
+    return present if present in PRESENT_VALUES else None
+
+
+def _parse_id(value):
+    """Return ``value`` as a positive integer id, or ``None``."""
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed > 0 else None
+
+
+class AttendanceImporter:
+    """Import attendance of one season from CSV rows."""
+
+    def __init__(self, season, marked_by=None, batch_size=IMPORT_BATCH_SIZE):
+        self.season = season
+        self.marked_by = marked_by
+        self.batch_size = batch_size
+
+    def run(self, stream, dry_run=False):
+        """
+        Import a CSV text stream and return a report.
+
+        The import is all-or-nothing: if any row is invalid, nothing is written
+        and the report lists the errors with their line numbers (the first
+        ``MAX_REPORTED_ERRORS`` of them; ``error_count`` has the total).
+        """
+        reader = csv.DictReader(stream)
+        columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+        self._check_columns(columns)
+
+        self.report = {
+            'dry_run': dry_run,
+            'applied': False,
+            'rows': 0,
+            'created': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'error_count': 0,
+            'errors': [],
+            'errors_truncated': False,
+            'changes': [],
+            'changes_truncated': False,
+        }
+        self._seen = set()
+        self._roster = set(self.season.musicians.values_list('user_id', flat=True))
+
+        rows = (
+            (reader.line_num, {key: (row.get(name) or '').strip() for key, name in columns.items()})
+            for row in reader
+        )
+        # Marks of a rolled back import must not be flushed with a later commit
+        marks = snapshot_marks()
+        try:
+            with transaction.atomic():
+                while True:
+                    batch = list(islice(rows, self.batch_size))
+                    if not batch:
+                        break
+                    self.report['rows'] += len(batch)
+                    self._process_batch(batch, write=not dry_run and not self.report['error_count'])
+
+                if self.report['error_count'] or dry_run:
+                    transaction.set_rollback(True)
+                    restore_marks(marks)
+                else:
+                    self.report['applied'] = True
+        except Exception:
+            restore_marks(marks)
+            raise
+
+        return self.report
+
+    def _check_columns(self, columns):
+        missing = []
+        if 'username' not in columns and 'user_id' not in columns:
+            missing.append('username/user_id')
+        if 'event_id' not in columns and 'date' not in columns:
+            missing.append('event_id/date')
+        if 'present' not in columns:
+            missing.append('present')
+        if missing:
+            raise AttendanceImportError(f"Brak wymaganych kolumn: {', '.join(missing)}.")
+
+    def _error(self, line, detail):
+        self.report['error_count'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'line': line, 'detail': detail})
+        else:
+            self.report['errors_truncated'] = True
+
+    def _process_batch(self, batch, write):
+        users = self._resolve_users(batch)
+        events = self._resolve_events(batch)
+
+        # Validate and resolve every row of the batch
+        resolved = []
+        for line, row in batch:
+            if row.get('username'):
+                user_key = row['username']
+                user_id = users['by_name'].get(user_key)
+            else:
+                user_key = row.get('user_id')
+                user_id = users['by_id'].get(_parse_id(user_key))
+            if user_id is None:
+                self._error(line, f'Nie znaleziono użytkownika "{user_key}".')
+                continue
+            if user_id not in self._roster:
+                self._error(line, f'Użytkownik "{user_key}" nie należy do sezonu {self.season.name}.')
+                continue
+
+            event, event_error = self._match_event(row, events)
+            if event is None:
+                self._error(line, event_error)
+                continue
+
+            present = _parse_present(row.get('present', ''))
+            if present is None:
+                self._error(line, 'Wartość present musi być 0, 0.5 lub 1.')
+                continue
+
+            if (user_id, event['id']) in self._seen:
+                self._error(line, f'Zduplikowany wpis dla "{user_key}" i wydarzenia {event["name"]} ({event["date"]}).')
+                continue
+            self._seen.add((user_id, event['id']))
+            resolved.append((line, user_key, user_id, event, present))
+
+        if not resolved:
+            return
+
+        existing = {
+            (user_id, event_id): present
+            for user_id, event_id, present in Attendance.objects.filter(
+                user_id__in={row[2] for row in resolved},
+                event_id__in={row[3]['id'] for row in resolved},
+            ).values_list('user_id', 'event_id', 'present')
+        }
+
+        to_write = []
+        for line, user_key, user_id, event, present in resolved:
+            old = existing.get((user_id, event['id']))
+            if old is not None and old == present:
+                self.report['unchanged'] += 1
+                continue
+            self.report['created' if old is None else 'updated'] += 1
+            self._add_change({
+                'line': line,
+                'user': user_key,
+                'event_id': event['id'],
+                'event': event['name'],
+                'date': event['date'],
+                'old': None if old is None else float(old),
+                'new': float(present),
+            })
+            to_write.append(Attendance(user_id=user_id, event_id=event['id'], present=present, marked_by=self.marked_by))
+
+        if write and to_write:
+            # bulk_create skips signals - changes are marked explicitly below
+            Attendance.objects.bulk_create(
+                to_write,
+                update_conflicts=True,
+                unique_fields=['user', 'event'],
+                update_fields=['present', 'marked_by', 'updated_at'],
+            )
+            mark_attendance_changed(
+                {attendance.event_id for attendance in to_write},
+                {attendance.user_id for attendance in to_write},
+            )
+
+    def _add_change(self, change):
+        if len(self.report['changes']) < MAX_REPORTED_CHANGES:
+            self.report['changes'].append(change)
+        else:
+            self.report['changes_truncated'] = True
+
+    def _resolve_users(self, batch):
+        """Map the usernames and the user_id values of a batch to user ids."""
+        usernames = {row['username'] for _, row in batch if row.get('username')}
+        user_ids = {_parse_id(row.get('user_id')) for _, row in batch if not row.get('username')} - {None}
+        users = {'by_name': {}, 'by_id': {}}
+        if usernames:
+            users['by_name'].update(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        if user_ids:
+            users['by_id'].update(
+                (user_id, user_id) for user_id in User.objects.filter(id__in=user_ids).values_list('id', flat=True)
+            )
+        return users
+
+    def _resolve_events(self, batch):
+        """Load the season's events referenced by a batch, keyed by id and by date."""
+        event_ids = {_parse_id(row.get('event_id')) for _, row in batch} - {None}
+        dates = set()
+        for _, row in batch:
+            if not row.get('event_id') and row.get('date'):
+                try:
+                    dates.add(date_type.fromisoformat(row['date']))
+                except ValueError:
+                    pass
+
+        events = {'by_id': {}, 'by_date': {}}
+        if not event_ids and not dates:
+            return events
+        queryset = Event.objects.filter(season=self.season).values('id', 'name', 'date', 'type')
+        by_id = queryset.filter(id__in=event_ids) if event_ids else []
+        by_date = queryset.filter(date__in=dates) if dates else []
+        for event in by_id:
+            events['by_id'][event['id']] = event
+        for event in by_date:
+            events['by_date'].setdefault(event['date'], []).append(event)
+        return events
+
+    def _match_event(self, row, events):
+        """Return ``(event, None)`` or ``(None, error message)`` for a row."""
+        if row.get('event_id'):
+            event = events['by_id'].get(_parse_id(row['event_id']))
+            if event is None:
+                return None, f'Nie znaleziono wydarzenia {row["event_id"]} w sezonie {self.season.name}.'
+            return event, None
+
+        try:
+            event_date = date_type.fromisoformat(row.get('date', ''))
+        except ValueError:
+            return None, f'Nieprawidłowa data "{row.get("date", "")}" (oczekiwano RRRR-MM-DD).'
+        candidates = events['by_date'].get(event_date, [])
+        if row.get('type'):
+            event_type = EVENT_TYPE_VALUES.get(row['type'].lower())
+            candidates = [event for event in candidates if event['type'] == event_type]
+        if not candidates:
+            return None, f'Brak wydarzenia w dniu {event_date} w sezonie {self.season.name}.'
+        if len(candidates) > 1:
+            return None, f'Kilka wydarzeń w dniu {event_date} - podaj kolumnę type lub event_id.'
+        return candidates[0], None
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_summaries(apps, schema_editor):
+    """Summarize existing attendance records per user, season and event type."""
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceSummary = apps.get_model('attendance', 'AttendanceSummary')
+
+    rows = Attendance.objects.values('user_id', 'event__season_id', 'event__type').annotate(
+        full=Count('id', filter=Q(present=1.0)),
+        half=Count('id', filter=Q(present=0.5)),
+        absent=Count('id', filter=Q(present=0)),
+        weighted=Sum('present'),
+    )
+    AttendanceSummary.objects.bulk_create([
+        AttendanceSummary(
+            user_id=row['user_id'],
+            season_id=row['event__season_id'],
+            event_type=row['event__type'],
+            full_count=row['full'],
+            half_count=row['half'],
+            absent_count=row['absent'],
+            weighted_sum=row['weighted'] or 0,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_make_season_required'),
+        ('seasons', '0003_season_data_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('concert', 'Koncert'), ('rehearsal', 'Próba'), ('soundcheck', 'Soundcheck')], max_length=20)),
+                ('full_count', models.PositiveIntegerField(default=0)),
+                ('half_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('weighted_sum', models.DecimalField(decimal_places=1, default=0, max_digits=8)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='seasons.season')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Podsumowanie obecności',
+                'verbose_name_plural': 'Podsumowania obecności',
+                'db_table': 'attendance_summary',
+                'indexes': [models.Index(fields=['season', 'event_type'], name='attendance__season__4516cc_idx')],
+                'unique_together': {('user', 'season', 'event_type')},
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
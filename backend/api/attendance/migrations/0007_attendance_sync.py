@@ -0,0 +1,39 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendancesummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attendance_id', models.BigIntegerField()),
+                ('user_id', models.IntegerField()),
+                ('event_id', models.BigIntegerField()),
+                ('season_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Usunięta obecność',
+                'verbose_name_plural': 'Usunięte obecności',
+                'db_table': 'attendance_tombstone',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['event', 'updated_at'], name='attendance__event_i_24205e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancetombstone',
+            index=models.Index(fields=['season_id', 'deleted_at'], name='attendance__season__565b43_idx'),
+        ),
+    ]
@@ -38,6 +38,61 @@ class Event(models.Model):
     def __str__(self):
         return f"{self.name} ({self.get_type_display()}) - {self.date} [{self.season}]"
 
+    @classmethod
+    def duplicate(cls, events, days_offset=0, name_suffix='', created_by=None):
+        """
+        Clone events with dates shifted by ``days_offset`` and seed their attendance.
+        
+        Every copy gets absent records for the musicians that had a record on
+        the original event; originals without any records fall back to the
+        active roster of their season. Runs a constant number of queries (two
+        reads and two bulk inserts) regardless of the number of events.
+        """
+        from datetime import timedelta
+        from django.db import transaction
+        from api.seasons.changes import mark_seasons_changed, mark_attendance_changed
+        from api.seasons.models import Season
+        
+        events = list(events)
+        if not events:
+            return []
+        
+        rosters = {event.id: set() for event in events}
+        for event_id, user_id in Attendance.objects.filter(event__in=events).values_list('event_id', 'user_id'):
+            rosters[event_id].add(user_id)
+        
+        seasons_without_roster = {event.season_id for event in events if not rosters[event.id]}
+        season_rosters = {}
+        if seasons_without_roster:
+            memberships = Season.musicians.through.objects.filter(
+                season_id__in=seasons_without_roster, musicianprofile__active=True
+            ).values_list('season_id', 'musicianprofile__user_id')
+            for season_id, user_id in memberships:
+                season_rosters.setdefault(season_id, set()).add(user_id)
+        
+        copies = [
+            cls(
+                name=f'{event.name}{name_suffix}'[:255],
+                date=event.date + timedelta(days=days_offset),
+                type=event.type,
+                season_id=event.season_id,
+                created_by_id=created_by.id if created_by else event.created_by_id,
+            )
+            for event in events
+        ]
+        with transaction.atomic():
+            # bulk_create skips signals - the changes are marked explicitly
+            copies = cls.objects.bulk_create(copies)
+            records = [
+                Attendance(user_id=user_id, event=copy, present=0.0)
+                for event, copy in zip(events, copies)
+                for user_id in rosters[event.id] or season_rosters.get(event.season_id, ())
+            ]
+            Attendance.objects.bulk_create(records, batch_size=1000)
+            mark_seasons_changed({copy.season_id for copy in copies})
+            mark_attendance_changed([copy.id for copy in copies], {record.user_id for record in records})
+        return copies
+
     @property
     def attendance_count(self):
         """Return the number of attendance records for this event."""
@@ -112,11 +167,56 @@ class Attendance(models.Model):
             models.Index(fields=['user', 'event']),
             models.Index(fields=['present']),
             models.Index(fields=['event']),
+            models.Index(fields=['event', 'updated_at']),
         ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.event.name} - {self.get_present_display()}"
 
+    @classmethod
+    def create_absent_for_events(cls, events, season):
+        """
+        Create absent attendance records of the season's active musicians for
+        the given events with one bulk insert. Existing records are kept.
+        """
+        from api.seasons.changes import mark_attendance_changed
+        
+        user_ids = list(season.musicians.filter(active=True).values_list('user_id', flat=True))
+        records = [
+            cls(user_id=user_id, event=event, present=0.0)
+            for event in events
+            for user_id in user_ids
+        ]
+        if records:
+            # bulk_create skips signals - mark the changes explicitly
+            cls.objects.bulk_create(records, ignore_conflicts=True)
+            mark_attendance_changed([event.id for event in events], user_ids)
+        return len(user_ids)
+
+    @classmethod
+    def delete_with_tombstones(cls, queryset):
+        """
+        Delete the attendance rows of ``queryset`` in bulk; returns the number deleted.
+        
+        Replaces the per-row ``post_delete`` signals: tombstones for delta sync
+        are inserted with one bulk insert, the rows are removed with a single
+        DELETE and the change is marked explicitly.
+        """
+        from api.seasons.changes import mark_attendance_changed
+        
+        rows = list(queryset.values_list('id', 'user_id', 'event_id', 'event__season_id'))
+        if not rows:
+            return 0
+        AttendanceTombstone.objects.bulk_create([
+            AttendanceTombstone(attendance_id=pk, user_id=user_id, event_id=event_id, season_id=season_id)
+            for pk, user_id, event_id, season_id in rows
+        ], batch_size=1000)
+        # Nothing references attendance rows, so skipping the collector (and its signals) is safe
+        doomed = cls.objects.filter(pk__in=[row[0] for row in rows])
+        doomed._raw_delete(doomed.db)
+        mark_attendance_changed({row[2] for row in rows}, {row[1] for row in rows})
+        return len(rows)
+    
     @property
     def is_present(self):
         """For backward compatibility - returns True if attendance > 0"""
@@ -136,3 +236,117 @@ class Attendance(models.Model):
     def is_absent(self):
         """Returns True if absent"""
         return self.present == 0
+
+
+
+class AttendanceTombstone(models.Model):
+    """
+    Record of a deleted attendance row, so delta-syncing clients learn about deletions.
+
+    Holds plain ids rather than foreign keys: the referenced rows are usually
+    being deleted in the same transaction.
+    """
+    attendance_id = models.BigIntegerField()
+    user_id = models.IntegerField()
+    event_id = models.BigIntegerField()
+    season_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'attendance_tombstone'
+        verbose_name = 'Usunięta obecność'
+        verbose_name_plural = 'Usunięte obecności'
+        indexes = [
+            models.Index(fields=['season_id', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"Attendance #{self.attendance_id} deleted at {self.deleted_at}"
+
+class AttendanceSummary(models.Model):
+    """
+    Materialized per-musician attendance totals for one season and event type.
+
+    Maintained from attendance writes through ``api.seasons.changes`` and
+    rebuildable with the ``rebuild_attendance_summaries`` management command.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_summaries')
+    season = models.ForeignKey('seasons.Season', on_delete=models.CASCADE, related_name='attendance_summaries')
+    event_type = models.CharField(max_length=20, choices=Event.EVENT_TYPES)
+    full_count = models.PositiveIntegerField(default=0)
+    half_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    weighted_sum = models.DecimalField(max_digits=8, decimal_places=1, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'attendance_summary'
+        verbose_name = 'Podsumowanie obecności'
+        verbose_name_plural = 'Podsumowania obecności'
+        unique_together = ('user', 'season', 'event_type')
+        indexes = [
+            models.Index(fields=['season', 'event_type']),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.season} - {self.get_event_type_display()}: {self.attendance_rate}%"
+
+    @property
+    def total_count(self):
+        """Return the number of attendance records summarized."""
+        return self.full_count + self.half_count + self.absent_count
+
+    @property
+    def attendance_rate(self):
+        """Weighted attendance rate in percent (0.5 counts as 50%, 1.0 as 100%)."""
+        total = self.total_count
+        return round(float(self.weighted_sum) / total * 100, 2) if total else 0
+
+    @classmethod
+    def refresh(cls, season_id, user_ids=None):
+        """
+        Recompute summaries of one season from raw attendance rows.
+
+        Limited to ``user_ids`` when given, otherwise the whole season is rebuilt.
+        Costs one grouped query, one upsert and one delete regardless of size.
+        """
+        from django.db import transaction
+        from django.db.models import Count, Q, Sum
+
+        attendances = Attendance.objects.filter(event__season_id=season_id)
+        existing = cls.objects.filter(season_id=season_id)
+        if user_ids is not None:
+            if not user_ids:
+                return
+            attendances = attendances.filter(user_id__in=user_ids)
+            existing = existing.filter(user_id__in=user_ids)
+
+        rows = attendances.values('user_id', 'event__type').annotate(
+            full=Count('id', filter=Q(present=1.0)),
+            half=Count('id', filter=Q(present=0.5)),
+            absent=Count('id', filter=Q(present=0)),
+            weighted=Sum('present'),
+        )
+        summaries = [
+            cls(
+                user_id=row['user_id'],
+                season_id=season_id,
+                event_type=row['event__type'],
+                full_count=row['full'],
+                half_count=row['half'],
+                absent_count=row['absent'],
+                weighted_sum=row['weighted'] or 0,
+            )
+            for row in rows
+        ]
+
+        with transaction.atomic():
+            if summaries:
+                cls.objects.bulk_create(
+                    summaries,
+                    update_conflicts=True,
+                    unique_fields=['user', 'season', 'event_type'],
+                    update_fields=['full_count', 'half_count', 'absent_count', 'weighted_sum', 'updated_at'],
+                )
+            # Drop combinations that no longer have any attendance rows
+            existing.exclude(pk__in=[summary.pk for summary in summaries]).delete()
@@ -0,0 +1,152 @@
+"""
+Publish/subscribe of season change notifications for live attendance streams.
+
+Notifications are published from ``transaction.on_commit`` hooks (see
+``api.seasons.changes``) and consumed by the server-sent events stream in
+``api.attendance.streams``. The broker is pluggable through the
+``ATTENDANCE_BROKER`` setting:
+
+* ``LocalBroker`` - in-process fan-out; enough when publishers and streams run
+  in the same process (``runserver``, a single ASGI worker).
+* ``PostgresBroker`` - relays notifications between processes with
+  PostgreSQL ``LISTEN``/``NOTIFY``, for gunicorn workers publishing to a
+  separate ASGI server.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def season_channel(season_id):
+    """Name of the channel carrying changes of one season."""
+    return f'season-{season_id}'
+
+
+class LocalBroker:
+    """In-process broker fanning messages out to asyncio subscribers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, message):
+        """Deliver a message to all subscribers of a channel; safe from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # The subscriber's event loop is already closed
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        """Subscribe to a channel; yields an ``asyncio.Queue`` of messages."""
+        queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers[channel].add(subscriber)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Broker relaying messages between processes through PostgreSQL NOTIFY.
+
+    Every process that holds subscriptions runs one listener thread with a
+    dedicated connection and fans incoming notifications out locally.
+    """
+    pg_channel = 'oragh_attendance'
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, channel, message):
+        payload = json.dumps({'channel': channel, 'message': message})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.pg_channel, payload])
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        self._ensure_listener()
+        async with super().subscribe(channel) as queue:
+            yield queue
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name='attendance-pubsub-listener', daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self):
+        """Receive notifications forever, reconnecting on connection errors."""
+        db = connections['default']
+        while True:
+            raw_connection = None
+            try:
+                raw_connection = db.get_new_connection(db.get_connection_params())
+                raw_connection.autocommit = True
+                with raw_connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.pg_channel}')
+                while True:
+                    if select.select([raw_connection], [], [], 30) == ([], [], []):
+                        continue
+                    raw_connection.poll()
+                    while raw_connection.notifies:
+                        notification = raw_connection.notifies.pop(0)
+                        data = json.loads(notification.payload)
+                        LocalBroker.publish(self, data['channel'], data['message'])
+            except Exception:
+                logger.exception('Attendance pub/sub listener failed, reconnecting')
+                time.sleep(5)
+            finally:
+                if raw_connection is not None:
+                    raw_connection.close()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """Return the process-wide broker configured by ``ATTENDANCE_BROKER``."""
+    broker_path = getattr(settings, 'ATTENDANCE_BROKER', 'api.attendance.pubsub.LocalBroker')
+    return import_string(broker_path)()
+
+
+def publish_season_change(season_id, attendance=False, season=False):
+    """
+    Notify live streams that a season changed.
+
+    ``attendance`` - attendance rows changed, ``season`` - events or roster changed.
+    Failures are logged and swallowed: the data is already committed and
+    clients fall back to delta sync on reconnect.
+    """
+    try:
+        get_broker().publish(season_channel(season_id), {
+            'season_id': season_id,
+            'attendance': attendance,
+            'season': season,
+        })
+    except Exception:
+        logger.exception('Could not publish change of season %s', season_id)
@@ -0,0 +1,68 @@
+"""
+Generation of recurring event dates (weekly on chosen weekdays, skipping holidays).
+"""
+from datetime import date, timedelta
+from functools import lru_cache
+
+
+def easter_sunday(year):
+    """Date of Easter Sunday (Gregorian calendar, anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=32)
+def polish_holidays(year):
+    """Return the public holidays in Poland in the given year as a dict date -> name."""
+    easter = easter_sunday(year)
+    holidays = {
+        date(year, 1, 1): 'Nowy Rok',
+        date(year, 1, 6): 'Święto Trzech Króli',
+        easter: 'Wielkanoc',
+        easter + timedelta(days=1): 'Poniedziałek Wielkanocny',
+        date(year, 5, 1): 'Święto Pracy',
+        date(year, 5, 3): 'Święto Konstytucji 3 Maja',
+        easter + timedelta(days=49): 'Zielone Świątki',
+        easter + timedelta(days=60): 'Boże Ciało',
+        date(year, 8, 15): 'Wniebowzięcie NMP',
+        date(year, 11, 1): 'Wszystkich Świętych',
+        date(year, 11, 11): 'Narodowe Święto Niepodległości',
+        date(year, 12, 25): 'Boże Narodzenie (pierwszy dzień)',
+        date(year, 12, 26): 'Boże Narodzenie (drugi dzień)',
+    }
+    if year >= 2025:
+        holidays[date(year, 12, 24)] = 'Wigilia Bożego Narodzenia'
+    return holidays
+
+
+def iter_occurrences(start_date, end_date, weekdays, interval=1, skip_holidays=True, skip_dates=()):
+    """
+    Yield ``(date, skip_reason)`` for every matching day between the given dates.
+
+    ``weekdays`` are numbers as in ``date.weekday()`` (0 - Monday); ``interval``
+    repeats every n-th week counting from the week of ``start_date``.
+    ``skip_reason`` is ``None`` for dates that should get an event.
+    """
+    weekdays = set(weekdays)
+    skip_dates = set(skip_dates)
+    week_start = start_date - timedelta(days=start_date.weekday())
+    current = start_date
+    while current <= end_date:
+        week = (current - week_start).days // 7
+        if current.weekday() in weekdays and week % interval == 0:
+            if current in skip_dates:
+                yield current, 'Pominięta data'
+            elif skip_holidays and current in polish_holidays(current.year):
+                yield current, polish_holidays(current.year)[current]
+            else:
+                yield current, None
+        current += timedelta(days=1)
@@ -1,10 +1,17 @@
 """
 Attendance-related serializers for the API.
 """
+from decimal import Decimal
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from .models import Event, Attendance
+from .recurrence import iter_occurrences
+from api.seasons.models import Season
+from api.seasons.changes import mark_seasons_changed
 from api.users.serializers import UserSerializer
 
 
@@ -72,32 +79,156 @@ class EventCreateUpdateSerializer(serializers.ModelSerializer):
         # Allow past dates for historical event entry
         return value
     
+    @transaction.atomic
     def create(self, validated_data):
         """Create event and auto-create attendance records for all musicians in season."""
         event = super().create(validated_data)
         
-        # If event has a season, create attendance records for all musicians in that season
+        # If event has a season, create absent attendance records for all musicians in that season
         if event.season:
-            musicians = event.season.musicians.filter(active=True)
-            attendance_records = []
-            
-            for musician in musicians:
-                # Create attendance record as absent (0.0) for each musician
-                attendance_records.append(
-                    Attendance(
-                        user=musician.user,
-                        event=event,
-                        present=0.0
-                    )
-                )
-            
-            # Bulk create all attendance records
-            if attendance_records:
-                Attendance.objects.bulk_create(attendance_records, ignore_conflicts=True)
+            Attendance.create_absent_for_events([event], event.season)
         
         return event
 
 
+class EventRecurrenceSerializer(serializers.Serializer):
+    """Serializer describing a series of recurring events."""
+    MAX_OCCURRENCES = 200
+    
+    name = serializers.CharField(max_length=255)
+    type = serializers.ChoiceField(choices=Event.EVENT_TYPES)
+    season = serializers.PrimaryKeyRelatedField(queryset=Season.objects.all())
+    start_date = serializers.DateField(required=False, help_text="Defaults to the season start date")
+    end_date = serializers.DateField(required=False, help_text="Defaults to the season end date")
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False,
+        help_text="Weekdays of the events, 0 - Monday ... 6 - Sunday"
+    )
+    interval = serializers.IntegerField(min_value=1, max_value=52, default=1, help_text="Every n-th week")
+    skip_holidays = serializers.BooleanField(default=True, help_text="Skip public holidays in Poland")
+    skip_dates = serializers.ListField(child=serializers.DateField(), required=False, default=list)
+    
+    def validate(self, attrs):
+        """Default the date range to the season and keep it inside the season."""
+        season = attrs['season']
+        attrs.setdefault('start_date', season.start_date)
+        attrs.setdefault('end_date', season.end_date)
+        
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError("Data rozpoczęcia musi być wcześniejsza niż data zakończenia.")
+        if attrs['start_date'] < season.start_date or attrs['end_date'] > season.end_date:
+            raise serializers.ValidationError("Zakres dat musi mieścić się w sezonie.")
+        
+        occurrences = list(iter_occurrences(
+            attrs['start_date'], attrs['end_date'], attrs['weekdays'], attrs['interval'],
+            attrs['skip_holidays'], attrs['skip_dates']
+        ))
+        if sum(1 for _, skip_reason in occurrences if skip_reason is None) > self.MAX_OCCURRENCES:
+            raise serializers.ValidationError(
+                f"Można utworzyć najwyżej {self.MAX_OCCURRENCES} wydarzeń naraz."
+            )
+        attrs['occurrences'] = occurrences
+        return attrs
+    
+    @transaction.atomic
+    def create(self, validated_data):
+        """
+        Create all events of the series and their attendance records with two bulk inserts.
+        
+        Dates that already have an event of the same type in the season are skipped.
+        Returns the created events and the list of skipped dates with reasons.
+        """
+        season = validated_data['season']
+        occurrences = validated_data['occurrences']
+        existing_dates = set(
+            Event.objects.filter(
+                season=season, type=validated_data['type'],
+                date__in=[day for day, _ in occurrences]
+            ).values_list('date', flat=True)
+        )
+        
+        events = []
+        skipped = []
+        for day, skip_reason in occurrences:
+            if skip_reason is None and day in existing_dates:
+                skip_reason = 'Wydarzenie już istnieje'
+            if skip_reason is not None:
+                skipped.append({'date': day, 'reason': skip_reason})
+                continue
+            events.append(Event(
+                name=validated_data['name'],
+                date=day,
+                type=validated_data['type'],
+                season=season,
+                created_by=validated_data.get('created_by'),
+            ))
+        
+        if events:
+            # bulk_create skips signals - the season's structure change is marked explicitly
+            events = Event.objects.bulk_create(events)
+            mark_seasons_changed([season.id])
+            Attendance.create_absent_for_events(events, season)
+        
+        return {'events': events, 'skipped': skipped}
+
+
+class EventDuplicateSerializer(serializers.Serializer):
+    """Serializer for cloning events with shifted dates."""
+    MAX_EVENTS = 200
+    
+    events = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, help_text="Event IDs")
+    days_offset = serializers.IntegerField(
+        min_value=-366, max_value=366, default=7, help_text="Shift of the copies' dates in days"
+    )
+    name_suffix = serializers.CharField(max_length=50, required=False, default='', allow_blank=True, trim_whitespace=False)
+    
+    def validate_events(self, value):
+        """Resolve all events with one query."""
+        if len(value) > self.MAX_EVENTS:
+            raise serializers.ValidationError(f"Można zduplikować najwyżej {self.MAX_EVENTS} wydarzeń naraz.")
+        events = Event.objects.select_related('season').in_bulk(set(value))
+        missing = sorted(set(value) - set(events))
+        if missing:
+            raise serializers.ValidationError(
+                f"Nie znaleziono wydarzeń: {', '.join(str(event_id) for event_id in missing)}."
+            )
+        return [events[event_id] for event_id in dict.fromkeys(value)]
+    
+    def validate(self, attrs):
+        """Keep every copy inside the season of its original."""
+        from datetime import timedelta
+        
+        shift = timedelta(days=attrs['days_offset'])
+        outside = [
+            event.name for event in attrs['events']
+            if not event.season.start_date <= event.date + shift <= event.season.end_date
+        ]
+        if outside:
+            raise serializers.ValidationError(
+                f"Kopie tych wydarzeń wypadłyby poza sezon: {', '.join(outside)}."
+            )
+        return attrs
+    
+    def create(self, validated_data):
+        """Clone the events and seed their attendance in one transaction."""
+        return Event.duplicate(
+            validated_data['events'],
+            days_offset=validated_data['days_offset'],
+            name_suffix=validated_data['name_suffix'],
+            created_by=validated_data.get('created_by'),
+        )
+
+
+class EventBriefSerializer(serializers.ModelSerializer):
+    """Serializer for events without statistics (no per-event queries)."""
+    
+    class Meta:
+        model = Event
+        fields = ['id', 'name', 'date', 'type', 'season', 'created_at']
+        read_only_fields = fields
+
+
 class AttendanceSerializer(serializers.ModelSerializer):
     """Serializer for attendance records."""
     user = UserSerializer(read_only=True)
@@ -117,6 +248,81 @@ class AttendanceSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'event', 'marked_by', 'created_at', 'updated_at', 'is_present', 'is_half', 'is_full', 'is_absent']
 
 
+class AttendanceFlatSerializer(serializers.ModelSerializer):
+    """
+    Lean serializer for attendance lists: related objects are referenced by id
+    and side-loaded once per page (see ``AttendanceViewSet.list``).
+    """
+    is_present = serializers.ReadOnlyField()
+    is_half = serializers.ReadOnlyField()
+    is_full = serializers.ReadOnlyField()
+    is_absent = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = Attendance
+        fields = [
+            'id', 'user', 'event', 'present', 'is_present', 'is_half',
+            'is_full', 'is_absent', 'marked_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+def get_side_loaded_users(user_ids):
+    """Brief representation of the given users, with their instrument."""
+    users = User.objects.filter(id__in=user_ids).order_by('last_name', 'first_name').values(
+        'id', 'username', 'first_name', 'last_name', 'musicianprofile__instrument'
+    )
+    return [
+        {
+            'id': user['id'],
+            'username': user['username'],
+            'first_name': user['first_name'],
+            'last_name': user['last_name'],
+            'instrument': user['musicianprofile__instrument'],
+        }
+        for user in users
+    ]
+
+
+def get_side_loaded_events(event_ids, with_stats=False):
+    """
+    Brief representation of the given events. With ``with_stats`` the attendance
+    statistics of all events are computed with one grouped query.
+    """
+    events = list(
+        Event.objects.filter(id__in=event_ids)
+        .values('id', 'name', 'date', 'type', 'season', 'season__name')
+    )
+    for event in events:
+        event['season_name'] = event.pop('season__name')
+    
+    if with_stats:
+        # Aliases must not clash with the `present` field
+        stats = {
+            row['event_id']: row
+            for row in Attendance.objects.filter(event_id__in=event_ids).values('event_id').annotate(
+                total_count=Count('id'),
+                present_count=Count('id', filter=Q(present__gt=0)),
+                absent_count=Count('id', filter=Q(present=0)),
+                half_count=Count('id', filter=Q(present=0.5)),
+                full_count=Count('id', filter=Q(present=1.0)),
+                value=Sum('present'),
+            )
+        }
+        for event in events:
+            row = stats.get(event['id'])
+            total = row['total_count'] if row else 0
+            event['attendance_stats'] = {
+                'total': total,
+                'present': row['present_count'] if row else 0,
+                'absent': row['absent_count'] if row else 0,
+                'half': row['half_count'] if row else 0,
+                'full': row['full_count'] if row else 0,
+                'attendance_rate': round(float(row['value'] or 0) / total * 100, 2) if total else 0,
+            }
+    return events
+
+
 class AttendanceMarkSerializer(serializers.Serializer):
     """Serializer for marking attendance for multiple users."""
     attendances = serializers.ListField(
@@ -151,3 +357,30 @@ class AttendanceMarkSerializer(serializers.Serializer):
                 raise serializers.ValidationError("present musi być liczbą.")
         
         return value
+
+
+class AttendanceChangeSerializer(serializers.Serializer):
+    """One offline attendance change."""
+    user_id = serializers.IntegerField()
+    event_id = serializers.IntegerField()
+    present = serializers.DecimalField(max_digits=2, decimal_places=1)
+    base_version = serializers.CharField(required=False, allow_null=True, default=None,
+                                         help_text="Version of the row the change was made on")
+    
+    def validate_present(self, value):
+        if value not in (0, Decimal('0.5'), 1):
+            raise serializers.ValidationError("Wartość present musi być 0.0, 0.5 lub 1.0.")
+        return value
+
+
+class AttendanceSyncSerializer(serializers.Serializer):
+    """Batch of offline attendance changes plus the client's last sync token."""
+    MAX_CHANGES = 2000
+    
+    since = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    changes = AttendanceChangeSerializer(many=True, required=False)
+    
+    def validate_changes(self, value):
+        if len(value) > self.MAX_CHANGES:
+            raise serializers.ValidationError(f"Można przesłać najwyżej {self.MAX_CHANGES} zmian naraz.")
+        return value
@@ -0,0 +1,103 @@
+"""
+Django signals keeping cached season data and attendance summaries in sync
+with attendance writes.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from api.seasons.changes import mark_seasons_changed, mark_attendance_changed
+from .models import Event, Attendance, AttendanceTombstone
+
+# Attribute of a deletion's origin (the deleted instance or queryset) holding the ids
+# of attendance rows whose tombstones were written in bulk ahead of its cascade
+TOMBSTONED_ATTR = '_attendance_tombstoned'
+
+
+@receiver(pre_save, sender=Event)
+def remember_previous_state(sender, instance, **kwargs):
+    """
+    Remember the season and type an existing event had before saving.
+    Moving an event between seasons changes both of them.
+    """
+    instance._previous_state = None
+    if instance.pk:
+        instance._previous_state = (
+            Event.objects.filter(pk=instance.pk).values_list('season_id', 'type').first()
+        )
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, created, **kwargs):
+    """Mark the event's season (and its previous one) as changed."""
+    previous_season_id, previous_type = getattr(instance, '_previous_state', None) or (None, None)
+    moved = previous_season_id is not None and (
+        previous_season_id != instance.season_id or previous_type != instance.type
+    )
+    # Summaries only change when attendance rows move to another season or event type
+    mark_seasons_changed([instance.season_id, previous_season_id], summaries=moved)
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    """The event's attendance rows were deleted with it."""
+    mark_seasons_changed([instance.season_id], summaries=True)
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def attendance_changed(sender, instance, **kwargs):
+    """Mark the attendance's event and musician as changed."""
+    mark_attendance_changed([instance.event_id], [instance.user_id])
+
+
+def _tombstone_in_bulk(queryset, origin):
+    """
+    Write the tombstones of attendance rows a cascade delete is about to remove
+    with one query and one bulk insert; the per-row signal then skips them.
+
+    The ids are kept on the deletion's origin, so they only apply to this
+    cascade - if it rolls back, later deletes of the same rows still write
+    their tombstones.
+    """
+    if origin is None:
+        return
+    rows = list(queryset.values_list('id', 'user_id', 'event_id', 'event__season_id'))
+    if not rows:
+        return
+    AttendanceTombstone.objects.bulk_create([
+        AttendanceTombstone(attendance_id=pk, user_id=user_id, event_id=event_id, season_id=season_id)
+        for pk, user_id, event_id, season_id in rows
+    ], batch_size=1000)
+    if not hasattr(origin, TOMBSTONED_ATTR):
+        setattr(origin, TOMBSTONED_ATTR, set())
+    getattr(origin, TOMBSTONED_ATTR).update(row[0] for row in rows)
+
+
+@receiver(pre_delete, sender=Event)
+def tombstone_event_attendance(sender, instance, origin=None, **kwargs):
+    """The event's attendance rows are deleted with it."""
+    _tombstone_in_bulk(Attendance.objects.filter(event_id=instance.pk), origin)
+
+
+@receiver(pre_delete, sender=User)
+def tombstone_user_attendance(sender, instance, origin=None, **kwargs):
+    """The user's attendance rows are deleted with them."""
+    _tombstone_in_bulk(Attendance.objects.filter(user_id=instance.pk), origin)
+
+
+@receiver(post_delete, sender=Attendance)
+def record_attendance_tombstone(sender, instance, origin=None, **kwargs):
+    """Leave a tombstone so delta-syncing clients drop the deleted row."""
+    if instance.pk in getattr(origin, TOMBSTONED_ATTR, ()):
+        return
+    if Attendance.event.is_cached(instance):
+        season_id = instance.event.season_id
+    else:
+        season_id = Event.objects.filter(pk=instance.event_id).values_list('season_id', flat=True).first()
+    AttendanceTombstone.objects.create(
+        attendance_id=instance.pk,
+        user_id=instance.user_id,
+        event_id=instance.event_id,
+        season_id=season_id,
+    )
@@ -0,0 +1,156 @@
+"""
+Server-sent events stream of live attendance changes.
+
+Plain async Django views (DRF has no async support) meant to be served by the
+ASGI application, where one worker can hold many idle connections. Each
+connection subscribes to its season's channel and, when notified, pushes the
+attendance delta since the last event it sent. The ``id`` of every attendance
+event is a sync token, so a reconnecting ``EventSource`` resumes through
+``Last-Event-ID`` without missing changes.
+
+``EventSource`` cannot send headers, so instead of the JWT (which would end up
+in access logs) the stream is opened with a short-lived ticket from the
+season's ``stream_ticket`` endpoint. A ticket is signed for one user and one
+season and only accepted by this view. Once it has expired, reconnects are
+rejected with 401 and the client asks for a new ticket, passing the last event
+id as ``?since=``.
+
+Database work runs in shared pool threads that close their connection after
+every query, so an idle stream holds neither a thread nor a database
+connection. Under WSGI (``runserver``) an async streaming response is consumed
+as a whole and never flushed, so the stream answers 501 there - run the ASGI
+application (``uvicorn oragh_platform.asgi:application``) to use it.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from api.seasons.models import Season
+from .pubsub import get_broker, season_channel
+from .sync import get_attendance_delta, make_sync_token, parse_sync_token, InvalidSyncToken
+
+KEEPALIVE_INTERVAL = 15  # seconds
+RETRY_INTERVAL = 3000  # milliseconds, reconnection delay suggested to the browser
+STREAM_TICKET_MAX_AGE = 60  # seconds
+
+_ticket_signer = signing.TimestampSigner(salt='api.attendance.streams.ticket')
+
+
+def make_stream_ticket(user, season):
+    """Issue a ticket that opens the attendance stream of ``season`` for ``user``."""
+    return _ticket_signer.sign(f'{user.pk}:{season.pk}')
+
+
+def _check_stream_ticket(ticket, season_id):
+    """Return the id of the user a valid ticket for ``season_id`` was issued to, or ``None``."""
+    try:
+        user_id, ticket_season_id = _ticket_signer.unsign(ticket, max_age=STREAM_TICKET_MAX_AGE).split(':')
+    except (signing.BadSignature, ValueError):
+        return None
+    return int(user_id) if int(ticket_season_id) == season_id else None
+
+
+def _in_pool(func):
+    """
+    Wrap a database helper to run in a shared pool thread and close the
+    thread's connection afterwards. The request's thread-sensitive executor
+    would keep a thread and a connection for the whole life of the stream.
+    """
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            connection.close()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def _open_season(user_id, season_id):
+    """Return ``(season, None)`` if the ticket's user may follow the season, else ``(None, error response)``."""
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return None, JsonResponse({'detail': 'Nieprawidłowy lub wygasły bilet strumienia.'}, status=401)
+    season = Season.objects.filter(pk=season_id).first()
+    if season is None:
+        return None, JsonResponse({'detail': 'Nie znaleziono sezonu.'}, status=404)
+    # Checked again on every connection - the roster may have changed since the ticket was issued
+    if not season.can_user_view_attendance(user):
+        return None, JsonResponse({'detail': 'Brak dostępu do obecności w tym sezonie.'}, status=403)
+    return season, None
+
+
+def _format_event(event, data, event_id=None):
+    """Format one server-sent event."""
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, cls=DjangoJSONEncoder)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _event_stream(season, since):
+    """Yield server-sent events for one season until the client disconnects."""
+    async with get_broker().subscribe(season_channel(season.id)) as messages:
+        yield f'retry: {RETRY_INTERVAL}\n\n'
+
+        # Catch up on changes made while the client was disconnected
+        attendance_pending = since is not None
+        since = since or timezone.now()
+
+        while True:
+            if attendance_pending:
+                delta = await _in_pool(get_attendance_delta)(season, since)
+                since = parse_sync_token(delta['sync_token'])
+                if delta['full'] or delta['changes'] or delta['deleted']:
+                    yield _format_event('attendance', delta, event_id=delta['sync_token'])
+                attendance_pending = False
+
+            try:
+                message = await asyncio.wait_for(messages.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+
+            # Coalesce bursts of notifications into one delta query
+            season_changed = message['season']
+            attendance_pending = message['attendance']
+            while not messages.empty():
+                message = messages.get_nowait()
+                season_changed = season_changed or message['season']
+                attendance_pending = attendance_pending or message['attendance']
+
+            if season_changed:
+                # Events or roster changed - clients reload the grid
+                yield _format_event('season', {'season_id': season.id}, event_id=make_sync_token(since))
+
+
+async def season_attendance_stream(request, season_id):
+    """Stream attendance changes of a season as server-sent events."""
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Strumień wymaga serwera ASGI.'}, status=501)
+
+    ticket = request.GET.get('ticket')
+    user_id = _check_stream_ticket(ticket, season_id) if ticket else None
+    if user_id is None:
+        return JsonResponse({'detail': 'Nieprawidłowy lub wygasły bilet strumienia.'}, status=401)
+    season, error = await _in_pool(_open_season)(user_id, season_id)
+    if error is not None:
+        return error
+
+    try:
+        since = parse_sync_token(request.headers.get('Last-Event-ID') or request.GET.get('since'))
+    except InvalidSyncToken:
+        return JsonResponse({'detail': 'Nieprawidłowy token synchronizacji.'}, status=400)
+
+    response = StreamingHttpResponse(_event_stream(season, since), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # disable nginx response buffering
+    return response
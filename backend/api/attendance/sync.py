@@ -0,0 +1,219 @@
+"""
+Delta synchronisation of attendance records.
+
+Clients keep a local copy of a season's attendance and poll with the
+``sync_token`` returned by the previous response. Only rows changed since then
+are returned, plus tombstones of deleted rows. Clients should apply the
+tombstones first and the changed rows second.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Attendance, AttendanceTombstone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Rows committed by a transaction that started before the token was issued can
+# carry an `updated_at` slightly older than the token - re-send a short window.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Tombstones older than this are pruned; older tokens get a full snapshot
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+
+class InvalidSyncToken(ValueError):
+    """Raised for sync tokens that cannot be parsed."""
+
+
+def make_sync_token(moment):
+    """Encode a point in time as an opaque, URL-safe sync token."""
+    return str((moment - EPOCH) // timedelta(microseconds=1))
+
+
+def parse_sync_token(token):
+    """Decode a sync token; empty tokens mean "no previous sync"."""
+    if not token:
+        return None
+    try:
+        return EPOCH + timedelta(microseconds=int(token))
+    except (ValueError, OverflowError):
+        raise InvalidSyncToken(token)
+
+
+def serialize_attendance_rows(queryset):
+    """
+    Flat representation of attendance rows used by the sync endpoints.
+
+    ``version`` encodes ``updated_at`` and is what clients send back as the
+    base version of their offline changes.
+    """
+    rows = queryset.values('id', 'user_id', 'event_id', 'present', 'marked_by_id', 'updated_at')
+    return [
+        {**row, 'present': float(row['present']), 'version': make_sync_token(row['updated_at'])}
+        for row in rows
+    ]
+
+
+def get_attendance_delta(season, since=None):
+    """
+    Return attendance changes of a season since the given moment.
+
+    Without ``since`` (or when it is older than the tombstone retention) a full
+    snapshot is returned and ``full`` is set, telling the client to replace its
+    local copy instead of merging.
+    """
+    now = timezone.now()
+    full = since is None or since < now - TOMBSTONE_RETENTION
+
+    changed = Attendance.objects.filter(event__season=season).order_by('updated_at', 'id')
+    deleted = []
+    if not full:
+        threshold = since - SYNC_OVERLAP
+        changed = changed.filter(updated_at__gt=threshold)
+        deleted = list(
+            AttendanceTombstone.objects.filter(
+                season_id=season.id, deleted_at__gt=threshold
+            ).order_by('deleted_at').values('attendance_id', 'user_id', 'event_id', 'deleted_at')
+        )
+
+    return {
+        'sync_token': make_sync_token(now),
+        'full': full,
+        'changes': serialize_attendance_rows(changed),
+        'deleted': deleted,
+    }
+
+
+def _conflict(index, change, server):
+    """Describe a change rejected because the server row (a dict, or ``None``) moved on."""
+    return {
+        'index': index,
+        'user_id': change['user_id'],
+        'event_id': change['event_id'],
+        'present': float(change['present']),
+        'base_version': change.get('base_version'),
+        'server': None if server is None else {
+            'id': server['id'],
+            'present': float(server['present']),
+            'marked_by_id': server['marked_by_id'],
+            'version': make_sync_token(server['updated_at']),
+        },
+    }
+
+
+def apply_attendance_changes(season, changes, marked_by=None):
+    """
+    Apply a batch of offline attendance changes of a season.
+
+    Every change carries the ``base_version`` of the row the client edited
+    (``None`` for rows the client has never seen). A change is applied when
+    the row is still at that version, and reported as a conflict with the
+    current server row otherwise - unless both sides already agree on the
+    value. The batch's events and existing rows are locked while it is
+    checked; the event lock also covers rows that do not exist yet, so two
+    batches cannot both create the same row. Check-in does not take the event
+    lock, so new rows are inserted with ``ON CONFLICT DO NOTHING`` and a row a
+    check-in created in the meantime is reported as a conflict.
+
+    Returns ``(applied, conflicts, errors)``.
+    """
+    from api.seasons.changes import mark_attendance_changed
+
+    roster = set(season.musicians.values_list('user_id', flat=True))
+
+    applied, conflicts, errors, to_write = [], [], [], {}
+    with transaction.atomic():
+        # Locked in id order so concurrent batches over the same events cannot deadlock
+        event_ids = set(
+            season.events.select_for_update().filter(
+                id__in={change['event_id'] for change in changes}
+            ).order_by('id').values_list('id', flat=True)
+        )
+        current = {
+            (row.user_id, row.event_id): row
+            for row in Attendance.objects.select_for_update().filter(
+                user_id__in={change['user_id'] for change in changes},
+                event_id__in=event_ids,
+            )
+        }
+
+        for index, change in enumerate(changes):
+            key = (change['user_id'], change['event_id'])
+            if change['event_id'] not in event_ids:
+                errors.append({'index': index, 'detail': 'Wydarzenie nie należy do tego sezonu.'})
+                continue
+            if change['user_id'] not in roster:
+                errors.append({'index': index, 'detail': 'Użytkownik nie należy do tego sezonu.'})
+                continue
+            if key in to_write:
+                errors.append({'index': index, 'detail': 'Zduplikowana zmiana.'})
+                continue
+
+            row = current.get(key)
+            server_version = make_sync_token(row.updated_at) if row else None
+            if row is not None and row.present == change['present']:
+                # Both sides agree - nothing to write, hand back the server version
+                applied.append({'index': index, 'id': row.id, 'version': server_version})
+                continue
+            if server_version != change.get('base_version'):
+                conflicts.append(_conflict(index, change, None if row is None else {
+                    'id': row.id, 'present': row.present, 'marked_by_id': row.marked_by_id, 'updated_at': row.updated_at,
+                }))
+                continue
+
+            to_write[key] = (index, change, Attendance(
+                user_id=change['user_id'], event_id=change['event_id'],
+                present=change['present'], marked_by=marked_by,
+            ))
+
+        if to_write:
+            # Existing rows are locked and upserted. New rows are inserted with ON CONFLICT
+            # DO NOTHING: check-in does not take the event lock, and a row it inserted since
+            # the check must be reported as a conflict rather than overwritten.
+            # bulk_create skips signals - changes are marked explicitly below
+            existing = [attendance for key, (_, _, attendance) in to_write.items() if key in current]
+            new = [attendance for key, (_, _, attendance) in to_write.items() if key not in current]
+            if existing:
+                Attendance.objects.bulk_create(
+                    existing,
+                    update_conflicts=True,
+                    unique_fields=['user', 'event'],
+                    update_fields=['present', 'marked_by', 'updated_at'],
+                )
+            if new:
+                Attendance.objects.bulk_create(new, ignore_conflicts=True)
+
+            written = {
+                (row['user_id'], row['event_id']): row
+                for row in Attendance.objects.filter(
+                    user_id__in={user_id for user_id, _ in to_write},
+                    event_id__in={event_id for _, event_id in to_write},
+                ).values('id', 'user_id', 'event_id', 'present', 'marked_by_id', 'updated_at')
+            }
+            for key, (index, change, attendance) in list(to_write.items()):
+                row = written[key]
+                if key not in current and row['updated_at'] != attendance.updated_at:
+                    # Inserted concurrently - this change was not written
+                    conflicts.append(_conflict(index, change, row))
+                    del to_write[key]
+                    continue
+                applied.append({'index': index, 'id': row['id'], 'version': make_sync_token(row['updated_at'])})
+
+            if to_write:
+                mark_attendance_changed(
+                    {event_id for _, event_id in to_write},
+                    {user_id for user_id, _ in to_write},
+                )
+
+    applied.sort(key=lambda item: item['index'])
+    conflicts.sort(key=lambda item: item['index'])
+
+    return applied, conflicts, errors
+
+
+def prune_tombstones(retention=TOMBSTONE_RETENTION):
+    """Delete tombstones no client can still need; returns the number deleted."""
+    deleted, _ = AttendanceTombstone.objects.filter(deleted_at__lt=timezone.now() - retention).delete()
+    return deleted
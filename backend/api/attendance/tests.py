@@ -0,0 +1,210 @@
+"""
+Tests of attendance delta sync: conflict detection of offline changes and
+tombstones of deleted rows.
+"""
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from api.seasons.models import Season
+from api.users.models import MusicianProfile
+from .models import Event, Attendance, AttendanceTombstone
+from .sync import apply_attendance_changes, get_attendance_delta, make_sync_token
+
+
+class AttendanceTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.season = Season.objects.create(
+            name='2025/2026', start_date=datetime.date(2025, 9, 1), end_date=datetime.date(2026, 6, 30)
+        )
+        cls.board = User.objects.create(username='zarzad')
+        cls.users = [User.objects.create(username=f'muzyk{i}') for i in range(3)]
+        cls.season.musicians.set(
+            MusicianProfile.objects.create(user=user, instrument='flet') for user in cls.users
+        )
+        cls.events = [
+            Event.objects.create(
+                name=f'Próba {day}', date=datetime.date(2025, 10, 1 + day), type='rehearsal', season=cls.season
+            )
+            for day in range(2)
+        ]
+        Attendance.objects.bulk_create(
+            Attendance(user=user, event=event, present=0) for user in cls.users for event in cls.events
+        )
+
+
+class AttendanceSyncTests(AttendanceTestCase):
+
+    def attendance(self, user, event):
+        return Attendance.objects.get(user=user, event=event)
+
+    def change(self, user, event, present, base_version):
+        return {'user_id': user.id, 'event_id': event.id, 'present': Decimal(present), 'base_version': base_version}
+
+    def test_change_of_current_version_is_applied(self):
+        row = self.attendance(self.users[0], self.events[0])
+
+        applied, conflicts, errors = apply_attendance_changes(
+            self.season, [self.change(self.users[0], self.events[0], '1', make_sync_token(row.updated_at))],
+            marked_by=self.board,
+        )
+
+        self.assertEqual((len(applied), conflicts, errors), (1, [], []))
+        row.refresh_from_db()
+        self.assertEqual((row.present, row.marked_by), (1, self.board))
+        self.assertEqual(applied[0]['version'], make_sync_token(row.updated_at))
+
+    def test_change_of_stale_version_is_a_conflict(self):
+        row = self.attendance(self.users[0], self.events[0])
+        stale_version = make_sync_token(row.updated_at)
+        # Someone else marked the row after the client synced
+        row.present = Decimal('0.5')
+        row.save()
+
+        applied, conflicts, errors = apply_attendance_changes(
+            self.season, [self.change(self.users[0], self.events[0], '1', stale_version)]
+        )
+
+        self.assertEqual(applied, [])
+        self.assertEqual(conflicts[0]['base_version'], stale_version)
+        self.assertEqual(conflicts[0]['server']['present'], 0.5)
+        self.assertEqual(conflicts[0]['server']['version'], make_sync_token(row.updated_at))
+        self.assertEqual(self.attendance(self.users[0], self.events[0]).present, Decimal('0.5'))
+
+    def test_stale_change_agreeing_with_the_server_is_applied(self):
+        row = self.attendance(self.users[0], self.events[0])
+        stale_version = make_sync_token(row.updated_at)
+        row.present = 1
+        row.save()
+
+        applied, conflicts, errors = apply_attendance_changes(
+            self.season, [self.change(self.users[0], self.events[0], '1', stale_version)]
+        )
+
+        self.assertEqual(conflicts, [])
+        self.assertEqual(applied[0]['version'], make_sync_token(row.updated_at))
+
+    def test_new_row_the_client_has_not_seen_is_a_conflict(self):
+        row = self.attendance(self.users[0], self.events[0])
+
+        applied, conflicts, errors = apply_attendance_changes(
+            self.season, [self.change(self.users[0], self.events[0], '1', None)]
+        )
+
+        self.assertEqual(applied, [])
+        self.assertEqual(conflicts[0]['server']['id'], row.id)
+
+    def test_new_row_is_created(self):
+        Attendance.objects.filter(user=self.users[0], event=self.events[0]).delete()
+
+        applied, conflicts, errors = apply_attendance_changes(
+            self.season, [self.change(self.users[0], self.events[0], '0.5', None)]
+        )
+
+        self.assertEqual(conflicts, [])
+        self.assertEqual(applied[0]['id'], self.attendance(self.users[0], self.events[0]).id)
+
+    def test_row_inserted_by_a_concurrent_check_in_is_a_conflict(self):
+        Attendance.objects.filter(user=self.users[0], event=self.events[0]).delete()
+        bulk_create = QuerySet.bulk_create
+
+        def check_in_first(queryset, objs, *args, **kwargs):
+            # A check-in commits its row between the sync's check and its insert
+            if kwargs.get('ignore_conflicts'):
+                bulk_create(queryset, [Attendance(user=self.users[0], event=self.events[0], present=1)])
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'bulk_create', check_in_first):
+            applied, conflicts, errors = apply_attendance_changes(
+                self.season, [
+                    self.change(self.users[0], self.events[0], '0.5', None),
+                    self.change(self.users[1], self.events[0], '1', make_sync_token(
+                        self.attendance(self.users[1], self.events[0]).updated_at
+                    )),
+                ]
+            )
+
+        self.assertEqual([item['index'] for item in applied], [1])
+        self.assertEqual([item['index'] for item in conflicts], [0])
+        self.assertEqual(conflicts[0]['server']['present'], 1.0)
+        self.assertEqual(self.attendance(self.users[0], self.events[0]).present, 1)
+
+    def test_changes_outside_the_season_are_rejected(self):
+        other = Season.objects.create(
+            name='2024/2025', start_date=datetime.date(2024, 9, 1), end_date=datetime.date(2025, 6, 30)
+        )
+        other_event = Event.objects.create(name='Próba', date=datetime.date(2024, 10, 1), type='rehearsal', season=other)
+        outsider = User.objects.create(username='gosc')
+
+        applied, conflicts, errors = apply_attendance_changes(self.season, [
+            self.change(self.users[0], other_event, '1', None),
+            self.change(outsider, self.events[0], '1', None),
+        ])
+
+        self.assertEqual(([item['index'] for item in errors], applied, conflicts), ([0, 1], [], []))
+
+
+class AttendanceTombstoneTests(AttendanceTestCase):
+
+    def tombstones(self):
+        return sorted(AttendanceTombstone.objects.values_list('attendance_id', 'season_id'))
+
+    def attendance_ids(self, **filters):
+        return sorted(Attendance.objects.filter(**filters).values_list('id', flat=True))
+
+    def test_deleting_an_event_leaves_one_tombstone_per_attendance(self):
+        ids = self.attendance_ids(event=self.events[0])
+
+        self.events[0].delete()
+
+        self.assertEqual(self.tombstones(), [(pk, self.season.id) for pk in ids])
+
+    def test_deleting_events_in_bulk_leaves_tombstones(self):
+        ids = self.attendance_ids()
+
+        Event.objects.filter(season=self.season).delete()
+
+        self.assertEqual(self.tombstones(), [(pk, self.season.id) for pk in ids])
+
+    def test_deleting_a_user_leaves_tombstones_of_their_attendance(self):
+        ids = self.attendance_ids(user=self.users[0])
+
+        self.users[0].delete()
+
+        self.assertEqual(self.tombstones(), [(pk, self.season.id) for pk in ids])
+
+    def test_deleting_a_single_row_leaves_a_tombstone(self):
+        row = Attendance.objects.get(user=self.users[0], event=self.events[0])
+        pk = row.pk
+
+        row.delete()
+
+        self.assertEqual(self.tombstones(), [(pk, self.season.id)])
+
+    def test_rolled_back_cascade_does_not_suppress_later_tombstones(self):
+        row = Attendance.objects.get(user=self.users[0], event=self.events[0])
+        pk = row.pk
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Event.objects.get(pk=self.events[0].pk).delete()
+            raise RuntimeError
+
+        row.delete()
+
+        self.assertEqual(self.tombstones(), [(pk, self.season.id)])
+
+    def test_delta_reports_tombstones_of_deleted_rows(self):
+        since = Attendance.objects.latest('updated_at').updated_at
+        ids = self.attendance_ids(event=self.events[0])
+
+        self.events[0].delete()
+
+        delta = get_attendance_delta(self.season, since)
+        self.assertFalse(delta['full'])
+        self.assertEqual(sorted(item['attendance_id'] for item in delta['deleted']), ids)
@@ -4,11 +4,14 @@ URL configuration for attendance app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import EventViewSet, AttendanceViewSet
+from .streams import season_attendance_stream
 
 router = DefaultRouter()
 router.register(r'events', EventViewSet)
 router.register(r'attendances', AttendanceViewSet)
 
 urlpatterns = [
+    # Server-sent events, served by the ASGI application
+    path('seasons/<int:season_id>/stream/', season_attendance_stream, name='season-attendance-stream'),
     path('', include(router.urls)),
 ]
@@ -3,6 +3,7 @@ Attendance-related API views.
 """
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import Count, Q, Avg, Sum
 from django.utils import timezone
 from rest_framework import viewsets, status
@@ -14,7 +15,9 @@ from rest_framework.pagination import PageNumberPagination
 from .models import Event, Attendance
 from .serializers import (
     EventListSerializer, EventDetailSerializer, EventCreateUpdateSerializer,
-    AttendanceSerializer, AttendanceMarkSerializer
+    AttendanceSerializer, AttendanceMarkSerializer, EventRecurrenceSerializer, EventBriefSerializer,
+    EventDuplicateSerializer,
+    AttendanceFlatSerializer, get_side_loaded_users, get_side_loaded_events
 )
 from .permissions import IsBoardMemberOrReadOnly, IsBoardMember
 
@@ -87,6 +90,76 @@ class EventViewSet(viewsets.ModelViewSet):
         """Set created_by when creating an event."""
         serializer.save(created_by=self.request.user)
     
+    @action(detail=False, methods=['post'])
+    def recurring(self, request):
+        """
+        Create a series of events, e.g. weekly rehearsals on Mondays and Thursdays.
+        
+        All events and their attendance records are created in one transaction.
+        Public holidays (unless `skip_holidays` is false), dates from `skip_dates`
+        and dates that already have an event of the same type are skipped.
+        """
+        serializer = EventRecurrenceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save(created_by=request.user)
+        
+        return Response({
+            'detail': f"Utworzono {len(result['events'])} wydarzeń.",
+            'created': len(result['events']),
+            'events': EventBriefSerializer(result['events'], many=True).data,
+            'skipped': result['skipped'],
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def duplicate(self, request):
+        """
+        Clone events with dates shifted by `days_offset` (7 by default).
+        
+        The copies get absent attendance records for the musicians of the
+        original events; everything is inserted in bulk in one transaction.
+        """
+        serializer = EventDuplicateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        events = serializer.save(created_by=request.user)
+        
+        return Response({
+            'detail': f'Zduplikowano {len(events)} wydarzeń.',
+            'created': len(events),
+            'events': EventBriefSerializer(events, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def check_in(self, request, pk=None):
+        """
+        Check the current user in as present at this event (idempotent).
+        
+        Only possible on the event day and for musicians of the season roster;
+        `code` is the event code shown by the board (required when enabled).
+        """
+        from .checkin import check_in, CheckInError
+        
+        event = self.get_object()
+        try:
+            attendance = check_in(event, request.user, code=request.data.get('code'))
+        except CheckInError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'detail': 'Potwierdzono obecność.' if attendance.present == 1 else 'Obecność została już oznaczona przez zarząd.',
+            'event_id': event.id,
+            'present': float(attendance.present),
+            'checked_in_at': attendance.updated_at,
+        })
+    
+    @action(detail=True, methods=['get'], permission_classes=[IsBoardMember])
+    def check_in_code(self, request, pk=None):
+        """Get the current short-lived check-in code of this event."""
+        from .checkin import make_checkin_code
+        
+        event = self.get_object()
+        code, expires_at = make_checkin_code(event.id)
+        return Response({'event_id': event.id, 'code': code, 'expires_at': expires_at})
+    
     @action(detail=True, methods=['get'])
     def attendances(self, request, pk=None):
         """Get attendance records for this event."""
@@ -114,28 +187,30 @@ class EventViewSet(viewsets.ModelViewSet):
             created_count = 0
             updated_count = 0
             
-            for attendance_data in attendances_data:
-                user_id = int(attendance_data['user_id'])
-                present_value = float(attendance_data['present'])
-                
-                try:
-                    user = User.objects.get(id=user_id)
-                except User.DoesNotExist:
-                    continue
-                
-                attendance, created = Attendance.objects.update_or_create(
-                    user=user,
-                    event=event,
-                    defaults={
-                        'present': present_value,
-                        'marked_by': request.user
-                    }
-                )
-                
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
+            # One transaction so the season's cached data is invalidated once per request
+            with transaction.atomic():
+                for attendance_data in attendances_data:
+                    user_id = int(attendance_data['user_id'])
+                    present_value = float(attendance_data['present'])
+                    
+                    try:
+                        user = User.objects.get(id=user_id)
+                    except User.DoesNotExist:
+                        continue
+                    
+                    attendance, created = Attendance.objects.update_or_create(
+                        user=user,
+                        event=event,
+                        defaults={
+                            'present': present_value,
+                            'marked_by': request.user
+                        }
+                    )
+                    
+                    if created:
+                        created_count += 1
+                    else:
+                        updated_count += 1
             
             return Response({
                 'detail': f'Oznaczono obecność dla {created_count + updated_count} osób.',
@@ -147,15 +222,73 @@ class EventViewSet(viewsets.ModelViewSet):
 
 
 class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for viewing attendance records."""
+    """
+    ViewSet for viewing attendance records.
+    
+    The list is flat: rows reference users and events by id, and the users and
+    events of the page are side-loaded once (`users`, `events`). Event statistics
+    are only included with `?expand=stats`.
+    """
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = AttendancePagination
     
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return AttendanceFlatSerializer
+        return AttendanceSerializer
+    
+    def list(self, request, *args, **kwargs):
+        """List attendance records with side-loaded users and events."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        
+        serializer = self.get_serializer(rows, many=True)
+        if page is not None:
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response({'results': serializer.data})
+        
+        expand = set(request.query_params.get('expand', '').split(','))
+        user_ids = {row.user_id for row in rows} | {row.marked_by_id for row in rows if row.marked_by_id}
+        response.data['users'] = get_side_loaded_users(user_ids)
+        response.data['events'] = get_side_loaded_events(
+            {row.event_id for row in rows}, with_stats='stats' in expand
+        )
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        """
+        Attendance calendar of one musician across all seasons with rolling 4/8-week rates.
+        
+        Defaults to the requesting user; board members may pass `?user=<id>`.
+        """
+        from .heatmap import get_attendance_heatmap
+        
+        user_id = request.query_params.get('user')
+        if not user_id:
+            return Response(get_attendance_heatmap(request.user.id))
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            return Response({'detail': 'Nieprawidłowy identyfikator użytkownika.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if user_id != request.user.id and not IsBoardMember().has_permission(request, self):
+            return Response(
+                {'detail': 'Możesz przeglądać tylko własną historię obecności.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        get_object_or_404(User, pk=user_id)
+        return Response(get_attendance_heatmap(user_id))
+    
     def get_queryset(self):
         """Filter attendance based on query parameters."""
-        queryset = Attendance.objects.select_related('user', 'event', 'marked_by')
+        queryset = Attendance.objects.all()
+        if self.action != 'list':
+            queryset = queryset.select_related('user', 'event', 'marked_by')
         
         # Filter by user
         user_id = self.request.query_params.get('user')
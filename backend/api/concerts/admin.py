@@ -3,10 +3,35 @@ Admin configuration for concerts models.
 """
 
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
 from django.urls import reverse
+from django.utils import timezone
 
-from .models import Concert
+from .models import Concert, ConcertParticipant, ConcertSectionLimit, ConcertWaitlistEntry
+
+
+class ConcertParticipantInline(admin.TabularInline):
+    """Inline for concert registrations."""
+    model = ConcertParticipant
+    extra = 0
+    raw_id_fields = ['musicianprofile']
+    readonly_fields = ['section', 'eligible', 'eligibility_rate', 'eligibility_checked_at']
+
+
+class ConcertSectionLimitInline(admin.TabularInline):
+    """Inline for per-section participant limits."""
+    model = ConcertSectionLimit
+    extra = 0
+    readonly_fields = ['registered_count']
+
+
+class ConcertWaitlistEntryInline(admin.TabularInline):
+    """Inline for the concert waitlist (in promotion order)."""
+    model = ConcertWaitlistEntry
+    extra = 0
+    raw_id_fields = ['musicianprofile']
+    readonly_fields = ['created_at']
 
 
 @admin.register(Concert)
@@ -17,8 +42,10 @@ class ConcertAdmin(admin.ModelAdmin):
     list_filter = ['status', 'date', 'location', 'date_created']
     search_fields = ['name', 'description', 'location', 'setlist']
     ordering = ['-date']
-    readonly_fields = ['date_created', 'date_modified', 'participants_count']
-    filter_horizontal = ['participants']
+    readonly_fields = ['date_created', 'date_modified', 'participants_count', 'registered_count']
+    inlines = [ConcertSectionLimitInline, ConcertParticipantInline, ConcertWaitlistEntryInline]
+    list_select_related = ['created_by']
+    raw_id_fields = ['created_by']
     
     fieldsets = (
         ('Podstawowe informacje', {
@@ -29,7 +56,7 @@ class ConcertAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Uczestnicy', {
-            'fields': ('participants', 'participants_count'),
+            'fields': ('capacity', 'participants_count', 'registered_count'),
         }),
         ('Metadane', {
             'fields': ('created_by', 'date_created', 'date_modified'),
@@ -37,30 +64,43 @@ class ConcertAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """Annotate the participant count so changelist rows do not query it one by one."""
+        return super().get_queryset(request).annotate(participants_total=Count('participants'))
+    
+    def save_related(self, request, form, formsets, change):
+        """Resync the registration counters after inline edits and fill freed places from the waitlist."""
+        from .registration import promote_waitlist
+        
+        super().save_related(request, form, formsets, change)
+        form.instance.refresh_registration_counts()
+        promote_waitlist(form.instance.pk)
+    
     def participants_count(self, obj):
         """Display number of participants."""
-        count = obj.participants.count()
+        count = obj.participants_total
         if count > 0:
             return format_html('<strong>{}</strong> uczestników', count)
         return '0 uczestników'
     participants_count.short_description = 'Liczba uczestników'
+    participants_count.admin_order_field = 'participants_total'
     
     actions = ['mark_as_confirmed', 'mark_as_completed', 'mark_as_cancelled']
     
     def mark_as_confirmed(self, request, queryset):
         """Mark selected concerts as confirmed."""
-        updated = queryset.update(status='confirmed')
+        updated = queryset.update(status='confirmed', date_modified=timezone.now())
         self.message_user(request, f'{updated} koncert(ów) oznaczono jako potwierdzony.')
     mark_as_confirmed.short_description = "Oznacz jako potwierdzony"
     
     def mark_as_completed(self, request, queryset):
         """Mark selected concerts as completed."""
-        updated = queryset.update(status='completed')
+        updated = queryset.update(status='completed', date_modified=timezone.now())
         self.message_user(request, f'{updated} koncert(ów) oznaczono jako zakończony.')
     mark_as_completed.short_description = "Oznacz jako zakończony"
     
     def mark_as_cancelled(self, request, queryset):
         """Mark selected concerts as cancelled."""
-        updated = queryset.update(status='cancelled')
+        updated = queryset.update(status='cancelled', date_modified=timezone.now())
         self.message_user(request, f'{updated} koncert(ów) oznaczono jako odwołany.')
     mark_as_cancelled.short_description = "Oznacz jako odwołany"
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ConcertsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api.concerts'
+
+    def ready(self):
+        """Import signals when the app is ready."""
+        import api.concerts.signals
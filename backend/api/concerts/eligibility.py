@@ -0,0 +1,113 @@
+"""
+Concert eligibility based on rehearsal attendance.
+
+A musician is eligible to play a concert when their weighted attendance rate
+(half attendance counts 0.5) over the rehearsals held in a window before the
+concert reaches the threshold. The whole roster is evaluated with one
+aggregate query and registrations are flagged with one bulk update, so the
+check can be run live for any roster size.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+
+from api.users.models import MusicianProfile
+from .models import ConcertParticipant
+
+DEFAULT_THRESHOLD = 60  # percent
+DEFAULT_WINDOW_DAYS = 60
+MAX_WINDOW_DAYS = 3650  # ten years
+
+
+def get_concert_season(concert):
+    """Return the season the concert date falls into, or the current season."""
+    from api.seasons.models import Season
+
+    season = Season.objects.filter(start_date__lte=concert.date, end_date__gte=concert.date).first()
+    return season or Season.get_current_season()
+
+
+def compute_eligibility(concert, season, threshold=DEFAULT_THRESHOLD, window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Evaluate every musician of the season's roster and every registrant of the concert.
+
+    Rehearsals of the season dated within ``window_days`` before the concert
+    count, up to (excluding) today: future rehearsals are seeded as absent and
+    must not count before they are held. Musicians without any attendance
+    record in the window are not eligible. Returns a dict with the window
+    (``window_end`` exclusive), counts and one row per musician.
+    """
+    window_start = concert.date - timedelta(days=window_days)
+    window_end = min(concert.date, timezone.localdate())
+    rehearsals = Q(
+        user__attendances__event__season=season,
+        user__attendances__event__type='rehearsal',
+        user__attendances__event__date__gte=window_start,
+        user__attendances__event__date__lt=window_end,
+    )
+    registered = ConcertParticipant.objects.filter(concert=concert, musicianprofile=OuterRef('pk'))
+
+    musicians = (
+        MusicianProfile.objects.filter(
+            Q(id__in=season.musicians.filter(active=True).values('id'))
+            | Q(id__in=ConcertParticipant.objects.filter(concert=concert).values('musicianprofile_id'))
+        )
+        .annotate(
+            rehearsals=Count('user__attendances', filter=rehearsals),
+            attended=Sum('user__attendances__present', filter=rehearsals),
+            registered=Exists(registered),
+        )
+        .values(
+            'id', 'user_id', 'user__first_name', 'user__last_name', 'instrument',
+            'rehearsals', 'attended', 'registered'
+        )
+        .order_by('user__last_name', 'user__first_name')
+    )
+
+    rows = []
+    for musician in musicians:
+        attended = musician['attended'] or Decimal('0')
+        rate = (attended / musician['rehearsals'] * 100).quantize(Decimal('0.01')) if musician['rehearsals'] else None
+        rows.append({
+            'musician_profile_id': musician['id'],
+            'user_id': musician['user_id'],
+            'first_name': musician['user__first_name'],
+            'last_name': musician['user__last_name'],
+            'instrument': musician['instrument'],
+            'rehearsals': musician['rehearsals'],
+            'attended': float(attended),
+            'attendance_rate': float(rate) if rate is not None else None,
+            'eligible': rate is not None and rate >= threshold,
+            'registered': musician['registered'],
+        })
+
+    return {
+        'concert_id': concert.id,
+        'season_id': season.id,
+        'threshold': threshold,
+        'window_start': window_start,
+        'window_end': window_end,
+        'eligible_count': sum(1 for row in rows if row['eligible']),
+        'ineligible_registrants': sum(1 for row in rows if row['registered'] and not row['eligible']),
+        'musicians': rows,
+    }
+
+
+def flag_registrations(concert, result):
+    """Store the eligibility of every registrant with one bulk update; returns the number updated."""
+    by_profile = {row['musician_profile_id']: row for row in result['musicians'] if row['registered']}
+    registrations = list(ConcertParticipant.objects.filter(concert=concert, musicianprofile_id__in=by_profile))
+
+    now = timezone.now()
+    for registration in registrations:
+        row = by_profile[registration.musicianprofile_id]
+        registration.eligible = row['eligible']
+        registration.eligibility_rate = row['attendance_rate']
+        registration.eligibility_checked_at = now
+
+    ConcertParticipant.objects.bulk_update(
+        registrations, ['eligible', 'eligibility_rate', 'eligibility_checked_at'], batch_size=500
+    )
+    return len(registrations)
@@ -0,0 +1,56 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Turn the auto-created Concert.participants relation into the explicit
+    ConcertParticipant model. The existing table and its rows are kept: the
+    model is only added to the migration state, then new columns are added.
+    """
+
+    dependencies = [
+        ("concerts", "0004_alter_concert_options_and_more"),
+        ("users", "0002_alter_musicianprofile_options_accountactivationtoken"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="ConcertParticipant",
+                    fields=[
+                        ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                        ("concert", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="registrations", to="concerts.concert")),
+                        ("musicianprofile", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="concert_registrations", to="users.musicianprofile")),
+                    ],
+                    options={
+                        "verbose_name": "Uczestnik koncertu",
+                        "verbose_name_plural": "Uczestnicy koncertu",
+                        "db_table": "concerts_concert_participants",
+                        "unique_together": {("concert", "musicianprofile")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="concert",
+                    name="participants",
+                    field=models.ManyToManyField(blank=True, related_name="concerts", through="concerts.ConcertParticipant", to="users.musicianprofile"),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="concertparticipant",
+            name="eligible",
+            field=models.BooleanField(blank=True, help_text="Result of the last eligibility check (empty if never checked)", null=True),
+        ),
+        migrations.AddField(
+            model_name="concertparticipant",
+            name="eligibility_rate",
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name="concertparticipant",
+            name="eligibility_checked_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
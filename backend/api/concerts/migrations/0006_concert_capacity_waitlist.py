@@ -0,0 +1,69 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_registrations(apps, schema_editor):
+    """Initialise the registration counter of existing concerts."""
+    Concert = apps.get_model('concerts', 'Concert')
+    ConcertParticipant = apps.get_model('concerts', 'ConcertParticipant')
+    registrations = (
+        ConcertParticipant.objects.filter(concert_id=OuterRef('pk')).order_by()
+        .values('concert_id').annotate(count=Count('id')).values('count')[:1]
+    )
+    Concert.objects.update(registered_count=Coalesce(Subquery(registrations), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('concerts', '0005_concertparticipant'),
+        ('users', '0002_alter_musicianprofile_options_accountactivationtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='concert',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, help_text='Maximum number of participants (empty = unlimited)', null=True),
+        ),
+        migrations.AddField(
+            model_name='concert',
+            name='registered_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ConcertSectionLimit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('instrument', models.CharField(choices=[('flet', 'Flet'), ('klarnet', 'Klarnet'), ('obój', 'Obój'), ('saksofon', 'Saksofon'), ('waltornia', 'Waltornia'), ('eufonium', 'Eufonium'), ('trąbka', 'Trąbka'), ('puzon', 'Puzon'), ('tuba', 'Tuba'), ('fagot', 'Fagot'), ('gitara', 'Gitara'), ('perkusja', 'Perkusja')], max_length=20)),
+                ('capacity', models.PositiveIntegerField()),
+                ('registered_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('concert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='section_limits', to='concerts.concert')),
+            ],
+            options={
+                'verbose_name': 'Limit sekcji',
+                'verbose_name_plural': 'Limity sekcji',
+                'unique_together': {('concert', 'instrument')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ConcertWaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('concert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='concerts.concert')),
+                ('musicianprofile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='concert_waitlist', to='users.musicianprofile')),
+            ],
+            options={
+                'verbose_name': 'Lista rezerwowa',
+                'verbose_name_plural': 'Listy rezerwowe',
+                'ordering': ['created_at', 'id'],
+                'unique_together': {('concert', 'musicianprofile')},
+            },
+        ),
+        migrations.RunPython(count_registrations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:46
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_sections(apps, schema_editor):
+    """Existing registrations count towards the musician's current instrument."""
+    ConcertParticipant = apps.get_model('concerts', 'ConcertParticipant')
+    MusicianProfile = apps.get_model('users', 'MusicianProfile')
+    ConcertParticipant.objects.update(section=Subquery(
+        MusicianProfile.objects.filter(pk=OuterRef('musicianprofile_id')).values('instrument')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('concerts', '0006_concert_capacity_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='concertparticipant',
+            name='section',
+            field=models.CharField(blank=True, choices=[('flet', 'Flet'), ('klarnet', 'Klarnet'), ('obój', 'Obój'), ('saksofon', 'Saksofon'), ('waltornia', 'Waltornia'), ('eufonium', 'Eufonium'), ('trąbka', 'Trąbka'), ('puzon', 'Puzon'), ('tuba', 'Tuba'), ('fagot', 'Fagot'), ('gitara', 'Gitara'), ('perkusja', 'Perkusja')], max_length=20),
+        ),
+        migrations.RunPython(fill_sections, migrations.RunPython.noop),
+    ]
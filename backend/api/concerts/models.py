@@ -3,8 +3,9 @@ Concert models for the new API structure.
 """
 
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
-from api.users.models import MusicianProfile
+from api.users.models import MusicianProfile, INSTRUMENT_CHOICES
 
 
 class Concert(models.Model):
@@ -19,7 +20,7 @@ class Concert(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='concerts_created')
-    participants = models.ManyToManyField(MusicianProfile, related_name='concerts', blank=True)
+    participants = models.ManyToManyField(MusicianProfile, related_name='concerts', blank=True, through='ConcertParticipant')
     
     # Concert status
     STATUS_CHOICES = [
@@ -30,6 +31,11 @@ class Concert(models.Model):
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='planned')
 
+    # Registration limit (empty = unlimited); further registrations go to the waitlist
+    capacity = models.PositiveIntegerField(null=True, blank=True, help_text="Maximum number of participants (empty = unlimited)")
+    # Denormalized number of registrations, kept by api.concerts.registration
+    registered_count = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         db_table = 'concerts_concert'
         verbose_name = 'Koncert'
@@ -44,9 +50,33 @@ class Concert(models.Model):
     def __str__(self):
         return f"{self.name} - {self.date}"
 
+    @classmethod
+    def with_registration(cls, queryset=None, user=None):
+        """
+        Annotate ``participants_total``, ``user_registered`` and ``user_waitlisted``
+        (whether ``user`` is registered / on the waitlist) used by the serializers.
+        """
+        queryset = cls.objects.all() if queryset is None else queryset
+        if not queryset.query.order_by:
+            # Meta.ordering is not applied to aggregated querysets
+            queryset = queryset.order_by(*cls._meta.ordering)
+        profile_id = getattr(getattr(user, 'musicianprofile', None), 'id', None)
+        def user_exists(model):
+            return models.Exists(model.objects.filter(
+                concert_id=models.OuterRef('pk'), musicianprofile_id=profile_id
+            )) if profile_id else models.Value(False)
+
+        return queryset.annotate(
+            participants_total=models.Count('registrations'),
+            user_registered=user_exists(ConcertParticipant),
+            user_waitlisted=user_exists(ConcertWaitlistEntry),
+        )
+
     @property
     def participants_count(self):
         """Return the number of participants."""
+        if hasattr(self, 'participants_total'):
+            return self.participants_total
         return self.participants.count()
 
     def is_user_registered(self, user):
@@ -57,6 +87,39 @@ class Concert(models.Model):
             return False
         return self.participants.filter(user=user).exists()
 
+    def is_user_waitlisted(self, user):
+        """Check if a user is on the waitlist of this concert."""
+        if not user or not user.is_authenticated:
+            return False
+        if not hasattr(user, 'musicianprofile'):
+            return False
+        return self.waitlist.filter(musicianprofile__user=user).exists()
+
+    def refresh_registration_counts(self):
+        """
+        Recompute the registration counters of the concert and its section limits
+        from the registrations (after registrations were edited directly, e.g. in the admin).
+        """
+        from django.db import transaction
+
+        registrations = ConcertParticipant.objects.filter(concert_id=self.pk).order_by()
+
+        def count(queryset):
+            return Coalesce(models.Subquery(
+                queryset.values('concert_id').annotate(count=models.Count('id')).values('count')[:1]
+            ), 0)
+
+        with transaction.atomic():
+            # Lock the counter rows in the order places are claimed (sections, then
+            # the concert) so no claim can commit between the count and the update
+            list(ConcertSectionLimit.objects.select_for_update().filter(concert_id=self.pk).order_by('pk').values_list('pk'))
+            list(Concert.objects.select_for_update().filter(pk=self.pk).values_list('pk'))
+            Concert.objects.filter(pk=self.pk).update(registered_count=count(registrations))
+            self.section_limits.update(registered_count=count(
+                registrations.filter(section=models.OuterRef('instrument'))
+            ))
+            self.registered_count = registrations.count()
+
     def can_user_edit(self, user):
         """Check if user can edit this concert."""
         if not user or not user.is_authenticated:
@@ -80,4 +143,71 @@ class Concert(models.Model):
         return user.has_perm('concerts.add_concert')
 
 
+class ConcertParticipant(models.Model):
+    """
+    Registration of a musician for a concert.
+
+    Explicit through model of ``Concert.participants`` (it keeps the table of
+    the former auto-created relation) carrying the result of the last
+    eligibility check.
+    """
+    concert = models.ForeignKey(Concert, on_delete=models.CASCADE, related_name='registrations')
+    musicianprofile = models.ForeignKey(MusicianProfile, on_delete=models.CASCADE, related_name='concert_registrations')
+    # The musician's instrument when the place was claimed - places are given back
+    # to this section even if the instrument changes later
+    section = models.CharField(max_length=20, choices=INSTRUMENT_CHOICES, blank=True)
+    eligible = models.BooleanField(null=True, blank=True, help_text="Result of the last eligibility check (empty if never checked)")
+    eligibility_rate = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    eligibility_checked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'concerts_concert_participants'
+        verbose_name = 'Uczestnik koncertu'
+        verbose_name_plural = 'Uczestnicy koncertu'
+        unique_together = ('concert', 'musicianprofile')
 
+    def __str__(self):
+        return f"{self.musicianprofile} - {self.concert}"
+
+    def save(self, *args, **kwargs):
+        """Registrations added directly (e.g. in the admin) count towards the musician's instrument."""
+        if not self.section:
+            self.section = self.musicianprofile.instrument
+        super().save(*args, **kwargs)
+
+
+class ConcertSectionLimit(models.Model):
+    """Maximum number of participants of one section (instrument) in a concert."""
+    concert = models.ForeignKey(Concert, on_delete=models.CASCADE, related_name='section_limits')
+    instrument = models.CharField(max_length=20, choices=INSTRUMENT_CHOICES)
+    capacity = models.PositiveIntegerField()
+    # Denormalized number of registrations of the section, kept by api.concerts.registration
+    registered_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        verbose_name = 'Limit sekcji'
+        verbose_name_plural = 'Limity sekcji'
+        unique_together = ('concert', 'instrument')
+
+    def __str__(self):
+        return f"{self.concert} - {self.get_instrument_display()}: {self.capacity}"
+
+
+class ConcertWaitlistEntry(models.Model):
+    """
+    A musician waiting for a free place in a full concert (or section).
+
+    Entries are promoted to registrations in the order they were created.
+    """
+    concert = models.ForeignKey(Concert, on_delete=models.CASCADE, related_name='waitlist')
+    musicianprofile = models.ForeignKey(MusicianProfile, on_delete=models.CASCADE, related_name='concert_waitlist')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Lista rezerwowa'
+        verbose_name_plural = 'Listy rezerwowe'
+        unique_together = ('concert', 'musicianprofile')
+        ordering = ['created_at', 'id']
+
+    def __str__(self):
+        return f"{self.musicianprofile} - {self.concert} (rezerwa)"
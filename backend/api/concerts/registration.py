@@ -0,0 +1,150 @@
+"""
+Concert registration with capacity limits and a waitlist.
+
+A place is claimed with conditional counter updates - ``registered_count =
+registered_count + 1 WHERE registered_count < capacity`` - on the musician's
+section limit (if the concert has one for their instrument) and on the
+concert; the registration itself is an insert guarded by the unique
+constraint. There are no check-then-act reads under a lock held across Python
+code, so the whole orchestra can sign up at once without overbooking and
+without serialising on the concert row for longer than one statement.
+
+Musicians who do not get a place go to the waitlist; freed places are given
+to waitlisted musicians in the order they signed up. A registration remembers
+the section its place was claimed in and gives the place back to that section,
+even if the musician's instrument changed since. Counter rows are always
+updated section first, concert second, so concurrent transactions cannot
+deadlock on them.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from .models import Concert, ConcertParticipant, ConcertSectionLimit, ConcertWaitlistEntry
+
+REGISTERED = 'registered'
+WAITLISTED = 'waitlisted'
+ALREADY_REGISTERED = 'already_registered'
+ALREADY_WAITLISTED = 'already_waitlisted'
+UNREGISTERED = 'unregistered'
+LEFT_WAITLIST = 'left_waitlist'
+NOT_REGISTERED = 'not_registered'
+
+_CLAIMED = 'claimed'
+_SECTION_FULL = 'section_full'
+_CONCERT_FULL = 'concert_full'
+
+
+def _claim_place(concert_id, instrument):
+    """Take one place in the concert and in the section limit of the instrument, if any."""
+    section = ConcertSectionLimit.objects.filter(concert_id=concert_id, instrument=instrument)
+    if not section.filter(registered_count__lt=F('capacity')).update(registered_count=F('registered_count') + 1):
+        if section.exists():
+            return _SECTION_FULL
+        section = None
+
+    claimed = Concert.objects.filter(
+        Q(capacity__isnull=True) | Q(registered_count__lt=F('capacity')), pk=concert_id
+    ).update(registered_count=F('registered_count') + 1)
+    if not claimed:
+        if section is not None:
+            section.update(registered_count=F('registered_count') - 1)
+        return _CONCERT_FULL
+    return _CLAIMED
+
+
+def _release_place(concert_id, section):
+    """Give back the place of a removed registration claimed in ``section``."""
+    ConcertSectionLimit.objects.filter(
+        concert_id=concert_id, instrument=section, registered_count__gt=0
+    ).update(registered_count=F('registered_count') - 1)
+    Concert.objects.filter(pk=concert_id, registered_count__gt=0).update(registered_count=F('registered_count') - 1)
+
+
+def register(concert, musician_profile):
+    """
+    Register a musician for the concert, or put them on the waitlist when the
+    concert (or their section) is full. Returns one of ``REGISTERED``,
+    ``WAITLISTED``, ``ALREADY_REGISTERED`` and ``ALREADY_WAITLISTED``.
+    """
+    registration = {'concert_id': concert.pk, 'musicianprofile_id': musician_profile.pk}
+    try:
+        with transaction.atomic():
+            if _claim_place(concert.pk, musician_profile.instrument) == _CLAIMED:
+                ConcertParticipant.objects.create(section=musician_profile.instrument, **registration)
+                ConcertWaitlistEntry.objects.filter(**registration).delete()
+                return REGISTERED
+    except IntegrityError:
+        # The unique constraint rejected a second registration; the claimed place is rolled back
+        return ALREADY_REGISTERED
+
+    # The place counters are locked by concurrent registrations until they commit,
+    # so a registration of the same musician is visible by now
+    if ConcertParticipant.objects.filter(**registration).exists():
+        return ALREADY_REGISTERED
+    try:
+        with transaction.atomic():
+            ConcertWaitlistEntry.objects.create(**registration)
+    except IntegrityError:
+        return ALREADY_WAITLISTED
+    return WAITLISTED
+
+
+def unregister(concert, musician_profile):
+    """
+    Remove a musician's registration (promoting the waitlist into the freed
+    place) or their waitlist entry. Returns one of ``UNREGISTERED``,
+    ``LEFT_WAITLIST`` and ``NOT_REGISTERED``.
+    """
+    registration = {'concert_id': concert.pk, 'musicianprofile_id': musician_profile.pk}
+    deleted = 0
+    claimed = ConcertParticipant.objects.filter(**registration).values_list('pk', 'section').first()
+    if claimed:
+        with transaction.atomic():
+            # Only the request that actually deletes the row gives the place back
+            deleted, _ = ConcertParticipant.objects.filter(pk=claimed[0]).delete()
+            if deleted:
+                _release_place(concert.pk, claimed[1])
+    if deleted:
+        # Promotion claims places in its own transactions to keep the lock order
+        promote_waitlist(concert.pk)
+        return UNREGISTERED
+
+    deleted, _ = ConcertWaitlistEntry.objects.filter(**registration).delete()
+    return LEFT_WAITLIST if deleted else NOT_REGISTERED
+
+
+def promote_waitlist(concert_id):
+    """
+    Register waitlisted musicians into free places, oldest entries first.
+
+    Entries whose section is full are skipped; promotion stops when the
+    concert is full. Returns the ids of the promoted musician profiles.
+    """
+    entries = ConcertWaitlistEntry.objects.filter(concert_id=concert_id).values_list(
+        'id', 'musicianprofile_id', 'musicianprofile__instrument'
+    )
+    promoted, full_sections = [], set()
+    for entry_id, profile_id, instrument in entries:
+        if instrument in full_sections:
+            continue
+        with transaction.atomic():
+            claim = _claim_place(concert_id, instrument)
+            if claim == _CONCERT_FULL:
+                break
+            if claim == _SECTION_FULL:
+                full_sections.add(instrument)
+                continue
+            # Another promotion may have taken the entry - give the place back then
+            taken, _ = ConcertWaitlistEntry.objects.filter(pk=entry_id).delete()
+            if not taken:
+                transaction.set_rollback(True)
+                continue
+            _, created = ConcertParticipant.objects.get_or_create(
+                concert_id=concert_id, musicianprofile_id=profile_id, defaults={'section': instrument}
+            )
+            if not created:
+                # Registered in the meantime - the entry was stale
+                _release_place(concert_id, instrument)
+                continue
+            promoted.append(profile_id)
+    return promoted
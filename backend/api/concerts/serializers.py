@@ -2,8 +2,9 @@
 Concert-related serializers for the API.
 """
 from rest_framework import serializers
+from django.db import transaction
 from django.contrib.auth.models import User
-from .models import Concert
+from .models import Concert, ConcertSectionLimit
 from api.users.models import MusicianProfile
 from api.users.serializers import UserSerializer, MusicianProfileSerializer
 
@@ -27,19 +28,29 @@ class ConcertParticipantSerializer(serializers.ModelSerializer):
         return None
 
 
+class ConcertSectionLimitSerializer(serializers.ModelSerializer):
+    """Serializer for per-section participant limits of a concert."""
+    
+    class Meta:
+        model = ConcertSectionLimit
+        fields = ['instrument', 'capacity', 'registered_count']
+        read_only_fields = ['registered_count']
+
+
 class ConcertListSerializer(serializers.ModelSerializer):
     """Serializer for concert list view."""
     created_by = UserSerializer(read_only=True)
     participants_count = serializers.ReadOnlyField()
     is_registered = serializers.SerializerMethodField()
+    is_waitlisted = serializers.SerializerMethodField()
     
     class Meta:
         model = Concert
         fields = [
-            'id', 'name', 'date', 'location', 'status',
-            'participants_count', 'is_registered', 'created_by', 'date_created'
+            'id', 'name', 'date', 'location', 'status', 'capacity',
+            'participants_count', 'is_registered', 'is_waitlisted', 'created_by', 'date_created'
         ]
-        read_only_fields = ['id', 'created_by', 'date_created', 'participants_count', 'is_registered']
+        read_only_fields = ['id', 'created_by', 'date_created', 'participants_count', 'is_registered', 'is_waitlisted']
     
     def get_is_registered(self, obj):
         """Check if current user is registered for this concert."""
@@ -47,11 +58,22 @@ class ConcertListSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return False
         
-        # Use prefetched data if available to avoid N+1 queries
-        if hasattr(obj, '_prefetched_user_registration'):
-            return obj._prefetched_user_registration
+        # Use the annotation of Concert.with_registration if available to avoid N+1 queries
+        if hasattr(obj, 'user_registered'):
+            return obj.user_registered
         
         return obj.is_user_registered(request.user)
+    
+    def get_is_waitlisted(self, obj):
+        """Check if current user is on the waitlist of this concert."""
+        request = self.context.get('request')
+        if not request or not request.user.is_authenticated:
+            return False
+        
+        if hasattr(obj, 'user_waitlisted'):
+            return obj.user_waitlisted
+        
+        return obj.is_user_waitlisted(request.user)
 
 
 class ConcertDetailSerializer(serializers.ModelSerializer):
@@ -59,7 +81,10 @@ class ConcertDetailSerializer(serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
     participants = ConcertParticipantSerializer(many=True, read_only=True)
     participants_count = serializers.ReadOnlyField()
+    section_limits = ConcertSectionLimitSerializer(many=True, read_only=True)
+    waitlist_count = serializers.SerializerMethodField()
     is_registered = serializers.SerializerMethodField()
+    is_waitlisted = serializers.SerializerMethodField()
     can_edit = serializers.SerializerMethodField()
     can_delete = serializers.SerializerMethodField()
     
@@ -67,10 +92,18 @@ class ConcertDetailSerializer(serializers.ModelSerializer):
         model = Concert
         fields = [
             'id', 'name', 'date', 'location', 'description', 'setlist',
-            'status', 'participants', 'participants_count', 'is_registered', 
+            'status', 'capacity', 'section_limits', 'participants', 'participants_count',
+            'waitlist_count', 'is_registered', 'is_waitlisted',
             'can_edit', 'can_delete', 'created_by', 'date_created', 'date_modified'
         ]
-        read_only_fields = ['id', 'created_by', 'date_created', 'date_modified', 'participants_count', 'is_registered', 'can_edit', 'can_delete']
+        read_only_fields = [
+            'id', 'created_by', 'date_created', 'date_modified', 'participants_count', 'waitlist_count',
+            'is_registered', 'is_waitlisted', 'can_edit', 'can_delete'
+        ]
+    
+    def get_waitlist_count(self, obj):
+        """Return the number of musicians on the waitlist."""
+        return obj.waitlist.count()
     
     def get_is_registered(self, obj):
         """Check if current user is registered for this concert."""
@@ -78,12 +111,23 @@ class ConcertDetailSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             return False
         
-        # Use prefetched data if available to avoid N+1 queries
-        if hasattr(obj, '_prefetched_user_registration'):
-            return obj._prefetched_user_registration
+        # Use the annotation of Concert.with_registration if available to avoid N+1 queries
+        if hasattr(obj, 'user_registered'):
+            return obj.user_registered
         
         return obj.is_user_registered(request.user)
     
+    def get_is_waitlisted(self, obj):
+        """Check if current user is on the waitlist of this concert."""
+        request = self.context.get('request')
+        if not request or not request.user.is_authenticated:
+            return False
+        
+        if hasattr(obj, 'user_waitlisted'):
+            return obj.user_waitlisted
+        
+        return obj.is_user_waitlisted(request.user)
+    
     def get_can_edit(self, obj):
         """Check if current user can edit this concert."""
         request = self.context.get('request')
@@ -104,17 +148,58 @@ class ConcertDetailSerializer(serializers.ModelSerializer):
 class ConcertCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating and updating concerts."""
     
+    section_limits = ConcertSectionLimitSerializer(many=True, required=False)
+    
     class Meta:
         model = Concert
         fields = [
             'name', 'date', 'location', 'description', 'setlist',
-            'status'
+            'status', 'capacity', 'section_limits'
         ]
     
     def validate_date(self, value):
         """Validate concert date."""
         
         return value
+    
+    def validate_section_limits(self, value):
+        """Allow one limit per section."""
+        instruments = [limit['instrument'] for limit in value]
+        if len(instruments) != len(set(instruments)):
+            raise serializers.ValidationError("Każda sekcja może mieć tylko jeden limit.")
+        return value
+    
+    @transaction.atomic
+    def create(self, validated_data):
+        """Create the concert with its section limits."""
+        section_limits = validated_data.pop('section_limits', [])
+        concert = super().create(validated_data)
+        ConcertSectionLimit.objects.bulk_create(
+            ConcertSectionLimit(concert=concert, **limit) for limit in section_limits
+        )
+        return concert
+    
+    def update(self, instance, validated_data):
+        """
+        Update the concert; ``section_limits``, when given, replace the existing
+        limits. Places freed by raised limits are given to the waitlist.
+        """
+        from .registration import promote_waitlist
+        
+        section_limits = validated_data.pop('section_limits', None)
+        limits_changed = section_limits is not None or 'capacity' in validated_data
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if section_limits is not None:
+                instance.section_limits.all().delete()
+                ConcertSectionLimit.objects.bulk_create(
+                    ConcertSectionLimit(concert=instance, **limit) for limit in section_limits
+                )
+            if limits_changed:
+                instance.refresh_registration_counts()
+        if limits_changed:
+            promote_waitlist(instance.pk)
+        return instance
 
 
 class ConcertRegistrationSerializer(serializers.Serializer):
@@ -124,21 +209,13 @@ class ConcertRegistrationSerializer(serializers.Serializer):
     def validate(self, attrs):
         """Validate registration action."""
         concert = self.context['concert']
-        user = self.context['user']
         action = attrs['action']
         
         if action == 'register':
             # Check if concert status allows registration
             if concert.status not in ['planned', 'confirmed']:
                 raise serializers.ValidationError("Rejestracja na ten koncert jest zamknięta.")
-            
-            # Check if user is already registered
-            if concert.participants.filter(user=user).exists():
-                raise serializers.ValidationError("Jesteś już zapisany na ten koncert.")
-        
-        elif action == 'unregister':
-            # Check if user is registered
-            if not concert.participants.filter(user=user).exists():
-                raise serializers.ValidationError("Nie jesteś zapisany na ten koncert.")
         
+        # Duplicate registrations and missing ones are reported by
+        # api.concerts.registration, which checks them without extra queries
         return attrs
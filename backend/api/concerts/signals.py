@@ -0,0 +1,35 @@
+"""
+Django signals keeping concert registration counters in sync with cascade
+deletes of musician profiles (and their users).
+"""
+from django.db import transaction
+from django.db.models.signals import pre_delete, post_delete
+from django.dispatch import receiver
+
+from api.users.models import MusicianProfile
+from .models import Concert, ConcertParticipant
+
+
+@receiver(pre_delete, sender=MusicianProfile)
+def remember_registered_concerts(sender, instance, **kwargs):
+    """Remember the concerts the musician holds places in before the registrations are cascaded."""
+    instance._registered_concert_ids = list(
+        ConcertParticipant.objects.filter(musicianprofile_id=instance.pk).values_list('concert_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=MusicianProfile)
+def musician_profile_deleted(sender, instance, **kwargs):
+    """Recount the places of those concerts and hand the freed ones to their waitlists."""
+    concert_ids = getattr(instance, '_registered_concert_ids', None)
+    if concert_ids:
+        transaction.on_commit(lambda: release_places(concert_ids))
+
+
+def release_places(concert_ids):
+    """Recount the registration counters of the concerts and promote their waitlists."""
+    from .registration import promote_waitlist
+
+    for concert in Concert.objects.filter(pk__in=concert_ids):
+        concert.refresh_registration_counts()
+        promote_waitlist(concert.pk)
@@ -0,0 +1,132 @@
+"""
+Tests of concert registration with capacity limits and the waitlist.
+"""
+import datetime
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.users.models import MusicianProfile
+from . import registration
+from .models import Concert, ConcertSectionLimit
+
+
+class ConcertRegistrationTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@oragh.com', 'haslo')
+        cls.flutes = [cls.create_musician(f'flet{i}', 'flet') for i in range(3)]
+        cls.clarinets = [cls.create_musician(f'klarnet{i}', 'klarnet') for i in range(3)]
+
+    @staticmethod
+    def create_musician(username, instrument):
+        user = User.objects.create(username=username, email=f'{username}@oragh.com')
+        return MusicianProfile.objects.create(user=user, instrument=instrument)
+
+    def create_concert(self, capacity=None, section_limits=None):
+        concert = Concert.objects.create(
+            name='Koncert', date=datetime.date(2026, 12, 1), created_by=self.admin, capacity=capacity
+        )
+        for instrument, limit in (section_limits or {}).items():
+            ConcertSectionLimit.objects.create(concert=concert, instrument=instrument, capacity=limit)
+        return concert
+
+    def post_registration(self, concert, musician, action='register'):
+        self.client.force_authenticate(musician.user)
+        return self.client.post(
+            reverse('concerts:concert-registration', args=[concert.pk]), {'action': action}, format='json'
+        )
+
+    def assertRegistrations(self, concert, registered, waitlisted):
+        self.assertCountEqual(
+            concert.registrations.values_list('musicianprofile_id', flat=True), [m.pk for m in registered]
+        )
+        self.assertEqual(
+            list(concert.waitlist.values_list('musicianprofile_id', flat=True)),
+            [m.pk for m in waitlisted],
+        )
+        concert.refresh_from_db()
+        self.assertEqual(concert.registered_count, len(registered))
+
+    def test_registrations_over_capacity_go_to_waitlist(self):
+        concert = self.create_concert(capacity=2)
+        musicians = self.flutes[:2] + self.clarinets[:2]
+
+        statuses = [self.post_registration(concert, musician).data['status'] for musician in musicians]
+
+        self.assertEqual(statuses, [registration.REGISTERED] * 2 + [registration.WAITLISTED] * 2)
+        self.assertRegistrations(concert, musicians[:2], musicians[2:])
+
+    def test_registrations_over_section_limit_go_to_waitlist(self):
+        concert = self.create_concert(capacity=10, section_limits={'flet': 1})
+
+        for musician in self.flutes[:2] + self.clarinets[:1]:
+            self.post_registration(concert, musician)
+
+        self.assertRegistrations(concert, [self.flutes[0], self.clarinets[0]], [self.flutes[1]])
+        self.assertEqual(concert.section_limits.get(instrument='flet').registered_count, 1)
+
+    def test_full_section_does_not_use_up_concert_capacity(self):
+        concert = self.create_concert(capacity=2, section_limits={'flet': 1})
+
+        for musician in self.flutes[:2] + self.clarinets[:1]:
+            self.post_registration(concert, musician)
+
+        self.assertRegistrations(concert, [self.flutes[0], self.clarinets[0]], [self.flutes[1]])
+
+    def test_repeated_registration_is_rejected(self):
+        concert = self.create_concert(capacity=1)
+        self.post_registration(concert, self.flutes[0])
+        self.post_registration(concert, self.flutes[1])
+
+        self.assertEqual(self.post_registration(concert, self.flutes[0]).status_code, 400)
+        self.assertEqual(self.post_registration(concert, self.flutes[1]).status_code, 400)
+        self.assertRegistrations(concert, [self.flutes[0]], [self.flutes[1]])
+
+    def test_unregister_promotes_oldest_waitlist_entry(self):
+        concert = self.create_concert(capacity=1)
+        for musician in self.flutes:
+            self.post_registration(concert, musician)
+
+        response = self.post_registration(concert, self.flutes[0], action='unregister')
+
+        self.assertEqual(response.data['status'], registration.UNREGISTERED)
+        self.assertEqual(response.data['participants_count'], 1)
+        self.assertRegistrations(concert, [self.flutes[1]], [self.flutes[2]])
+
+    def test_promotion_skips_waitlist_entries_of_full_sections(self):
+        concert = self.create_concert(capacity=3, section_limits={'flet': 1})
+        for musician in self.flutes[:2] + self.clarinets:
+            self.post_registration(concert, musician)
+        self.assertRegistrations(concert, [self.flutes[0]] + self.clarinets[:2], [self.flutes[1], self.clarinets[2]])
+
+        self.post_registration(concert, self.clarinets[0], action='unregister')
+
+        # The flute section is still full, so the place goes to the next entry
+        self.assertRegistrations(concert, [self.flutes[0], self.clarinets[1], self.clarinets[2]], [self.flutes[1]])
+        self.assertEqual(concert.section_limits.get(instrument='flet').registered_count, 1)
+
+    def test_leaving_the_waitlist_does_not_free_a_place(self):
+        concert = self.create_concert(capacity=1)
+        for musician in self.flutes:
+            self.post_registration(concert, musician)
+
+        response = self.post_registration(concert, self.flutes[1], action='unregister')
+
+        self.assertEqual(response.data['status'], registration.LEFT_WAITLIST)
+        self.assertRegistrations(concert, [self.flutes[0]], [self.flutes[2]])
+
+    def test_raising_capacity_promotes_waitlist(self):
+        concert = self.create_concert(capacity=1)
+        for musician in self.flutes:
+            self.post_registration(concert, musician)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(
+            reverse('concerts:concert-detail', args=[concert.pk]), {'capacity': 2}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegistrations(concert, self.flutes[:2], [self.flutes[2]])
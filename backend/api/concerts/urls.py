@@ -14,6 +14,7 @@ urlpatterns = [
     # Concert registration
     path('<int:pk>/register/', views.concert_registration, name='concert-registration'),
     path('<int:pk>/participants/', views.concert_participants, name='concert-participants'),
+    path('<int:pk>/eligibility/', views.concert_eligibility, name='concert-eligibility'),
     
     # User permissions
     path('permissions/', views.user_permissions, name='user-permissions'),
@@ -7,7 +7,7 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import Group
-from django.db import transaction
+from . import registration
 from .models import Concert
 from .serializers import (
     ConcertListSerializer,
@@ -17,6 +17,20 @@ from .serializers import (
 )
 
 
+REGISTRATION_MESSAGES = {
+    registration.REGISTERED: 'Pomyślnie zapisałeś się na koncert.',
+    registration.WAITLISTED: 'Brak wolnych miejsc - zostałeś dopisany do listy rezerwowej.',
+    registration.UNREGISTERED: 'Pomyślnie wypisałeś się z koncertu.',
+    registration.LEFT_WAITLIST: 'Zostałeś usunięty z listy rezerwowej.',
+}
+
+REGISTRATION_ERRORS = {
+    registration.ALREADY_REGISTERED: 'Jesteś już zapisany na ten koncert.',
+    registration.ALREADY_WAITLISTED: 'Jesteś już na liście rezerwowej tego koncertu.',
+    registration.NOT_REGISTERED: 'Nie jesteś zapisany na ten koncert.',
+}
+
+
 class ConcertPagination(PageNumberPagination):
     """Custom pagination for concerts."""
     page_size = 10
@@ -31,17 +45,11 @@ class ConcertListCreateView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         """Get concerts queryset with filters and optimizations."""
-        queryset = Concert.objects.select_related('created_by').prefetch_related('participants__user').order_by('date', 'date_created')
-        
-        # Prefetch user registration status to avoid N+1 queries
-        if self.request.user.is_authenticated and hasattr(self.request.user, 'musicianprofile'):
-            user_registrations = Concert.objects.filter(
-                participants=self.request.user.musicianprofile
-            ).values_list('id', flat=True)
-            
-            # Annotate each concert with user registration status
-            for concert in queryset:
-                concert._prefetched_user_registration = concert.id in user_registrations
+        # Participant count and the user's registration are annotated in SQL
+        queryset = Concert.with_registration(
+            Concert.objects.select_related('created_by__musicianprofile').order_by('date', 'date_created'),
+            self.request.user
+        )
         
         # Filter by status
         status_filter = self.request.query_params.get('status')
@@ -103,8 +111,11 @@ class ConcertDetailUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
     
     def get_queryset(self):
         """Get concert with optimized queries."""
-        return Concert.objects.select_related('created_by').prefetch_related(
-            'participants__user'
+        return Concert.with_registration(
+            Concert.objects.select_related('created_by__musicianprofile').prefetch_related(
+                'participants__user', 'section_limits'
+            ),
+            self.request.user
         )
     
     def get_serializer_class(self):
@@ -140,7 +151,12 @@ class ConcertDetailUpdateDeleteView(generics.RetrieveUpdateDestroyAPIView):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def concert_registration(request, pk):
-    """Handle concert registration/unregistration."""
+    """
+    Handle concert registration/unregistration.
+    
+    Registering for a full concert (or section) puts the musician on the
+    waitlist; unregistering gives the freed place to the waitlist.
+    """
     concert = get_object_or_404(Concert, pk=pk)
     
     # Check if user has musician profile
@@ -150,49 +166,31 @@ def concert_registration(request, pk):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Use atomic transaction to prevent race conditions
-    with transaction.atomic():
-        # Get fresh concert instance to avoid stale data
-        concert = Concert.objects.select_for_update().get(pk=pk)
-        
-        serializer = ConcertRegistrationSerializer(
-            data=request.data,
-            context={'concert': concert, 'user': request.user}
-        )
-        
-        if serializer.is_valid():
-            action = serializer.validated_data['action']
-            musician_profile = request.user.musicianprofile
-            
-            if action == 'register':
-                # Double-check if user is not already registered (prevent race condition)
-                if concert.participants.filter(user=request.user).exists():
-                    return Response(
-                        {'error': 'Jesteś już zapisany na ten koncert.'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                concert.participants.add(musician_profile)
-                message = 'Pomyślnie zapisałeś się na koncert.'
-            else:  # unregister
-                # Double-check if user is registered (prevent race condition)
-                if not concert.participants.filter(user=request.user).exists():
-                    return Response(
-                        {'error': 'Nie jesteś zapisany na ten koncert.'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                concert.participants.remove(musician_profile)
-                message = 'Pomyślnie wypisałeś się z koncertu.'
-            
-            # Refresh concert to get updated counts
-            concert.refresh_from_db()
-            
-            return Response({
-                'message': message,
-                'participants_count': concert.participants_count,
-                'is_registered': concert.is_user_registered(request.user)
-            })
-        
+    serializer = ConcertRegistrationSerializer(
+        data=request.data,
+        context={'concert': concert, 'user': request.user}
+    )
+    if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Places are claimed with conditional counter updates and the unique
+    # constraints reject duplicates, so no lock on the concert is needed
+    musician_profile = request.user.musicianprofile
+    if serializer.validated_data['action'] == 'register':
+        outcome = registration.register(concert, musician_profile)
+    else:
+        outcome = registration.unregister(concert, musician_profile)
+    
+    if outcome in REGISTRATION_ERRORS:
+        return Response({'error': REGISTRATION_ERRORS[outcome]}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'message': REGISTRATION_MESSAGES[outcome],
+        'status': outcome,
+        'participants_count': Concert.objects.values_list('registered_count', flat=True).get(pk=concert.pk),
+        'is_registered': outcome == registration.REGISTERED,
+        'is_waitlisted': outcome == registration.WAITLISTED,
+    })
 
 
 @api_view(['GET'])
@@ -212,6 +210,48 @@ def concert_participants(request, pk):
     })
 
 
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def concert_eligibility(request, pk):
+    """
+    Compute rehearsal-attendance eligibility of the roster for a concert.
+    
+    Parameters (query string for GET, body for POST): `season` (defaults to the
+    season of the concert date), `threshold` in percent and `window_days`.
+    POST additionally stores the result on the concert's registrations.
+    """
+    from api.seasons.models import Season
+    from .eligibility import (
+        compute_eligibility, flag_registrations, get_concert_season,
+        DEFAULT_THRESHOLD, DEFAULT_WINDOW_DAYS, MAX_WINDOW_DAYS
+    )
+    
+    concert = get_object_or_404(Concert, pk=pk)
+    if not concert.can_user_edit(request.user):
+        return Response(
+            {'error': 'Nie masz uprawnień do sprawdzania uprawnień do koncertu.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    params = request.query_params if request.method == 'GET' else request.data
+    try:
+        threshold = float(params.get('threshold', DEFAULT_THRESHOLD))
+        window_days = int(params.get('window_days', DEFAULT_WINDOW_DAYS))
+        season_id = params.get('season')
+        season = get_object_or_404(Season, pk=int(season_id)) if season_id else get_concert_season(concert)
+    except (TypeError, ValueError):
+        return Response({'error': 'Nieprawidłowe parametry.'}, status=status.HTTP_400_BAD_REQUEST)
+    if season is None:
+        return Response({'error': 'Brak sezonu dla tego koncertu.'}, status=status.HTTP_404_NOT_FOUND)
+    if not 0 <= threshold <= 100 or not 1 <= window_days <= MAX_WINDOW_DAYS:
+        return Response({'error': 'Nieprawidłowe parametry.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    result = compute_eligibility(concert, season, threshold, window_days)
+    if request.method == 'POST':
+        result['flagged'] = flag_registrations(concert, result)
+    return Response(result)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_permissions(request):
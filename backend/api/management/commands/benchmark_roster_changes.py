@@ -0,0 +1,80 @@
+"""
+Management command to benchmark the set-based season roster changes against
+the previous per-musician loops.
+
+Every measurement runs inside a transaction that is rolled back, so the
+database is left untouched.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.seasons.models import Season
+from api.attendance.models import Attendance
+
+
+def legacy_remove_musicians(season, musician_ids):
+    """Reference implementation: per-musician lookups and deletes."""
+    for musician_id in musician_ids:
+        if season.musicians.filter(id=musician_id).exists():
+            musician = season.musicians.get(id=musician_id)
+            Attendance.objects.filter(user_id=musician.user_id, event__season=season).delete()
+            season.musicians.remove(musician_id)
+
+
+def legacy_add_musicians(season, musician_ids):
+    """Reference implementation: per-musician membership checks and per-event get_or_create."""
+    for musician in season.musicians.model.objects.filter(id__in=musician_ids, active=True):
+        if not season.musicians.filter(id=musician.id).exists():
+            season.musicians.add(musician)
+            for event in season.events.all():
+                Attendance.objects.get_or_create(user=musician.user, event=event, defaults={'present': 0.0})
+
+
+class Command(BaseCommand):
+    help = 'Benchmark set-based season roster changes against per-musician loops (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--season', type=int, help='Season ID (defaults to the current season)')
+
+    def handle(self, *args, **options):
+        season = (
+            Season.objects.filter(id=options['season']).first() if options['season']
+            else Season.get_current_season()
+        )
+        if season is None:
+            raise CommandError('Season not found')
+
+        roster = list(season.musicians.filter(active=True).values_list('id', flat=True))
+        events = season.events.count()
+        if not roster:
+            raise CommandError('The season has no active musicians')
+        self.stdout.write(f'Season {season.name}: {len(roster)} musicians x {events} events')
+
+        sizes = sorted({1, max(1, len(roster) // 2), len(roster)})
+        for size in sizes:
+            musician_ids = roster[:size]
+            self.stdout.write(f'  {size} musician(s):')
+            # Adding is measured for musicians removed from the roster first
+            remove_first = lambda: season.remove_musicians(musician_ids)
+            self.measure('set-based remove', lambda: season.remove_musicians(musician_ids))
+            self.measure('set-based add', lambda: season.add_musicians(musician_ids), setup=remove_first)
+            self.measure('legacy remove', lambda: legacy_remove_musicians(season, musician_ids))
+            self.measure('legacy add', lambda: legacy_add_musicians(season, musician_ids), setup=remove_first)
+
+        self.stdout.write(self.style.SUCCESS('[SUCCESS] Benchmark finished, all changes were rolled back'))
+
+    def measure(self, label, function, setup=None):
+        """Run one operation in a rolled back transaction and report its time and queries."""
+        with transaction.atomic():
+            if setup:
+                setup()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                function()
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        self.stdout.write(f'    {label:<17} {elapsed * 1000:8.1f} ms, {len(context.captured_queries)} queries')
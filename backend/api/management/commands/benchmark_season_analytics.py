@@ -0,0 +1,109 @@
+"""
+Management command to benchmark the NumPy attendance analytics against
+per-object Python loops over the ORM.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.seasons.models import Season
+from api.seasons.analytics import compute_season_analytics, EVENT_TYPE_WEIGHTS
+from api.attendance.models import Attendance
+
+
+def python_season_analytics(season):
+    """Reference implementation: the same statistics computed object by object."""
+    events = list(season.events.order_by('date', 'created_at'))
+    musicians = []
+    for musician in season.musicians.filter(active=True).order_by('user__last_name', 'user__first_name', 'user_id'):
+        values = {}
+        for attendance in Attendance.objects.filter(user=musician.user, event__season=season):
+            values[attendance.event_id] = float(attendance.present)
+
+        total = weighted = weight_sum = 0.0
+        streak = longest = 0
+        by_type = {event_type: [0.0, 0] for event_type in EVENT_TYPE_WEIGHTS}
+        for event in events:
+            if event.id not in values:
+                continue
+            value = values[event.id]
+            weight = EVENT_TYPE_WEIGHTS.get(event.type, 1.0)
+            total += value
+            weighted += value * weight
+            weight_sum += weight
+            by_type[event.type][0] += value
+            by_type[event.type][1] += 1
+            streak = streak + 1 if value == 0 else 0
+            longest = max(longest, streak)
+
+        count = len(values)
+        musicians.append({
+            'user_id': musician.user_id,
+            'instrument': musician.instrument,
+            'recorded_events': count,
+            'attendance_rate': round(total / count * 100, 2) if count else None,
+            'weighted_rate': round(weighted / weight_sum * 100, 2) if weight_sum else None,
+            'rates_by_type': {
+                event_type: round(value / type_count * 100, 2) if type_count else None
+                for event_type, (value, type_count) in by_type.items()
+            },
+            'longest_absence_streak': longest,
+        })
+
+    roster = {musician['user_id'] for musician in musicians}
+    turnout = []
+    for event in events:
+        attendances = [a for a in event.attendances.all() if a.user_id in roster]
+        turnout.append(
+            round(sum(float(a.present) for a in attendances) / len(attendances) * 100, 2) if attendances else None
+        )
+    return {'musicians': musicians, 'turnout': turnout}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark NumPy season attendance analytics against per-object Python loops'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--season', type=int, help='Season ID (defaults to the current season)')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of runs of each implementation')
+
+    def handle(self, *args, **options):
+        season = (
+            Season.objects.filter(id=options['season']).first() if options['season']
+            else Season.get_current_season()
+        )
+        if season is None:
+            raise CommandError('Season not found')
+
+        musicians = season.musicians.filter(active=True).count()
+        events = season.events.count()
+        self.stdout.write(f'Season {season.name}: {musicians} musicians x {events} events')
+
+        numpy_result, numpy_time, numpy_queries = self.measure(compute_season_analytics, season, options['repeat'])
+        python_result, python_time, python_queries = self.measure(python_season_analytics, season, options['repeat'])
+
+        self.stdout.write(f'  NumPy:  {numpy_time * 1000:8.1f} ms/run, {numpy_queries} queries')
+        self.stdout.write(f'  Python: {python_time * 1000:8.1f} ms/run, {python_queries} queries')
+        if numpy_time:
+            self.stdout.write(f'  Speed-up: {python_time / numpy_time:.1f}x')
+
+        fields = ['user_id', 'recorded_events', 'attendance_rate', 'weighted_rate', 'rates_by_type', 'longest_absence_streak']
+        numpy_musicians = [{field: row[field] for field in fields} for row in numpy_result['musicians']]
+        python_musicians = [{field: row[field] for field in fields} for row in python_result['musicians']]
+        numpy_turnout = [event['turnout'] for event in numpy_result['events']]
+        if numpy_musicians == python_musicians and numpy_turnout == python_result['turnout']:
+            self.stdout.write(self.style.SUCCESS('[SUCCESS] Both implementations return the same statistics'))
+        else:
+            self.stdout.write(self.style.ERROR('[ERROR] Results differ between implementations'))
+
+    def measure(self, function, season, repeat):
+        """Return the last result, the mean time per run and the queries of one run."""
+        with CaptureQueriesContext(connection) as context:
+            result = function(season)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = function(season)
+        return result, (time.perf_counter() - start) / max(repeat, 1), len(context.captured_queries)
@@ -0,0 +1,18 @@
+"""
+Management command to expire report jobs lost with their web worker.
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.reports.models import ReportJob
+
+
+class Command(BaseCommand):
+    help = 'Mark report jobs that stayed pending or running longer than REPORT_JOB_TIMEOUT as stale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=int, help='Timeout in seconds (defaults to REPORT_JOB_TIMEOUT)')
+
+    def handle(self, *args, **options):
+        expired = ReportJob.expire_stale(timeout=options['timeout'])
+        self.stdout.write(self.style.SUCCESS(f'[SUCCESS] Marked {expired} report jobs as stale'))
@@ -0,0 +1,59 @@
+"""
+Management command to import historical attendance from a CSV file.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.seasons.models import Season
+from api.attendance.imports import AttendanceImporter, AttendanceImportError, IMPORT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Import attendance of a season from a CSV file (columns: username/user_id, event_id/date[, type], present)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', type=str, help='Path to the CSV file')
+        parser.add_argument('--season', type=int, required=True, help='Season ID')
+        parser.add_argument('--dry-run', action='store_true',
+                          help='Validate the file and show the changes without writing them')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                          help=f'Rows resolved and written per batch (default: {IMPORT_BATCH_SIZE})')
+
+    def handle(self, *args, **options):
+        try:
+            season = Season.objects.get(id=options['season'])
+        except Season.DoesNotExist:
+            raise CommandError(f"Season {options['season']} does not exist")
+
+        importer = AttendanceImporter(season, batch_size=options['batch_size'])
+        try:
+            with open(options['csv_file'], encoding='utf-8-sig', newline='') as stream:
+                report = importer.run(stream, dry_run=options['dry_run'])
+        except (OSError, UnicodeDecodeError, AttendanceImportError) as e:
+            raise CommandError(str(e))
+
+        if options['verbosity'] > 1:
+            for change in report['changes']:
+                old = '-' if change['old'] is None else change['old']
+                self.stdout.write(
+                    f"  line {change['line']}: {change['user']} @ {change['event']} ({change['date']}): "
+                    f"{old} -> {change['new']}"
+                )
+            if report['changes_truncated']:
+                self.stdout.write('  ...')
+
+        for error in report['errors']:
+            self.stdout.write(self.style.ERROR(f"[ERROR] line {error['line']}: {error['detail']}"))
+        if report['errors_truncated']:
+            self.stdout.write(self.style.ERROR('  ...'))
+
+        summary = (
+            f"{report['rows']} rows: {report['created']} to create, "
+            f"{report['updated']} to update, {report['unchanged']} unchanged"
+        )
+        if report['error_count']:
+            raise CommandError(f"Import aborted, {report['error_count']} invalid rows ({summary})")
+        if report['dry_run']:
+            self.stdout.write(self.style.WARNING(f'[DRY RUN] {summary}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'[SUCCESS] Imported season {season.name}: {summary}'))
@@ -0,0 +1,92 @@
+"""
+Management command to load-test the self check-in endpoint.
+
+Issues access tokens for the musicians of the event's season and fires
+concurrent check-in requests at a running server, then reports throughput
+and latency. Run it where the database is reachable, e.g.:
+
+    docker compose exec backend python manage.py loadtest_check_in --event 42 --url http://localhost:8000
+"""
+
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.attendance.models import Event
+from api.attendance.checkin import make_checkin_code
+
+
+class Command(BaseCommand):
+    help = 'Load-test the attendance self check-in endpoint with concurrent requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, required=True, help='Event ID to check in to (must be today)')
+        parser.add_argument('--url', type=str, default='http://localhost:8000', help='Base URL of the running server')
+        parser.add_argument('--concurrency', type=int, default=50, help='Number of concurrent clients')
+        parser.add_argument('--repeat', type=int, default=5,
+                          help='Check-ins per musician (repeats exercise the idempotent path)')
+        parser.add_argument('--with-code', action='store_true', help='Send the current event code')
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.select_related('season').get(id=options['event'])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event']} does not exist")
+
+        users = [musician.user for musician in event.season.musicians.filter(active=True).select_related('user')]
+        if not users:
+            raise CommandError('The season of this event has no musicians')
+
+        endpoint = f"{options['url'].rstrip('/')}/api/attendance/events/{event.id}/check_in/"
+        body = {}
+        if options['with_code']:
+            body['code'], _ = make_checkin_code(event.id)
+        payload = json.dumps(body).encode()
+        tokens = [str(AccessToken.for_user(user)) for user in users] * options['repeat']
+
+        def check_in(token):
+            request = urllib.request.Request(endpoint, data=payload, method='POST', headers={
+                'Authorization': f'Bearer {token}',
+                'Content-Type': 'application/json',
+            })
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    code = response.status
+            except urllib.error.HTTPError as e:
+                code = e.code
+            except OSError:
+                code = 'connection error'
+            return code, time.perf_counter() - start
+
+        self.stdout.write(
+            f'Sending {len(tokens)} check-ins ({len(users)} musicians x {options["repeat"]}) '
+            f'with {options["concurrency"]} clients to {endpoint}'
+        )
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(check_in, tokens))
+        elapsed = time.perf_counter() - start
+
+        statuses = Counter(code for code, _ in results)
+        latencies = sorted(latency * 1000 for _, latency in results)
+        percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+        self.stdout.write(f'  Statuses: {dict(statuses)}')
+        self.stdout.write(f'  Throughput: {len(results) / elapsed:.1f} check-ins/s ({elapsed:.2f} s total)')
+        self.stdout.write(
+            f'  Latency: p50 {percentile(0.5):.1f} ms, p95 {percentile(0.95):.1f} ms, '
+            f'p99 {percentile(0.99):.1f} ms, mean {statistics.mean(latencies):.1f} ms'
+        )
+        present = event.attendances.filter(present=1.0, user__in=users).count()
+        if statuses.get(200) == len(results) and present == len(users):
+            self.stdout.write(self.style.SUCCESS(f'[SUCCESS] All {present} musicians checked in'))
+        else:
+            self.stdout.write(self.style.WARNING(f'[WARNING] {present}/{len(users)} musicians marked present'))
@@ -0,0 +1,15 @@
+"""
+Management command to prune old attendance tombstones.
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.attendance.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete attendance tombstones older than the delta-sync retention period'
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'[SUCCESS] Pruned {deleted} attendance tombstones'))
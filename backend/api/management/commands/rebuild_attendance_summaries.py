@@ -0,0 +1,28 @@
+"""
+Management command to rebuild materialized attendance summaries.
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.seasons.models import Season
+from api.attendance.models import AttendanceSummary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-musician attendance summaries from raw attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--season', type=int, action='append',
+                          help='Season ID to rebuild (can be repeated, defaults to all seasons)')
+
+    def handle(self, *args, **options):
+        seasons = Season.objects.order_by('start_date')
+        if options['season']:
+            seasons = seasons.filter(id__in=options['season'])
+        
+        for season in seasons:
+            AttendanceSummary.refresh(season.id)
+            count = AttendanceSummary.objects.filter(season=season).count()
+            self.stdout.write(
+                self.style.SUCCESS(f'[SUCCESS] Rebuilt {count} summaries for season {season.name}')
+            )
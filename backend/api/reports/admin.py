@@ -0,0 +1,18 @@
+"""
+Admin configuration for reports models.
+"""
+
+from django.contrib import admin
+
+from .models import ReportJob
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    """Admin interface for ReportJob model."""
+    
+    list_display = ['kind', 'status', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status', 'created_at']
+    list_select_related = ['created_by']
+    ordering = ['-created_at']
+    readonly_fields = ['id', 'kind', 'params', 'status', 'file', 'error', 'created_by', 'created_at', 'started_at', 'finished_at']
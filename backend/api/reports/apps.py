@@ -0,0 +1,10 @@
+"""
+Reports app configuration.
+"""
+from django.apps import AppConfig
+
+
+class ReportsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'api.reports'
+    verbose_name = 'Raporty'
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='kind',
+            field=models.CharField(choices=[('attendance_xlsx', 'Eksport obecności (XLSX)'), ('season_report', 'Raport sezonu')], max_length=30),
+        ),
+    ]
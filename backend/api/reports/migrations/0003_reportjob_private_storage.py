@@ -0,0 +1,19 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:50
+
+import api.reports.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_reportjob_season_report_kind'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=api.reports.models.report_storage, upload_to=api.reports.models.report_upload_path),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_reportjob_private_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Oczekuje'), ('running', 'W trakcie'), ('done', 'Gotowy'), ('failed', 'Błąd'), ('stale', 'Przerwany')], default='pending', max_length=20),
+        ),
+    ]
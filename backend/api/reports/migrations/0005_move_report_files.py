@@ -0,0 +1,41 @@
+import os
+import shutil
+
+from django.conf import settings
+from django.db import migrations
+
+OLD_PREFIX = 'reports/'
+
+
+def move_report_files(apps, schema_editor):
+    """
+    Move report files generated before the private storage from MEDIA_ROOT
+    to REPORTS_ROOT; rows whose file is gone are dropped.
+    """
+    ReportJob = apps.get_model('reports', 'ReportJob')
+    for job_id, name in ReportJob.objects.filter(file__startswith=OLD_PREFIX).values_list('id', 'file'):
+        source = os.path.join(settings.MEDIA_ROOT, name)
+        if not os.path.isfile(source):
+            ReportJob.objects.filter(pk=job_id).delete()
+            continue
+        new_name = name[len(OLD_PREFIX):]
+        target = os.path.join(settings.REPORTS_ROOT, new_name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(source, target)
+        ReportJob.objects.filter(pk=job_id).update(file=new_name)
+        # Drop the now empty job directory
+        try:
+            os.rmdir(os.path.dirname(source))
+        except OSError:
+            pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_reportjob_stale_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_report_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+"""
+Report models - files generated in the background and served to their owners.
+"""
+
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+def report_storage():
+    """Private storage of generated reports under REPORTS_ROOT (not publicly served)."""
+    return FileSystemStorage(location=settings.REPORTS_ROOT)
+
+
+def report_upload_path(instance, filename):
+    """Store each report in a directory named after its job id."""
+    return f'{instance.pk}/{filename}'
+
+
+class ReportJob(models.Model):
+    """
+    A report or export generated off the request thread.
+    Clients poll the job until it is done and then download the file through
+    the API, which checks that the job is theirs.
+    """
+    KIND_ATTENDANCE_XLSX = 'attendance_xlsx'
+    KIND_SEASON_REPORT = 'season_report'
+    KIND_CHOICES = [
+        (KIND_ATTENDANCE_XLSX, 'Eksport obecności (XLSX)'),
+        (KIND_SEASON_REPORT, 'Raport sezonu'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_STALE = 'stale'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Oczekuje'),
+        (STATUS_RUNNING, 'W trakcie'),
+        (STATUS_DONE, 'Gotowy'),
+        (STATUS_FAILED, 'Błąd'),
+        (STATUS_STALE, 'Przerwany'),
+    ]
+    UNFINISHED_STATUSES = [STATUS_PENDING, STATUS_RUNNING]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    file = models.FileField(upload_to=report_upload_path, storage=report_storage, null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'reports_reportjob'
+        verbose_name = 'Raport'
+        verbose_name_plural = 'Raporty'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_by', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} ({self.get_status_display()}) - {self.created_at:%Y-%m-%d %H:%M}"
+
+    @property
+    def is_finished(self):
+        """Return True once the job has either succeeded or failed."""
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED, self.STATUS_STALE)
+
+    @classmethod
+    def expire_stale(cls, queryset=None, timeout=None):
+        """
+        Mark unfinished jobs older than ``timeout`` seconds (``REPORT_JOB_TIMEOUT``)
+        as stale. Jobs run inside web worker processes, so a job whose process
+        was recycled or killed would otherwise stay pending or running forever.
+        Returns the number of expired jobs.
+        """
+        if timeout is None:
+            timeout = settings.REPORT_JOB_TIMEOUT
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.filter(
+            status__in=cls.UNFINISHED_STATUSES,
+            created_at__lt=timezone.now() - timedelta(seconds=timeout),
+        ).update(
+            status=cls.STATUS_STALE,
+            error='Zadanie nie zostało ukończone w wyznaczonym czasie - zleć je ponownie.',
+            finished_at=timezone.now(),
+        )
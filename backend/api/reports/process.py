@@ -0,0 +1,22 @@
+"""
+Entry points of report worker processes.
+
+Worker processes are started with the ``spawn`` method, so they import this
+module in a fresh interpreter before Django is configured. It must therefore
+not import models at module level: the initializer sets Django up first and
+the job function imports the worker code lazily.
+"""
+import os
+
+
+def init_worker(settings_module):
+    """Configure Django in a freshly spawned worker process."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def run_job_in_process(job_id):
+    """Run one report job inside a worker process."""
+    from .workers import run_job
+    run_job(job_id)
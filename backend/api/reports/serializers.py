@@ -0,0 +1,29 @@
+"""
+Report-related serializers for the API.
+"""
+from django.urls import reverse
+from rest_framework import serializers
+from .models import ReportJob
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Serializer for report job status."""
+    file_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id', 'kind', 'params', 'status', 'file_url', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+    
+    def get_file_url(self, obj):
+        """Return the full URL of the authenticated download of the generated file."""
+        if obj.status != ReportJob.STATUS_DONE or not obj.file:
+            return None
+        url = reverse('reports:report-job-download', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
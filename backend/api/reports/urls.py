@@ -0,0 +1,12 @@
+"""
+URL configuration for reports API.
+"""
+from django.urls import path
+from . import views
+
+app_name = 'reports'
+
+urlpatterns = [
+    path('jobs/<uuid:pk>/', views.ReportJobDetailView.as_view(), name='report-job-detail'),
+    path('jobs/<uuid:pk>/download/', views.ReportJobDownloadView.as_view(), name='report-job-download'),
+]
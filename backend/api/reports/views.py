@@ -0,0 +1,47 @@
+"""
+Report-related API views.
+"""
+import os
+
+from django.http import FileResponse, Http404
+from rest_framework import generics, permissions
+
+from .models import ReportJob
+from .serializers import ReportJobSerializer
+
+
+class ReportJobDetailView(generics.RetrieveAPIView):
+    """
+    Poll the status of a report job; `file_url` is set once it is done.
+    
+    A job still unfinished after `REPORT_JOB_TIMEOUT` was lost with its worker
+    and is reported with the `stale` status.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ReportJobSerializer
+    
+    def get_queryset(self):
+        """Users only see their own jobs, superusers see all."""
+        if self.request.user.is_superuser:
+            return ReportJob.objects.all()
+        return ReportJob.objects.filter(created_by=self.request.user)
+    
+    def get_object(self):
+        job = super().get_object()
+        if not job.is_finished and ReportJob.expire_stale(ReportJob.objects.filter(pk=job.pk)):
+            job.refresh_from_db()
+        return job
+
+
+class ReportJobDownloadView(ReportJobDetailView):
+    """Download the file of a finished report job (only the owner or a superuser)."""
+    
+    def retrieve(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status != ReportJob.STATUS_DONE or not job.file:
+            raise Http404
+        try:
+            handle = job.file.open('rb')
+        except FileNotFoundError:
+            raise Http404
+        return FileResponse(handle, as_attachment=True, filename=os.path.basename(job.file.name))
@@ -0,0 +1,177 @@
+"""
+Background execution of report jobs.
+
+Jobs run in a pool of worker threads inside the web process, so building a
+large file never blocks a gunicorn worker for the duration of a request.
+CPU-heavy kinds (rendering whole-season reports) run in a pool of separate
+processes instead, so they do not compete with request threads for the GIL.
+The job row is the only shared state - any worker process can report progress.
+Generated files go to the private REPORTS_ROOT storage.
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> dotted path of a callable `handler(job, output) -> filename`,
+# writing the report into the binary file object `output`.
+JOB_HANDLERS = {
+    ReportJob.KIND_ATTENDANCE_XLSX: 'api.attendance.exports.write_attendance_xlsx',
+    ReportJob.KIND_SEASON_REPORT: 'api.seasons.reports.write_season_report',
+}
+
+# Job kinds executed in the process pool
+PROCESS_JOB_KINDS = {ReportJob.KIND_SEASON_REPORT}
+
+_executor = None
+_executor_lock = threading.Lock()
+_process_executor = None
+_swept = False
+
+
+def get_executor():
+    """Return the process-wide worker pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'REPORT_WORKERS', 2),
+                thread_name_prefix='report-worker',
+            )
+        return _executor
+
+
+def get_process_executor():
+    """Return the pool of report worker processes, creating it on first use."""
+    global _process_executor
+    with _executor_lock:
+        if _process_executor is None:
+            from .process import init_worker
+            _process_executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'REPORT_PROCESS_WORKERS', 1),
+                # Forking a multi-threaded gunicorn worker is unsafe - start clean interpreters
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(settings.SETTINGS_MODULE,),
+            )
+        return _process_executor
+
+
+def _fail_unfinished(job_id, error):
+    """Mark the job failed unless its worker already finished it."""
+    failed = ReportJob.objects.filter(
+        pk=job_id, status__in=[ReportJob.STATUS_PENDING, ReportJob.STATUS_RUNNING]
+    ).update(status=ReportJob.STATUS_FAILED, error=error, finished_at=timezone.now())
+    if failed:
+        logger.error('Report job %s ended unfinished: %s', job_id, error)
+
+
+def _job_done(job_id, future):
+    """
+    Fail the job if its worker ended without finishing it - e.g. the worker
+    process died or the pool broke before the job ran. ``run_job`` handles
+    its own errors, so a future that completed normally needs no check.
+    """
+    if future.cancelled():
+        error = 'Zadanie zostało anulowane.'
+    elif future.exception() is not None:
+        error = str(future.exception()) or repr(future.exception())
+    else:
+        return
+    try:
+        _fail_unfinished(job_id, error)
+    finally:
+        # Runs in the pool's management thread - do not leak its connection
+        connections.close_all()
+
+
+def _submit(executor, fn, job_id):
+    executor.submit(fn, job_id).add_done_callback(partial(_job_done, job_id))
+
+
+def _submit_to_processes(job_id):
+    """Submit a job to the process pool, replacing the pool once if a worker died."""
+    global _process_executor
+    from .process import run_job_in_process
+    try:
+        _submit(get_process_executor(), run_job_in_process, job_id)
+    except BrokenProcessPool:
+        logger.warning('Report process pool is broken, starting a new one')
+        with _executor_lock:
+            _process_executor = None
+        try:
+            _submit(get_process_executor(), run_job_in_process, job_id)
+        except Exception as e:
+            _fail_unfinished(job_id, str(e) or repr(e))
+
+
+def _expire_stale_jobs_once():
+    """
+    Mark jobs lost with recycled or killed web workers as stale. Runs on the
+    first job of every process; ``expire_report_jobs`` does it periodically.
+    """
+    global _swept
+    with _executor_lock:
+        if _swept:
+            return
+        _swept = True
+    expired = ReportJob.expire_stale()
+    if expired:
+        logger.warning('Marked %s unfinished report jobs as stale', expired)
+
+
+def enqueue(job):
+    """Run the job in the worker pool once the current transaction commits."""
+    _expire_stale_jobs_once()
+    if job.kind in PROCESS_JOB_KINDS:
+        transaction.on_commit(lambda: _submit_to_processes(job.pk))
+    else:
+        transaction.on_commit(lambda: _submit(get_executor(), run_job, job.pk))
+
+
+def run_job(job_id):
+    """Build the report of one job and store it under REPORTS_ROOT."""
+    try:
+        job = ReportJob.objects.get(pk=job_id)
+        if job.status != ReportJob.STATUS_PENDING:
+            # Already expired as stale (or picked up twice) - do not resurrect it
+            return
+        job.status = ReportJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+
+        handler = import_string(JOB_HANDLERS[job.kind])
+        fd, path = tempfile.mkstemp(prefix='report-')
+        try:
+            with os.fdopen(fd, 'w+b') as output:
+                filename = handler(job, output)
+                output.seek(0)
+                job.file.save(filename, File(output), save=False)
+        finally:
+            os.remove(path)
+
+        job.status = ReportJob.STATUS_DONE
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'file', 'finished_at'])
+    except Exception as e:
+        logger.exception('Report job %s failed', job_id)
+        ReportJob.objects.filter(pk=job_id).update(
+            status=ReportJob.STATUS_FAILED, error=str(e), finished_at=timezone.now()
+        )
+    finally:
+        # Worker threads and processes get their own database connections - do not leak them
+        connections.close_all()
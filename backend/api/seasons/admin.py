@@ -3,9 +3,11 @@ Admin configuration for seasons models.
 """
 
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from django.urls import reverse
 
+from .changes import mark_seasons_changed
 from .models import Season
 
 
@@ -39,24 +41,30 @@ class SeasonAdmin(admin.ModelAdmin):
     
     filter_horizontal = ['musicians']
     
+    def get_queryset(self, request):
+        """Annotate event and musician counts so changelist rows do not query them one by one."""
+        return Season.with_counts(super().get_queryset(request))
+    
     def events_count(self, obj):
         """Display number of events in this season."""
-        count = obj.events.count()
+        count = obj.events_count
         if count > 0:
             url = reverse('admin:attendance_event_changelist') + f'?season__id__exact={obj.id}'
             return format_html('<a href="{}">{} wydarzeń</a>', url, count)
         return f'{count} wydarzeń'
     events_count.short_description = 'Wydarzenia'
+    events_count.admin_order_field = 'events_total'
     
     def musicians_count(self, obj):
         """Display number of musicians in this season."""
-        count = obj.musicians.count()
+        count = obj.musicians_count
         if count > 0:
             # Create a link to edit this season to manage musicians
             url = reverse('admin:seasons_season_change', args=[obj.id]) + '#musicians'
             return format_html('<a href="{}" title="Kliknij aby zarządzać muzykami sezonu">{} muzyków</a>', url, count)
         return f'{count} muzyków'
     musicians_count.short_description = 'Muzycy'
+    musicians_count.admin_order_field = 'musicians_total'
     
     def duration_display(self, obj):
         """Display season duration in a readable format."""
@@ -68,6 +76,7 @@ class SeasonAdmin(admin.ModelAdmin):
     
     actions = ['make_active', 'make_inactive']
     
+    @transaction.atomic
     def make_active(self, request, queryset):
         """Make selected seasons active."""
         # Only allow one active season at a time
@@ -79,11 +88,15 @@ class SeasonAdmin(admin.ModelAdmin):
         Season.objects.all().update(is_active=False)
         # Activate the selected season
         updated = queryset.update(is_active=True)
+        # `is_current` of every season may have changed
+        mark_seasons_changed(Season.objects.values_list('id', flat=True))
         self.message_user(request, f'{updated} sezon został ustawiony jako aktywny.')
     make_active.short_description = "Ustaw jako aktywny sezon"
     
+    @transaction.atomic
     def make_inactive(self, request, queryset):
         """Make selected seasons inactive."""
         updated = queryset.update(is_active=False)
+        mark_seasons_changed(Season.objects.values_list('id', flat=True))
         self.message_user(request, f'{updated} sezon(y) zostały dezaktywowane.')
     make_inactive.short_description = "Dezaktywuj sezony"
@@ -0,0 +1,169 @@
+"""
+Vectorised attendance analytics of a season.
+
+The season's attendance is loaded into a dense musicians x events matrix with
+one query; missing records are NaN. All statistics are then computed with
+NumPy array operations instead of per-object Python loops.
+"""
+import numpy as np
+
+from api.users.models import INSTRUMENT_CHOICES
+
+# Weight of each event type in the weighted attendance rate
+EVENT_TYPE_WEIGHTS = {
+    'concert': 2.0,
+    'rehearsal': 1.0,
+    'soundcheck': 1.0,
+}
+
+SECTION_LABELS = dict(INSTRUMENT_CHOICES)
+
+
+def load_attendance_matrix(season):
+    """
+    Return ``(musicians, events, matrix)`` for a season.
+
+    ``musicians`` are the active roster as dicts, ``events`` the season's
+    events in date order and ``matrix[i, j]`` the attendance value (0, 0.5 or 1)
+    of musician i at event j, NaN where no record exists.
+    """
+    from api.attendance.models import Attendance
+
+    musicians = list(
+        season.musicians.filter(active=True)
+        .order_by('user__last_name', 'user__first_name', 'user_id')
+        .values('user_id', 'instrument', 'user__first_name', 'user__last_name')
+    )
+    events = list(season.events.order_by('date', 'created_at').values('id', 'name', 'date', 'type'))
+
+    matrix = np.full((len(musicians), len(events)), np.nan)
+    if not musicians or not events:
+        return musicians, events, matrix
+
+    rows = list(Attendance.objects.filter(event__season=season).values_list('user_id', 'event_id', 'present'))
+    if rows:
+        user_ids, event_ids, values = (np.array(column) for column in zip(*rows))
+        # Map database ids to matrix positions with sorted lookups
+        roster_ids = np.array([musician['user_id'] for musician in musicians])
+        roster_order = np.argsort(roster_ids)
+        event_positions = {event['id']: position for position, event in enumerate(events)}
+        columns = np.array([event_positions[event_id] for event_id in event_ids])
+
+        found = np.searchsorted(roster_ids, user_ids, sorter=roster_order)
+        found = np.minimum(found, len(roster_ids) - 1)
+        rows_idx = roster_order[found]
+        on_roster = roster_ids[rows_idx] == user_ids
+        matrix[rows_idx[on_roster], columns[on_roster]] = values[on_roster].astype(float)
+
+    return musicians, events, matrix
+
+
+def _rates(values, counts):
+    """Percentages ``values / counts``; NaN where nothing was recorded."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, values / counts * 100, np.nan)
+
+
+def _to_list(array):
+    """Round to 2 decimals and replace NaN with None for JSON."""
+    return [None if np.isnan(value) else round(float(value), 2) for value in array]
+
+
+def longest_absence_streaks(matrix):
+    """
+    Longest run of consecutive absences (value 0) per musician.
+    Events without a record neither extend nor break a streak.
+    """
+    if matrix.size == 0:
+        return np.zeros(matrix.shape[0], dtype=int)
+    recorded = ~np.isnan(matrix)
+    absent = recorded & (matrix == 0)
+    # Drop unrecorded cells by counting positions among recorded cells only
+    position = np.cumsum(recorded, axis=1)
+    # Index of the last non-absent recorded event seen so far in each row
+    last_break = np.maximum.accumulate(np.where(recorded & ~absent, position, 0), axis=1)
+    streaks = np.where(absent, position - last_break, 0)
+    return streaks.max(axis=1)
+
+
+def _correlation(x, y):
+    """Pearson correlation of two vectors ignoring NaN pairs; None if undefined."""
+    mask = ~np.isnan(x) & ~np.isnan(y)
+    if mask.sum() < 2 or np.std(x[mask]) == 0 or np.std(y[mask]) == 0:
+        return None
+    return round(float(np.corrcoef(x[mask], y[mask])[0, 1]), 4)
+
+
+def compute_season_analytics(season):
+    """Compute attendance analytics of a season; returns a JSON-serializable dict."""
+    musicians, events, matrix = load_attendance_matrix(season)
+
+    recorded = ~np.isnan(matrix)
+    values = np.nan_to_num(matrix)
+    event_types = np.array([event['type'] for event in events])
+    weights = np.array([EVENT_TYPE_WEIGHTS.get(event_type, 1.0) for event_type in event_types])
+
+    # Per-musician rates
+    counts = recorded.sum(axis=1)
+    rates = _rates(values.sum(axis=1), counts)
+    weighted_rates = _rates((values * weights).sum(axis=1), (recorded * weights).sum(axis=1))
+    streaks = longest_absence_streaks(matrix)
+
+    type_rates = {}
+    for event_type in EVENT_TYPE_WEIGHTS:
+        columns = event_types == event_type
+        type_rates[event_type] = _rates(values[:, columns].sum(axis=1), recorded[:, columns].sum(axis=1))
+    type_rate_lists = {event_type: _to_list(rate) for event_type, rate in type_rates.items()}
+
+    # Per-event turnout
+    turnout = _rates(values.sum(axis=0), recorded.sum(axis=0))
+
+    # Per-section rates: group rows by instrument with bincount
+    instruments = np.array([musician['instrument'] for musician in musicians])
+    sections, section_index = np.unique(instruments, return_inverse=True)
+    section_values = np.bincount(section_index, weights=values.sum(axis=1), minlength=len(sections))
+    section_counts = np.bincount(section_index, weights=counts, minlength=len(sections))
+    section_sizes = np.bincount(section_index, minlength=len(sections))
+    section_rates = _rates(section_values, section_counts)
+
+    return {
+        'season': {'id': season.id, 'name': season.name},
+        'event_type_weights': EVENT_TYPE_WEIGHTS,
+        'musicians': [
+            {
+                'user_id': musician['user_id'],
+                'first_name': musician['user__first_name'],
+                'last_name': musician['user__last_name'],
+                'instrument': musician['instrument'],
+                'recorded_events': int(counts[i]),
+                'attendance_rate': rate,
+                'weighted_rate': weighted_rate,
+                'rates_by_type': {event_type: type_rate_lists[event_type][i] for event_type in type_rate_lists},
+                'longest_absence_streak': int(streaks[i]),
+            }
+            for i, (musician, rate, weighted_rate) in enumerate(
+                zip(musicians, _to_list(rates), _to_list(weighted_rates))
+            )
+        ],
+        'events': [
+            {
+                'id': event['id'],
+                'name': event['name'],
+                'date': event['date'],
+                'type': event['type'],
+                'turnout': rate,
+            }
+            for event, rate in zip(events, _to_list(turnout))
+        ],
+        'sections': [
+            {
+                'instrument': str(instrument),
+                'name': SECTION_LABELS.get(str(instrument), str(instrument)),
+                'musicians': int(size),
+                'attendance_rate': rate,
+            }
+            for instrument, size, rate in zip(sections, section_sizes, _to_list(section_rates))
+        ],
+        # Do musicians who attend rehearsals also turn up for concerts?
+        'rehearsal_concert_correlation': _correlation(type_rates['rehearsal'], type_rates['concert']),
+    }
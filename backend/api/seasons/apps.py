@@ -8,3 +8,7 @@ class SeasonsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api.seasons'
     verbose_name = 'Sezony'
+
+    def ready(self):
+        """Import signals when the app is ready."""
+        import api.seasons.signals
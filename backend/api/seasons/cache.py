@@ -0,0 +1,105 @@
+"""
+Caching helpers for computed season data.
+
+Cache keys embed ``Season.data_version``, so any write to a season's events,
+attendance or roster retires all cached entries for that season at once -
+stale entries are never read again and simply expire. The attendance grid also
+embeds a fingerprint of the season's attendance rows, which follows self
+check-ins immediately.
+"""
+from django.core.cache import cache
+from django.utils import timezone
+
+GRID_CACHE_TIMEOUT = 60 * 60  # 1 hour
+ANALYTICS_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+HISTORY_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+# The current season id has no version to embed; keep it short-lived so other
+# worker processes (which only see their own invalidations) catch up quickly
+CURRENT_SEASON_CACHE_TIMEOUT = 60
+NO_CURRENT_SEASON = 0
+
+
+def attendance_fingerprint(season_id):
+    """
+    Return a short string that changes whenever attendance rows of the season change.
+
+    Self check-ins bump ``data_version`` only with a delay (see
+    ``api.seasons.changes.defer_attendance_changed``); the grid key embeds this
+    fingerprint as well, so it is retired without waiting for the season row.
+    """
+    from django.db.models import Count, Max
+    from api.attendance.models import Attendance
+    from api.attendance.sync import make_sync_token
+
+    state = Attendance.objects.filter(event__season_id=season_id).aggregate(rows=Count('id'), changed=Max('updated_at'))
+    return f"{state['rows']}.{make_sync_token(state['changed']) if state['changed'] else '0'}"
+
+
+def grid_cache_key(season, event_type=None, month=None):
+    """Build the cache key for a season's attendance grid view."""
+    # The grid embeds `is_current`, which depends on today's date
+    today = timezone.localdate().isoformat()
+    return (
+        f'seasons:grid:{season.pk}:v{season.data_version}:a{attendance_fingerprint(season.pk)}:{today}:'
+        f'{event_type or "all"}:{month or "all"}'
+    )
+
+
+def get_cached_grid(key):
+    """Return the cached attendance grid or None."""
+    return cache.get(key)
+
+
+def set_cached_grid(key, data):
+    """Store a computed attendance grid."""
+    cache.set(key, data, GRID_CACHE_TIMEOUT)
+
+
+def analytics_cache_key(season):
+    """Build the cache key for a season's attendance analytics."""
+    return f'seasons:analytics:{season.pk}:v{season.data_version}'
+
+
+def get_cached_analytics(season):
+    """Return the cached attendance analytics or None."""
+    return cache.get(analytics_cache_key(season))
+
+
+def set_cached_analytics(season, data):
+    """Store computed attendance analytics."""
+    cache.set(analytics_cache_key(season), data, ANALYTICS_CACHE_TIMEOUT)
+
+
+def history_cache_key(fingerprint, musician_id):
+    """Build the cache key for the per-season history rows of one musician."""
+    return f'seasons:history:{fingerprint}:{musician_id}'
+
+
+def get_cached_histories(keys):
+    """Return ``{key: seasons}`` of the cached musician histories among ``keys``."""
+    return cache.get_many(keys)
+
+
+def set_cached_histories(histories):
+    """Store musician histories given as ``{key: seasons}``."""
+    cache.set_many(histories, HISTORY_CACHE_TIMEOUT)
+
+
+def current_season_cache_key():
+    """Build the cache key of the current season id; it rolls over with the date."""
+    return f'seasons:current:{timezone.localdate().isoformat()}'
+
+
+def get_cached_current_season_id():
+    """Return the cached current season id, ``NO_CURRENT_SEASON`` or None on a miss."""
+    return cache.get(current_season_cache_key())
+
+
+def set_cached_current_season_id(season_id):
+    """Store the current season id (None when there is no current season)."""
+    cache.set(current_season_cache_key(), season_id or NO_CURRENT_SEASON, CURRENT_SEASON_CACHE_TIMEOUT)
+
+
+def invalidate_current_season():
+    """Forget the cached current season id."""
+    cache.delete(current_season_cache_key())
@@ -0,0 +1,200 @@
+"""
+Change tracking for season data.
+
+Every write that affects what a season looks like (attendance, events, roster)
+marks the season as changed. Marks are collected per thread and flushed once
+the surrounding transaction commits, so a request that touches hundreds of rows
+bumps each affected season's ``data_version`` only once, refreshes the
+attendance summaries of the affected musicians with one grouped query and
+publishes a single notification to live attendance streams.
+
+High-rate writers (self check-in) use ``defer_attendance_changed`` instead:
+their marks are collected per process and flushed together a moment later, so
+a burst of check-ins does not update the season row once per request.
+"""
+import atexit
+import threading
+from functools import partial
+
+from django.db import transaction
+
+# Marker meaning "every musician of the season/event is affected"
+ALL_USERS = None
+
+# Seconds deferred marks are collected before they are flushed together
+DEFERRED_FLUSH_DELAY = 2
+
+_state = threading.local()
+
+_deferred_lock = threading.Lock()
+_deferred_events = {}   # event_id -> set of user ids or ALL_USERS, shared by all threads
+_deferred_timer = None
+
+
+def _pending():
+    """Return the per-thread pending changes, creating them on first use."""
+    if not hasattr(_state, 'seasons'):
+        _state.seasons = set()     # seasons whose data_version must be bumped
+        _state.summaries = {}      # season_id -> set of user ids or ALL_USERS
+        _state.events = {}         # event_id -> set of user ids or ALL_USERS
+    return _state
+
+
+def _merge_users(target, key, user_ids):
+    """Add user ids to target[key], where ALL_USERS absorbs everything."""
+    if user_ids is ALL_USERS or target.get(key, set()) is ALL_USERS:
+        target[key] = ALL_USERS
+    else:
+        target.setdefault(key, set()).update(user_ids)
+
+
+def mark_seasons_changed(season_ids, summaries=False):
+    """
+    Mark the given seasons as changed once the current transaction commits.
+
+    Pass ``summaries=True`` when attendance values may have changed for the
+    whole season (e.g. an event was deleted or changed its type).
+    """
+    season_ids = {season_id for season_id in season_ids if season_id}
+    if not season_ids:
+        return
+    state = _pending()
+    state.seasons.update(season_ids)
+    if summaries:
+        for season_id in season_ids:
+            _merge_users(state.summaries, season_id, ALL_USERS)
+    transaction.on_commit(_flush)
+
+
+def mark_attendance_changed(event_ids, user_ids=ALL_USERS):
+    """
+    Mark attendance of the given users at the given events as changed.
+
+    Only ``event_id`` is usually at hand for attendance writes; the seasons are
+    resolved with a single query when the changes are flushed.
+    """
+    event_ids = {event_id for event_id in event_ids if event_id}
+    if not event_ids:
+        return
+    if user_ids is not ALL_USERS:
+        user_ids = set(user_ids)
+    state = _pending()
+    for event_id in event_ids:
+        _merge_users(state.events, event_id, user_ids)
+    transaction.on_commit(_flush)
+
+
+def snapshot_marks():
+    """Return a copy of the current thread's pending marks (see ``restore_marks``)."""
+    state = _pending()
+    copy = lambda marks: {key: users if users is ALL_USERS else set(users) for key, users in marks.items()}
+    return set(state.seasons), copy(state.summaries), copy(state.events)
+
+
+def restore_marks(snapshot):
+    """
+    Drop the marks made since ``snapshot_marks`` - for code that rolls back its
+    own transaction (e.g. a dry run), whose marks would otherwise be flushed
+    as spurious changes with the next commit on this thread.
+    """
+    state = _pending()
+    state.seasons, state.summaries, state.events = snapshot
+
+
+def defer_attendance_changed(event_ids, user_ids=ALL_USERS):
+    """
+    Like ``mark_attendance_changed``, but coalesced across requests.
+
+    Once the current transaction commits, the marks join a per-process buffer
+    that is flushed ``DEFERRED_FLUSH_DELAY`` seconds after its first mark, so
+    the season version bump, the summary refresh and the notification happen
+    once per burst instead of once per write.
+    """
+    event_ids = {event_id for event_id in event_ids if event_id}
+    if not event_ids:
+        return
+    if user_ids is not ALL_USERS:
+        user_ids = set(user_ids)
+    transaction.on_commit(partial(_defer, event_ids, user_ids))
+
+
+def _defer(event_ids, user_ids):
+    global _deferred_timer
+    with _deferred_lock:
+        for event_id in event_ids:
+            _merge_users(_deferred_events, event_id, user_ids)
+        if _deferred_timer is None:
+            _deferred_timer = threading.Timer(DEFERRED_FLUSH_DELAY, flush_deferred)
+            _deferred_timer.daemon = True
+            _deferred_timer.start()
+
+
+@atexit.register
+def flush_deferred():
+    """Flush the deferred marks now (run by the timer and at process exit)."""
+    from django.db import connection
+
+    global _deferred_timer
+    with _deferred_lock:
+        if _deferred_timer is not None:
+            _deferred_timer.cancel()
+            _deferred_timer = None
+        events = dict(_deferred_events)
+        _deferred_events.clear()
+    if not events:
+        return
+
+    state = _pending()
+    for event_id, user_ids in events.items():
+        _merge_users(state.events, event_id, user_ids)
+    try:
+        _flush()
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            # The timer thread opened its own connection
+            connection.close()
+
+
+def _flush():
+    """
+    Apply all pending changes.
+
+    Several ``on_commit`` callbacks may be queued for one transaction; the first
+    one drains the pending state and the rest find nothing to do. Marks left
+    behind by a rolled back transaction are flushed with the next commit, which
+    only costs a spurious refresh.
+    """
+    from .cache import invalidate_current_season
+    from .models import Season
+    from api.attendance.models import Event, AttendanceSummary
+    from api.attendance.pubsub import publish_season_change
+
+    state = _pending()
+    season_ids, summaries, events = set(state.seasons), dict(state.summaries), dict(state.events)
+    state.seasons.clear()
+    state.summaries.clear()
+    state.events.clear()
+
+    # Seasons marked directly had their events or roster changed
+    structure_changed = set(season_ids)
+    attendance_changed = set()
+    if events:
+        event_seasons = Event.objects.filter(id__in=events).values_list('id', 'season_id')
+        for event_id, season_id in event_seasons:
+            attendance_changed.add(season_id)
+            _merge_users(summaries, season_id, events[event_id])
+    season_ids |= attendance_changed
+
+    if season_ids:
+        Season.bump_data_version(season_ids)
+    if structure_changed:
+        # Dates or the active flag may have changed
+        invalidate_current_season()
+    for season_id, user_ids in summaries.items():
+        AttendanceSummary.refresh(season_id, user_ids)
+    for season_id in season_ids:
+        publish_season_change(
+            season_id,
+            attendance=season_id in attendance_changed or summaries.get(season_id, set()) is ALL_USERS,
+            season=season_id in structure_changed,
+        )
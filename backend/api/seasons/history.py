@@ -0,0 +1,129 @@
+"""
+Cross-season history of musicians: roster membership, attendance and concerts.
+
+The history of a page of musicians is read with a single query over the
+roster table (``seasons_season_musicians``); per-season attendance comes from
+the materialized attendance summaries and concert participation from
+registrations for concerts dated within the season, both as correlated
+grouped subqueries.
+"""
+from django.db.models import Count, DecimalField, F, IntegerField, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from api.attendance.models import AttendanceSummary
+from api.concerts.models import Concert, ConcertParticipant
+from .models import Season
+
+
+def _grouped(queryset, group_by, value, output_field=None):
+    """A correlated subquery returning one aggregated value (0 when there are no rows)."""
+    output_field = output_field or IntegerField()
+    return Coalesce(
+        Subquery(queryset.order_by().values(group_by).annotate(value=value).values('value')[:1]),
+        0,
+        output_field=output_field,
+    )
+
+
+def history_fingerprint():
+    """
+    Return a string that changes whenever any per-season history input changes.
+
+    Seasons carry ``data_version`` (bumped on attendance and roster writes);
+    concerts are tracked by their count and latest modification, registrations
+    by their count and newest id. Musician identity (names, instrument, active
+    flag) is not part of the cached data, so it is not tracked here.
+    """
+    seasons = Season.objects.aggregate(count=Count('id'), versions=Sum('data_version'), changed=Max('updated_at'))
+    concerts = Concert.objects.aggregate(count=Count('id'), changed=Max('date_modified'))
+    registrations = ConcertParticipant.objects.aggregate(count=Count('id'), newest=Max('id'))
+    stamp = lambda moment: moment.isoformat() if moment else '-'
+    return (
+        f"{seasons['count']}.{seasons['versions'] or 0}.{stamp(seasons['changed'])}:"
+        f"{concerts['count']}.{stamp(concerts['changed'])}.{registrations['count']}.{registrations['newest'] or 0}"
+    )
+
+
+def get_musician_seasons(musician_ids):
+    """
+    Return ``{musician profile id: seasons}`` for the given profiles.
+
+    Every musician gets the seasons they were on the roster of (newest first)
+    with attendance counts, the weighted attendance rate and the number of
+    concerts (not cancelled) they registered for within the season's dates.
+    """
+    summaries = AttendanceSummary.objects.filter(
+        season_id=OuterRef('season_id'), user_id=OuterRef('musicianprofile__user_id')
+    )
+    registrations = ConcertParticipant.objects.filter(
+        musicianprofile_id=OuterRef('musicianprofile_id'),
+        concert__date__gte=OuterRef('season__start_date'),
+        concert__date__lte=OuterRef('season__end_date'),
+    ).exclude(concert__status='cancelled')
+
+    rows = Season.musicians.through.objects.filter(
+        musicianprofile_id__in=musician_ids
+    ).annotate(
+        full=_grouped(summaries, 'user_id', Sum('full_count')),
+        half=_grouped(summaries, 'user_id', Sum('half_count')),
+        absent=_grouped(summaries, 'user_id', Sum('absent_count')),
+        weighted=_grouped(summaries, 'user_id', Sum('weighted_sum'), DecimalField(max_digits=10, decimal_places=1)),
+        concerts=_grouped(registrations, 'musicianprofile_id', Count('id')),
+    ).values(
+        'musicianprofile_id', 'season_id', 'full', 'half', 'absent', 'weighted', 'concerts',
+        name=F('season__name'), start_date=F('season__start_date'), end_date=F('season__end_date'),
+    ).order_by('-season__start_date')
+
+    seasons = {musician_id: [] for musician_id in musician_ids}
+    for row in rows:
+        total = row['full'] + row['half'] + row['absent']
+        seasons[row['musicianprofile_id']].append({
+            'season_id': row['season_id'],
+            'name': row['name'],
+            'start_date': row['start_date'],
+            'end_date': row['end_date'],
+            'events_recorded': total,
+            'full': row['full'],
+            'half': row['half'],
+            'absent': row['absent'],
+            'attendance_rate': round(float(row['weighted']) / total * 100, 2) if total else None,
+            'concerts': row['concerts'],
+        })
+    return seasons
+
+
+def get_musician_history(musicians):
+    """
+    Return the cross-season history of the given musician profiles, in their order.
+
+    The per-season rows are cached per musician under ``history_fingerprint()``
+    and only the missing ones are computed (with a single query); the musician's
+    own fields are always taken from the given profiles.
+    """
+    from .cache import history_cache_key, get_cached_histories, set_cached_histories
+
+    musicians = list(musicians)
+    fingerprint = history_fingerprint()
+    keys = {musician.id: history_cache_key(fingerprint, musician.id) for musician in musicians}
+    cached = get_cached_histories(keys.values())
+    seasons = {musician_id: cached[key] for musician_id, key in keys.items() if key in cached}
+
+    missing = [musician_id for musician_id in keys if musician_id not in seasons]
+    if missing:
+        computed = get_musician_seasons(missing)
+        set_cached_histories({keys[musician_id]: rows for musician_id, rows in computed.items()})
+        seasons.update(computed)
+
+    return [
+        {
+            'musician_profile_id': musician.id,
+            'user_id': musician.user_id,
+            'first_name': musician.user.first_name,
+            'last_name': musician.user.last_name,
+            'instrument': musician.instrument,
+            'active': musician.active,
+            'seasons_count': len(seasons[musician.id]),
+            'seasons': seasons[musician.id],
+        }
+        for musician in musicians
+    ]
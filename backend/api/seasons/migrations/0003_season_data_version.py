@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-19 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seasons', '0002_update_contenttypes_for_event_and_attendance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='season',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text="Bumped whenever the season's events, attendance or roster change"),
+        ),
+    ]
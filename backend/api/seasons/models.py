@@ -3,6 +3,7 @@ Season models for organizing orchestra activities.
 """
 
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 from api.users.models import MusicianProfile
 
@@ -16,6 +17,10 @@ class Season(models.Model):
     end_date = models.DateField(help_text="End date of the season")
     is_active = models.BooleanField(default=False, help_text="Whether this season is currently active")
     musicians = models.ManyToManyField(MusicianProfile, blank=True, related_name='seasons')
+    data_version = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text="Bumped whenever the season's events, attendance or roster change"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -41,35 +46,282 @@ class Season(models.Model):
         
         if self.is_active:
             # Deactivate all other seasons before saving this one as active
-            Season.objects.exclude(pk=self.pk).update(is_active=False)
+            Season.objects.exclude(pk=self.pk).filter(is_active=True).update(
+                is_active=False, data_version=F('data_version') + 1
+            )
+        
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # data_version is only ever changed in SQL - writing back a stale in-memory
+            # value would move it backwards and reuse version numbers already cached
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'data_version'
+            ]
         super().save(*args, **kwargs)
+        
+        from .changes import mark_seasons_changed
+        mark_seasons_changed([self.pk])
+
+    def can_user_view_attendance(self, user):
+        """Check if user can follow this season's attendance: board members and the season's musicians."""
+        if not user or not user.is_authenticated or not user.is_active:
+            return False
+        if user.is_superuser or user.groups.filter(name='board').exists():
+            return True
+        return self.musicians.filter(user=user).exists()
+
+    @classmethod
+    def bump_data_version(cls, season_ids):
+        """Invalidate cached data of the given seasons by bumping their version."""
+        return cls.objects.filter(pk__in=season_ids).update(data_version=F('data_version') + 1)
 
     @classmethod
     def get_current_season(cls):
         """Get the current active season or the most recent one"""
-        today = timezone.now().date()
+        season_id = cls.get_current_season_id()
+        return cls.objects.filter(pk=season_id).first() if season_id else None
+
+    @classmethod
+    def get_current_season_id(cls):
+        """
+        Get the id of the current season, cached per day.
+        
+        The cache entry is dropped whenever seasons change (see
+        ``api.seasons.changes``) and expires after a minute at most.
+        """
+        from .cache import NO_CURRENT_SEASON, get_cached_current_season_id, set_cached_current_season_id
+        
+        season_id = get_cached_current_season_id()
+        if season_id is not None:
+            return season_id if season_id != NO_CURRENT_SEASON else None
+        
+        today = timezone.localdate()
+        active = cls.objects.filter(is_active=True)
+        # Prefer the active season containing today's date, then the most recent active season
+        season_id = (
+            active.filter(start_date__lte=today, end_date__gte=today).values_list('id', flat=True).first()
+            or active.values_list('id', flat=True).first()
+        )
+        set_cached_current_season_id(season_id)
+        return season_id
+
+    def add_musicians(self, musician_ids):
+        """
+        Add active musicians to the roster and seed their absent attendance records.
+        
+        Set-based: one roster insert and one ``bulk_create(ignore_conflicts=True)``
+        of the (new musicians x season events) product, independent of the roster
+        size. Returns ``(added_musician_ids, created_attendances)``.
+        """
+        from django.db import transaction
+        
+        with transaction.atomic():
+            added = list(
+                MusicianProfile.objects.filter(id__in=musician_ids, active=True)
+                .exclude(seasons=self)
+                .values_list('id', 'user_id')
+            )
+            created = self._add_to_roster(added)
+        return [musician_id for musician_id, _ in added], created
+    
+    def remove_musicians(self, musician_ids):
+        """
+        Remove musicians from the roster together with their attendance in this season.
+        
+        One roster delete and one attendance delete (with bulk tombstones),
+        independent of the number of musicians. Returns
+        ``(removed_musician_ids, deleted_attendances)``.
+        """
+        from django.db import transaction
+        
+        with transaction.atomic():
+            removed = list(
+                Season.musicians.through.objects.filter(season_id=self.id, musicianprofile_id__in=musician_ids)
+                .values_list('musicianprofile_id', 'musicianprofile__user_id')
+            )
+            deleted = self._remove_from_roster(removed)
+        return [musician_id for musician_id, _ in removed], deleted
+    
+    def set_roster(self, musician_ids, delete_attendance=True):
+        """
+        Make the roster exactly the musicians of ``musician_ids``.
+        
+        Inactive musicians already on the roster stay when requested; only
+        active ones are added. The current and the requested roster are
+        compared with one query; added musicians get absent attendance seeded
+        and the season attendance of removed ones is deleted, as in
+        ``remove_musicians`` (pass ``delete_attendance=False`` to keep it).
+        Returns the diff.
+        """
+        from django.db import transaction
+        
+        requested = set(musician_ids)
+        with transaction.atomic():
+            rows = MusicianProfile.objects.filter(
+                models.Q(id__in=requested)
+                | models.Q(id__in=Season.musicians.through.objects.filter(season_id=self.id).values('musicianprofile_id'))
+            ).annotate(
+                in_roster=models.Exists(
+                    Season.musicians.through.objects.filter(season_id=self.id, musicianprofile_id=models.OuterRef('pk'))
+                )
+            ).values_list('id', 'user_id', 'active', 'in_roster')
+            
+            added, removed, kept = [], [], 0
+            for musician_id, user_id, active, in_roster in rows:
+                wanted = musician_id in requested and (active or in_roster)
+                if wanted and not in_roster:
+                    added.append((musician_id, user_id))
+                elif in_roster and not wanted:
+                    removed.append((musician_id, user_id))
+                elif in_roster:
+                    kept += 1
+            
+            deleted = self._remove_from_roster(removed, delete_attendance=delete_attendance)
+            created = self._add_to_roster(added)
+        
+        return {
+            'added': [musician_id for musician_id, _ in added],
+            'removed': [musician_id for musician_id, _ in removed],
+            'unchanged': kept,
+            'created_attendances': created,
+            'deleted_attendances': deleted,
+        }
+    
+    def rollover(self, name, start_date, end_date, copy_events=True, event_types=('rehearsal',),
+                 skip_holidays=True, activate=False, created_by=None):
+        """
+        Create the next season from this one.
+        
+        The active musicians of this season form the new roster. With
+        ``copy_events`` the events of the given types are cloned with dates
+        shifted by whole weeks (so weekdays are kept) to the new season; copies
+        falling outside it, on a public holiday or on a date that already got
+        an event of the same type are skipped. Attendance of the new roster is
+        seeded for all copied events. Everything is inserted in bulk in one
+        transaction. Returns a dict with the new season and counts.
+        """
+        from datetime import timedelta
+        from django.db import transaction
+        from api.attendance.models import Event
+        from api.attendance.recurrence import polish_holidays
+        from .changes import mark_seasons_changed
+        
+        weeks = round((start_date - self.start_date).days / 7)
+        shift = timedelta(weeks=weeks)
+        
+        with transaction.atomic():
+            season = Season.objects.create(
+                name=name, start_date=start_date, end_date=end_date, is_active=activate
+            )
+            
+            events, skipped = [], []
+            if copy_events:
+                taken = set()
+                for event in self.events.filter(type__in=event_types).order_by('date', 'created_at'):
+                    day = event.date + shift
+                    reason = None
+                    if not start_date <= day <= end_date:
+                        reason = 'Poza sezonem'
+                    elif skip_holidays and day in polish_holidays(day.year):
+                        reason = polish_holidays(day.year)[day]
+                    elif (day, event.type) in taken:
+                        reason = 'Wydarzenie już istnieje'
+                    if reason:
+                        skipped.append({'date': day, 'name': event.name, 'reason': reason})
+                        continue
+                    taken.add((day, event.type))
+                    events.append(Event(
+                        name=event.name, date=day, type=event.type, season=season,
+                        created_by_id=created_by.id if created_by else event.created_by_id,
+                    ))
+                if events:
+                    # bulk_create skips signals - the season's structure change is marked explicitly
+                    events = Event.objects.bulk_create(events)
+                    mark_seasons_changed([season.id])
+            
+            musicians = list(self.musicians.filter(active=True).values_list('id', 'user_id'))
+            created_attendances = season._add_to_roster(musicians)
+        
+        return {
+            'season': season,
+            'musicians': len(musicians),
+            'events': events,
+            'skipped': skipped,
+            'created_attendances': created_attendances,
+        }
+    
+    def _add_to_roster(self, musicians):
+        """Insert roster rows and absent attendance for ``(musician_id, user_id)`` pairs not in the roster."""
+        from api.attendance.models import Attendance
+        from .changes import mark_seasons_changed, mark_attendance_changed
         
-        # Try to find a season that contains today's date
-        current_season = cls.objects.filter(
-            start_date__lte=today,
-            end_date__gte=today,
-            is_active=True
-        ).first()
+        if not musicians:
+            return 0
+        user_ids = [user_id for _, user_id in musicians]
         
-        if current_season:
-            return current_season
+        # bulk_create skips signals - the changes are marked explicitly
+        Membership = Season.musicians.through
+        Membership.objects.bulk_create(
+            [Membership(season_id=self.id, musicianprofile_id=musician_id) for musician_id, _ in musicians],
+            ignore_conflicts=True,
+        )
+        event_ids = list(self.events.values_list('id', flat=True))
+        existing = Attendance.objects.filter(event_id__in=event_ids, user_id__in=user_ids).count()
+        Attendance.objects.bulk_create(
+            [
+                Attendance(user_id=user_id, event_id=event_id, present=0.0)
+                for user_id in user_ids
+                for event_id in event_ids
+            ],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        mark_seasons_changed([self.id])
+        mark_attendance_changed(event_ids, user_ids)
+        return len(user_ids) * len(event_ids) - existing
+    
+    def _remove_from_roster(self, musicians, delete_attendance=True):
+        """Delete roster rows (and, by default, season attendance) of ``(musician_id, user_id)`` pairs."""
+        from api.attendance.models import Attendance
+        from .changes import mark_seasons_changed
         
-        # If no season contains today, return the most recent active season
-        return cls.objects.filter(is_active=True).first()
+        if not musicians:
+            return 0
+        deleted = 0
+        if delete_attendance:
+            deleted = Attendance.delete_with_tombstones(
+                Attendance.objects.filter(event__season=self, user_id__in=[user_id for _, user_id in musicians])
+            )
+        Season.musicians.through.objects.filter(
+            season_id=self.id, musicianprofile_id__in=[musician_id for musician_id, _ in musicians]
+        ).delete()
+        mark_seasons_changed([self.id])
+        return deleted
+    
+    @classmethod
+    def with_counts(cls, queryset=None):
+        """Annotate ``events_total`` and ``musicians_total`` used by the count properties."""
+        queryset = cls.objects.all() if queryset is None else queryset
+        if not queryset.query.order_by:
+            # Meta.ordering is not applied to aggregated querysets
+            queryset = queryset.order_by(*cls._meta.ordering)
+        return queryset.annotate(
+            events_total=models.Count('events', distinct=True),
+            musicians_total=models.Count('musicians', distinct=True),
+        )
 
     @property
     def events_count(self):
         """Return the number of events in this season."""
+        if hasattr(self, 'events_total'):
+            return self.events_total
         return self.events.count()
 
     @property
     def musicians_count(self):
         """Return the number of musicians in this season."""
+        if hasattr(self, 'musicians_total'):
+            return self.musicians_total
         return self.musicians.count()
 
     def get_musicians_by_section(self):
@@ -101,10 +353,9 @@ class Season(models.Model):
 
     def get_attendance_stats(self):
         """Get attendance statistics for this season"""
-        from api.attendance.models import Attendance
+        from django.db.models import Sum
         
-        events = self.events.all()
-        total_events = events.count()
+        total_events = self.events_count
         
         if total_events == 0:
             return {
@@ -114,12 +365,14 @@ class Season(models.Model):
                 'attendance_rate': 0
             }
         
-        total_attendances = Attendance.objects.filter(event__season=self).count()
+        # Read the materialized per-musician summaries instead of raw attendance rows
+        totals = self.attendance_summaries.aggregate(
+            total_attendances=Sum(F('full_count') + F('half_count') + F('absent_count')),
+            total_attendance_value=Sum('weighted_sum'),
+        )
+        total_attendances = totals['total_attendances'] or 0
         # Calculate effective attendance rate (0.5 counts as 50%, 1.0 as 100%)
-        from django.db.models import Sum
-        total_attendance_value = Attendance.objects.filter(
-            event__season=self
-        ).aggregate(total=Sum('present'))['total'] or 0
+        total_attendance_value = totals['total_attendance_value'] or 0
         
         attendance_rate = (total_attendance_value / total_attendances * 100) if total_attendances > 0 else 0
         
@@ -128,3 +381,99 @@ class Season(models.Model):
             'total_attendances': total_attendances,
             'attendance_rate': round(attendance_rate, 2)
         }
+
+    def get_musician_attendance_stats(self, event_types=None):
+        """
+        Get per-musician attendance statistics ranked by weighted attendance rate.
+        
+        Reads the materialized attendance summaries with a single grouped query.
+        """
+        from django.db.models import Sum
+        
+        summaries = self.attendance_summaries.all()
+        if event_types:
+            summaries = summaries.filter(event_type__in=event_types)
+        
+        rows = summaries.values(
+            'user_id', 'user__first_name', 'user__last_name', 'user__musicianprofile__instrument'
+        ).annotate(
+            full=Sum('full_count'),
+            half=Sum('half_count'),
+            absent=Sum('absent_count'),
+            weighted=Sum('weighted_sum'),
+        )
+        
+        stats = []
+        for row in rows:
+            total = row['full'] + row['half'] + row['absent']
+            stats.append({
+                'user_id': row['user_id'],
+                'first_name': row['user__first_name'],
+                'last_name': row['user__last_name'],
+                'instrument': row['user__musicianprofile__instrument'],
+                'total': total,
+                'full': row['full'],
+                'half': row['half'],
+                'absent': row['absent'],
+                'attendance_rate': round(float(row['weighted']) / total * 100, 2) if total else 0,
+            })
+        
+        stats.sort(key=lambda item: (-item['attendance_rate'], item['last_name'], item['first_name']))
+        return stats
+
+    def get_section_attendance_stats(self, event_types=None):
+        """
+        Get attendance rates per instrument section, per event and for the whole season.
+        
+        Attendance of the season's active musicians is aggregated by event and
+        instrument in a single grouped query; season totals are summed from the
+        resulting (sections x events) rows. Returns a compact table for charts:
+        `events` are the columns and every section's `event_rates` follow their order.
+        """
+        from django.db.models import Count, Sum
+        from api.attendance.models import Attendance
+        from api.users.models import INSTRUMENT_CHOICES
+        
+        events = self.events.order_by('date', 'created_at')
+        if event_types:
+            events = events.filter(type__in=event_types)
+        events = list(events.values('id', 'name', 'date', 'type'))
+        event_positions = {event['id']: position for position, event in enumerate(events)}
+        
+        section_sizes = dict(
+            self.musicians.filter(active=True).values_list('instrument').annotate(count=Count('id'))
+        )
+        
+        rows = Attendance.objects.filter(
+            event_id__in=event_positions,
+            user__musicianprofile__seasons=self,
+            user__musicianprofile__active=True,
+        ).values('event_id', section=F('user__musicianprofile__instrument')).annotate(
+            records=Count('id'),
+            value=Sum('present'),
+        )
+        
+        totals = {}  # instrument -> ([value per event], [records per event])
+        for row in rows:
+            values, records = totals.setdefault(row['section'], ([0.0] * len(events), [0] * len(events)))
+            position = event_positions[row['event_id']]
+            values[position] = float(row['value'] or 0)
+            records[position] = row['records']
+        
+        def rate(value, records):
+            return round(value / records * 100, 2) if records else None
+        
+        sections = []
+        for instrument, name in INSTRUMENT_CHOICES:
+            if instrument not in section_sizes:
+                continue
+            values, records = totals.get(instrument, ([0.0] * len(events), [0] * len(events)))
+            sections.append({
+                'instrument': instrument,
+                'name': name,
+                'musicians': section_sizes[instrument],
+                'season_rate': rate(sum(values), sum(records)),
+                'event_rates': [rate(value, count) for value, count in zip(values, records)],
+            })
+        
+        return {'events': events, 'sections': sections}
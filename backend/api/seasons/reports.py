@@ -0,0 +1,87 @@
+"""
+End-of-season report: roster, attendance per musician and section, concerts
+and forum activity, rendered to HTML (or PDF when WeasyPrint is installed).
+
+Rendering runs as a background report job in a worker process (see
+``api.reports.workers``); the data is read with a handful of grouped queries.
+"""
+import importlib.util
+
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+REPORT_FORMATS = ('html', 'pdf')
+TOP_FORUM_USERS = 10
+
+
+def pdf_available():
+    """PDF rendering needs the optional WeasyPrint package (and its system libraries)."""
+    return importlib.util.find_spec('weasyprint') is not None
+
+
+def get_forum_activity(start_date, end_date, limit=TOP_FORUM_USERS):
+    """Return the most active forum users (posts and comments) between the dates."""
+    from django.contrib.auth.models import User
+    from api.forum.models import Comment, Post
+
+    period = {'created_at__date__gte': start_date, 'created_at__date__lte': end_date}
+    activity = {}
+    for model, field in ((Post, 'posts'), (Comment, 'comments')):
+        counts = model.objects.filter(**period).values('author_id').annotate(count=Count('id')).order_by()
+        for row in counts:
+            activity.setdefault(row['author_id'], {'posts': 0, 'comments': 0})[field] = row['count']
+
+    top = sorted(activity.items(), key=lambda item: -(item[1]['posts'] + item[1]['comments']))[:limit]
+    users = User.objects.in_bulk([user_id for user_id, _ in top])
+    return [
+        {
+            'name': users[user_id].get_full_name() or users[user_id].username,
+            'posts': counts['posts'],
+            'comments': counts['comments'],
+            'total': counts['posts'] + counts['comments'],
+        }
+        for user_id, counts in top
+        if user_id in users
+    ]
+
+
+def build_season_report(season):
+    """Collect the data shown in the season report."""
+    from api.concerts.models import Concert
+
+    concerts = (
+        Concert.objects.filter(date__gte=season.start_date, date__lte=season.end_date)
+        .annotate(participants_total=Count('participants'))
+        .order_by('date')
+    )
+    return {
+        'season': season,
+        'generated_at': timezone.now(),
+        'attendance': season.get_attendance_stats(),
+        'roster': season.get_musicians_by_section(),
+        'musicians': season.get_musician_attendance_stats(),
+        'sections': season.get_section_attendance_stats()['sections'],
+        'concerts': concerts,
+        'forum_activity': get_forum_activity(season.start_date, season.end_date),
+    }
+
+
+def write_season_report(job, output):
+    """
+    Report job handler: render the report of ``job.params['season_id']`` as
+    HTML or, with ``job.params['format'] == 'pdf'``, as PDF.
+    """
+    from api.seasons.models import Season
+
+    season = Season.objects.get(pk=job.params['season_id'])
+    html = render_to_string('reports/season_report.html', build_season_report(season))
+    filename = f"raport_sezonu_{season.name.replace('/', '-')}"
+
+    if job.params.get('format') == 'pdf':
+        from weasyprint import HTML
+        HTML(string=html).write_pdf(output)
+        return f'{filename}.pdf'
+
+    output.write(html.encode('utf-8'))
+    return f'{filename}.html'
@@ -2,13 +2,28 @@
 Season-related serializers for the API.
 """
 from rest_framework import serializers
+from django.db import transaction
 from django.utils import timezone
 from .models import Season
-from api.users.models import MusicianProfile
+from api.attendance.models import Event
 from api.users.serializers import MusicianProfileDetailSerializer
 
 
-class SeasonListSerializer(serializers.ModelSerializer):
+class CurrentSeasonMixin:
+    """
+    Provides `is_current`. The current season id is resolved once per request:
+    views pass it as `current_season_id` in the serializer context, otherwise
+    it is looked up (cached) on first use and kept in the context.
+    """
+    
+    def get_is_current(self, obj):
+        """Check if this is the current season."""
+        if 'current_season_id' not in self.context:
+            self.context['current_season_id'] = Season.get_current_season_id()
+        return self.context['current_season_id'] == obj.id
+
+
+class SeasonListSerializer(CurrentSeasonMixin, serializers.ModelSerializer):
     """Serializer for season list view."""
     events_count = serializers.ReadOnlyField()
     musicians_count = serializers.ReadOnlyField()
@@ -21,15 +36,15 @@ class SeasonListSerializer(serializers.ModelSerializer):
             'events_count', 'musicians_count', 'is_current', 'created_at'
         ]
         read_only_fields = ['id', 'created_at', 'events_count', 'musicians_count', 'is_current']
-    
-    def get_is_current(self, obj):
-        """Check if this is the current season."""
-        current_season = Season.get_current_season()
-        return current_season and current_season.id == obj.id
 
 
-class SeasonDetailSerializer(serializers.ModelSerializer):
-    """Serializer for season detail view."""
+class SeasonDetailSerializer(CurrentSeasonMixin, serializers.ModelSerializer):
+    """
+    Serializer for season detail view.
+    
+    The musician list is only included when `musicians` is in the `expand`
+    context entry (`?expand=musicians`); `musicians_count` is always present.
+    """
     events_count = serializers.ReadOnlyField()
     musicians_count = serializers.ReadOnlyField()
     is_current = serializers.SerializerMethodField()
@@ -45,10 +60,11 @@ class SeasonDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'events_count', 'musicians_count', 'is_current', 'attendance_stats']
     
-    def get_is_current(self, obj):
-        """Check if this is the current season."""
-        current_season = Season.get_current_season()
-        return current_season and current_season.id == obj.id
+    def get_fields(self):
+        fields = super().get_fields()
+        if 'musicians' not in self.context.get('expand', ()):
+            fields.pop('musicians')
+        return fields
     
     def get_attendance_stats(self, obj):
         """Get attendance statistics for this season."""
@@ -63,11 +79,17 @@ class SeasonCreateUpdateSerializer(serializers.ModelSerializer):
         required=False,
         help_text="List of musician profile IDs to assign to this season"
     )
+    delete_attendance = serializers.BooleanField(
+        write_only=True,
+        required=False,
+        default=True,
+        help_text="Delete season attendance of musicians removed from the roster (false keeps it)"
+    )
     
     class Meta:
         model = Season
         fields = [
-            'name', 'start_date', 'end_date', 'is_active', 'musician_ids'
+            'name', 'start_date', 'end_date', 'is_active', 'musician_ids', 'delete_attendance'
         ]
     
     def validate_start_date(self, value):
@@ -94,30 +116,96 @@ class SeasonCreateUpdateSerializer(serializers.ModelSerializer):
         
         return attrs
     
+    @transaction.atomic
     def create(self, validated_data):
         """Create season with musicians."""
         musician_ids = validated_data.pop('musician_ids', [])
+        validated_data.pop('delete_attendance', None)
         season = Season.objects.create(**validated_data)
         
         if musician_ids:
-            musicians = MusicianProfile.objects.filter(id__in=musician_ids, active=True)
-            season.musicians.set(musicians)
+            season.add_musicians(musician_ids)
         
         return season
     
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Update season with musicians."""
+        """
+        Update season with musicians.
+        
+        A given `musician_ids` replaces the roster: attendance records of added
+        musicians are created and those of removed musicians deleted (unless
+        `delete_attendance` is false). The applied diff is available as `roster_diff` afterwards.
+        """
         musician_ids = validated_data.pop('musician_ids', None)
+        delete_attendance = validated_data.pop('delete_attendance', True)
         
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
         
+        self.roster_diff = None
         if musician_ids is not None:
-            musicians = MusicianProfile.objects.filter(id__in=musician_ids, active=True)
-            instance.musicians.set(musicians)
+            self.roster_diff = instance.set_roster(musician_ids, delete_attendance=delete_attendance)
         
         return instance
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if getattr(self, 'roster_diff', None) is not None:
+            data['roster_diff'] = self.roster_diff
+        return data
+
+
+class SeasonRolloverSerializer(serializers.Serializer):
+    """
+    Serializer for creating the next season from an existing one.
+    
+    Expects the source season as `season` in the context. The name and dates
+    default to the source season moved by one year (e.g. 2025/2026 -> 2026/2027).
+    """
+    name = serializers.CharField(max_length=20, required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    copy_events = serializers.BooleanField(default=True, help_text="Clone the events of the source season")
+    event_types = serializers.ListField(
+        child=serializers.ChoiceField(choices=Event.EVENT_TYPES),
+        default=lambda: ['rehearsal'],
+        help_text="Types of events to clone"
+    )
+    skip_holidays = serializers.BooleanField(default=True, help_text="Skip public holidays in Poland")
+    activate = serializers.BooleanField(default=False, help_text="Make the new season the active one")
+    
+    @staticmethod
+    def _next_year(day):
+        try:
+            return day.replace(year=day.year + 1)
+        except ValueError:  # 29 February
+            return day.replace(year=day.year + 1, day=28)
+    
+    def validate(self, attrs):
+        """Default the name and dates and check them."""
+        import re
+        
+        source = self.context['season']
+        attrs.setdefault('start_date', self._next_year(source.start_date))
+        attrs.setdefault('end_date', self._next_year(source.end_date))
+        if 'name' not in attrs:
+            years = re.fullmatch(r'(\d{4})/(\d{4})', source.name)
+            if not years:
+                raise serializers.ValidationError({'name': 'Podaj nazwę nowego sezonu.'})
+            attrs['name'] = f'{int(years[1]) + 1}/{int(years[2]) + 1}'
+        
+        if attrs['start_date'] >= attrs['end_date']:
+            raise serializers.ValidationError("Data rozpoczęcia musi być wcześniejsza niż data zakończenia.")
+        if attrs['start_date'] <= source.start_date:
+            raise serializers.ValidationError("Nowy sezon musi zaczynać się po sezonie źródłowym.")
+        if Season.objects.filter(name=attrs['name']).exists():
+            raise serializers.ValidationError({'name': f'Sezon "{attrs["name"]}" już istnieje.'})
+        return attrs
+    
+    def create(self, validated_data):
+        return self.context['season'].rollover(**validated_data)
 
 
 class SeasonAttendanceGridSerializer(serializers.Serializer):
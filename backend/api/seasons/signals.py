@@ -0,0 +1,48 @@
+"""
+Django signals keeping cached season data in sync with roster changes.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from api.users.models import MusicianProfile
+from .cache import invalidate_current_season
+from .changes import mark_seasons_changed
+from .models import Season
+
+
+@receiver(m2m_changed, sender=Season.musicians.through)
+def season_roster_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Mark seasons whose roster was modified as changed."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            mark_seasons_changed([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        # Seasons were added to / removed from a musician profile
+        mark_seasons_changed(pk_set or [])
+    elif action == 'pre_clear':
+        mark_seasons_changed(instance.seasons.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Season)
+def season_deleted(sender, instance, **kwargs):
+    """A deleted season may have been the current one."""
+    transaction.on_commit(invalidate_current_season)
+
+
+@receiver(post_save, sender=MusicianProfile)
+def musician_profile_changed(sender, instance, created, **kwargs):
+    """Instrument and photo are shown on season grids."""
+    if not created:
+        mark_seasons_changed(instance.seasons.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Names and e-mails are shown on season grids."""
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    mark_seasons_changed(
+        Season.objects.filter(musicians__user=instance).values_list('id', flat=True)
+    )
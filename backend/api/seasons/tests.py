@@ -0,0 +1,123 @@
+"""
+Tests of the season roster endpoints and the season detail serializer.
+
+The query counts must not depend on the number of musicians or events.
+"""
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.attendance.models import Event, Attendance
+from api.users.models import MusicianProfile
+from .models import Season
+
+
+def create_musicians(count, prefix='muzyk'):
+    musicians = []
+    for i in range(count):
+        user = User.objects.create(username=f'{prefix}{i}', email=f'{prefix}{i}@oragh.com')
+        musicians.append(MusicianProfile.objects.create(user=user, instrument='flet'))
+    return musicians
+
+
+class SeasonRosterTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@oragh.com', 'haslo')
+        cls.season = Season.objects.create(
+            name='2025/2026', start_date=datetime.date(2025, 9, 1), end_date=datetime.date(2026, 6, 30)
+        )
+        for day in range(6):
+            Event.objects.create(
+                name=f'Próba {day}', date=datetime.date(2025, 10, 1 + day), type='rehearsal', season=cls.season
+            )
+        cls.musicians = create_musicians(30)
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def post_musicians(self, action, musicians):
+        return self.client.post(
+            reverse(f'season-{action}', args=[self.season.pk]),
+            {'musician_ids': [musician.pk for musician in musicians]},
+            format='json',
+        )
+
+    def test_add_and_remove_musicians_run_constant_queries(self):
+        for count in (1, 20):
+            with self.subTest(musicians=count):
+                musicians = self.musicians[:count]
+
+                with self.assertNumQueries(10):
+                    response = self.post_musicians('add-musicians', musicians)
+                self.assertEqual(response.data['added_count'], count)
+                self.assertEqual(response.data['created_attendances'], count * 6)
+                self.assertEqual(Attendance.objects.filter(event__season=self.season).count(), count * 6)
+
+                with self.assertNumQueries(9):
+                    response = self.post_musicians('remove-musicians', musicians)
+                self.assertEqual(response.data['removed_count'], count)
+                self.assertEqual(response.data['deleted_attendances'], count * 6)
+                self.assertFalse(Attendance.objects.filter(event__season=self.season).exists())
+
+    def test_add_musicians_skips_roster_and_keeps_attendance(self):
+        self.post_musicians('add-musicians', self.musicians[:2])
+        Attendance.objects.filter(user=self.musicians[0].user).update(present=1)
+
+        response = self.post_musicians('add-musicians', self.musicians[:3])
+
+        self.assertEqual(response.data['added_count'], 1)
+        self.assertEqual(response.data['created_attendances'], 6)
+        self.assertEqual(response.data['total_musicians'], 3)
+        self.assertEqual(Attendance.objects.filter(user=self.musicians[0].user, present=1).count(), 6)
+
+
+class SeasonDetailTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@oragh.com', 'haslo')
+        cls.season = Season.objects.create(
+            name='2025/2026', start_date=datetime.date(2025, 9, 1), end_date=datetime.date(2026, 6, 30),
+            is_active=True,
+        )
+        cls.musicians = create_musicians(30)
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+        cache.clear()
+
+    def get_current(self, query=''):
+        return self.client.get(reverse('season-current') + query)
+
+    def test_current_season_omits_musicians_by_default(self):
+        for count in (1, 20):
+            with self.subTest(musicians=count):
+                self.season.musicians.set(self.musicians[:count])
+                cache.clear()
+
+                with self.assertNumQueries(3):
+                    response = self.get_current()
+                self.assertEqual(response.data['musicians_count'], count)
+                self.assertNotIn('musicians', response.data)
+
+    def test_current_season_expands_musicians_with_constant_queries(self):
+        for count in (1, 20):
+            with self.subTest(musicians=count):
+                self.season.musicians.set(self.musicians[:count])
+                cache.clear()
+
+                with self.assertNumQueries(4):
+                    response = self.get_current('?expand=musicians')
+                self.assertEqual(len(response.data['musicians']), count)
+                self.assertEqual(response.data['musicians'][0]['user']['username'][:5], 'muzyk')
+
+    def test_current_season_id_is_cached(self):
+        self.get_current()
+
+        with self.assertNumQueries(1):
+            self.get_current()
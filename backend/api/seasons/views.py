@@ -2,7 +2,9 @@
 Season-related API views.
 """
 from django.shortcuts import get_object_or_404
-from rest_framework import viewsets, status
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
@@ -10,9 +12,10 @@ from rest_framework.pagination import PageNumberPagination
 from .models import Season
 from .serializers import (
     SeasonListSerializer, SeasonDetailSerializer, SeasonCreateUpdateSerializer,
-    SeasonAttendanceGridSerializer
+    SeasonAttendanceGridSerializer, SeasonRolloverSerializer
 )
-from .permissions import IsBoardMemberOrReadOnly
+from .permissions import IsBoardMemberOrReadOnly, IsBoardMember
+from .cache import grid_cache_key, get_cached_grid, set_cached_grid, get_cached_analytics, set_cached_analytics
 from api.users.models import MusicianProfile, INSTRUMENT_CHOICES
 
 
@@ -36,9 +39,22 @@ class SeasonViewSet(viewsets.ModelViewSet):
             return SeasonCreateUpdateSerializer
         return SeasonDetailSerializer
     
+    def get_serializer_context(self):
+        """Resolve the current season once per request for `is_current` and parse `?expand=`."""
+        context = super().get_serializer_context()
+        context['current_season_id'] = Season.get_current_season_id()
+        context['expand'] = set(self.request.query_params.get('expand', '').split(','))
+        return context
+    
     def get_queryset(self):
         """Filter seasons based on query parameters."""
         queryset = Season.objects.all()
+        if self.action in ('list', 'retrieve', 'current'):
+            queryset = Season.with_counts(queryset)
+        if 'musicians' in self.request.query_params.get('expand', '').split(','):
+            queryset = queryset.prefetch_related(
+                Prefetch('musicians', queryset=MusicianProfile.objects.select_related('user'))
+            )
         
         # Filter by active status
         is_active = self.request.query_params.get('active')
@@ -55,12 +71,55 @@ class SeasonViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def current(self, request):
         """Get the current active season."""
-        current_season = Season.get_current_season()
+        context = self.get_serializer_context()
+        current_season = self.get_queryset().filter(pk=context['current_season_id']).first()
         if current_season:
-            serializer = SeasonDetailSerializer(current_season, context={'request': request})
+            serializer = SeasonDetailSerializer(current_season, context=context)
             return Response(serializer.data)
         return Response({'detail': 'Brak aktywnego sezonu.'}, status=status.HTTP_404_NOT_FOUND)
     
+    @action(detail=False, methods=['get'], permission_classes=[IsBoardMember])
+    def export(self, request):
+        """
+        Export attendance matrices of one or more seasons.
+        
+        `?seasons=1,2` selects the seasons; `?export_format=csv` (default) streams
+        a CSV file, `?export_format=xlsx` starts a background job and returns it
+        with status 202 - poll /api/reports/jobs/<id>/ for the file.
+        """
+        from api.attendance.exports import iter_attendance_csv
+        from api.reports.models import ReportJob
+        from api.reports.serializers import ReportJobSerializer
+        from api.reports.workers import enqueue
+        
+        try:
+            season_ids = [int(value) for value in request.query_params.get('seasons', '').split(',') if value]
+        except ValueError:
+            return Response({'detail': 'Nieprawidłowe ID sezonów.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        seasons = Season.objects.filter(id__in=season_ids).order_by('start_date')
+        if not season_ids or len(seasons) != len(set(season_ids)):
+            return Response({'detail': 'Nie znaleziono podanych sezonów.'}, status=status.HTTP_404_NOT_FOUND)
+        
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format == 'csv':
+            filename = 'obecnosci_' + '_'.join(season.name.replace('/', '-') for season in seasons) + '.csv'
+            response = StreamingHttpResponse(iter_attendance_csv(seasons), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+        
+        if export_format == 'xlsx':
+            job = ReportJob.objects.create(
+                kind=ReportJob.KIND_ATTENDANCE_XLSX,
+                params={'season_ids': [season.id for season in seasons]},
+                created_by=request.user,
+            )
+            enqueue(job)
+            serializer = ReportJobSerializer(job, context={'request': request})
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+        
+        return Response({'detail': 'Nieobsługiwany format eksportu.'}, status=status.HTTP_400_BAD_REQUEST)
+    
     @action(detail=True, methods=['post'], permission_classes=[IsBoardMemberOrReadOnly])
     def set_current(self, request, pk=None):
         """Set this season as the current active season."""
@@ -74,6 +133,65 @@ class SeasonViewSet(viewsets.ModelViewSet):
             'season': serializer.data
         }, status=status.HTTP_200_OK)
     
+    @action(detail=True, methods=['post'], permission_classes=[IsBoardMember])
+    def report(self, request, pk=None):
+        """
+        Generate the end-of-season report in the background.
+        
+        `export_format` is `html` (default) or `pdf`. Returns the job with status
+        202 - poll /api/reports/jobs/<id>/ for the file.
+        """
+        from api.reports.models import ReportJob
+        from api.reports.serializers import ReportJobSerializer
+        from api.reports.workers import enqueue
+        from .reports import REPORT_FORMATS, pdf_available
+        
+        season = self.get_object()
+        export_format = request.data.get('export_format', 'html')
+        if export_format not in REPORT_FORMATS:
+            return Response({'detail': 'Nieobsługiwany format raportu.'}, status=status.HTTP_400_BAD_REQUEST)
+        if export_format == 'pdf' and not pdf_available():
+            return Response(
+                {'detail': 'Generowanie PDF nie jest dostępne na tym serwerze.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        job = ReportJob.objects.create(
+            kind=ReportJob.KIND_SEASON_REPORT,
+            params={'season_id': season.id, 'format': export_format},
+            created_by=request.user,
+        )
+        enqueue(job)
+        serializer = ReportJobSerializer(job, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsBoardMember])
+    def rollover(self, request, pk=None):
+        """
+        Start the next season from this one.
+        
+        Copies the active roster, clones the rehearsals (or `event_types`) with
+        dates shifted by whole weeks and seeds attendance, all in bulk in one
+        transaction. Name and dates default to this season moved by one year.
+        """
+        from api.attendance.serializers import EventBriefSerializer
+        
+        season = self.get_object()
+        serializer = SeasonRolloverSerializer(data=request.data, context={'season': season})
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save(created_by=request.user)
+        new_season = result['season']
+        
+        return Response({
+            'detail': f'Utworzono sezon "{new_season.name}" na podstawie sezonu "{season.name}".',
+            'season': SeasonListSerializer(new_season, context=self.get_serializer_context()).data,
+            'musicians_count': result['musicians'],
+            'events_created': len(result['events']),
+            'events': EventBriefSerializer(result['events'], many=True).data,
+            'skipped': result['skipped'],
+            'created_attendances': result['created_attendances'],
+        }, status=status.HTTP_201_CREATED)
+    
     @action(detail=True, methods=['get'])
     def musicians(self, request, pk=None):
         """Get musicians in this season grouped by sections."""
@@ -106,26 +224,113 @@ class SeasonViewSet(viewsets.ModelViewSet):
         serializer = EventListSerializer(events, many=True, context={'request': request})
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def musician_stats(self, request, pk=None):
+        """Get per-musician attendance statistics, ranked by attendance rate."""
+        season = self.get_object()
+        
+        # Comma-separated event types, e.g. ?event_type=rehearsal,soundcheck
+        event_type = request.query_params.get('event_type')
+        event_types = [value for value in event_type.split(',') if value] if event_type and event_type != 'all' else None
+        
+        return Response({
+            'season_id': season.id,
+            'event_types': event_types,
+            'musicians': season.get_musician_attendance_stats(event_types)
+        })
+    
+    @action(detail=False, methods=['get'])
+    def musician_history(self, request):
+        """
+        Get musicians' history across seasons: per-season attendance and concerts.
+        
+        `?musician=<profile id>` limits the result to one musician; otherwise all
+        musicians that were ever on a roster are listed, paginated. The per-season
+        rows are cached until seasons, attendance or concert registrations change.
+        """
+        from .history import get_musician_history
+        
+        musician_id = request.query_params.get('musician')
+        musicians = MusicianProfile.objects.filter(
+            id__in=Season.musicians.through.objects.values('musicianprofile_id')
+        ).select_related('user').order_by('user__last_name', 'user__first_name', 'id')
+        if musician_id:
+            try:
+                musicians = musicians.filter(id=int(musician_id))
+            except ValueError:
+                return Response({'detail': 'Nieprawidłowe ID muzyka.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        page = self.paginate_queryset(musicians)
+        return self.get_paginated_response(get_musician_history(page))
+    
+    @action(detail=True, methods=['get'])
+    def section_stats(self, request, pk=None):
+        """Get attendance rates per instrument section, per event and for the season."""
+        season = self.get_object()
+        
+        # Comma-separated event types, e.g. ?event_type=rehearsal,soundcheck
+        event_type = request.query_params.get('event_type')
+        event_types = [value for value in event_type.split(',') if value] if event_type and event_type != 'all' else None
+        
+        return Response({
+            'season_id': season.id,
+            'event_types': event_types,
+            **season.get_section_attendance_stats(event_types)
+        })
+    
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """
+        Get attendance analytics of this season: per-musician, per-type and weighted
+        rates, longest absence streaks, section rates, event turnout and the
+        rehearsal/concert attendance correlation.
+        """
+        from .analytics import compute_season_analytics
+        
+        season = self.get_object()
+        data = get_cached_analytics(season)
+        if data is None:
+            data = compute_season_analytics(season)
+            set_cached_analytics(season, data)
+        return Response(data)
+    
     @action(detail=True, methods=['get'])
     def attendance_grid(self, request, pk=None):
         """Get attendance grid for this season."""
-        from api.attendance.models import Event, Attendance
+        season = self.get_object()
+        
+        event_type = request.query_params.get('event_type')
+        if event_type == 'all':
+            event_type = None
+        
+        month = request.query_params.get('month')
+        try:
+            month = int(month) if month else None
+        except ValueError:
+            month = None
+        
+        # Cached per (season version, attendance fingerprint, event type, month)
+        cache_key = grid_cache_key(season, event_type, month)
+        response_data = get_cached_grid(cache_key)
+        if response_data is None:
+            response_data = self._build_attendance_grid(season, event_type, month)
+            set_cached_grid(cache_key, response_data)
+        
+        return Response(response_data)
+    
+    def _build_attendance_grid(self, season, event_type=None, month=None):
+        """Build the sectioned attendance grid for the given event filters."""
+        from api.attendance.models import Attendance
         from api.attendance.serializers import EventListSerializer
         
-        season = self.get_object()
+        request = self.request
         
         # Get events filtered by query parameters
         events = season.events.all()
-        event_type = request.query_params.get('event_type')
-        if event_type and event_type != 'all':
+        if event_type:
             events = events.filter(type=event_type)
-        
-        month = request.query_params.get('month')
         if month:
-            try:
-                events = events.filter(date__month=int(month))
-            except ValueError:
-                pass
+            events = events.filter(date__month=month)
         
         # Get musicians in this season
         musicians = season.musicians.select_related('user').filter(active=True)
@@ -192,96 +397,148 @@ class SeasonViewSet(viewsets.ModelViewSet):
             
             sectioned_attendance_grid.append(section_data)
         
-        response_data = {
+        return {
             'season': SeasonListSerializer(season, context={'request': request}).data,
             'events': EventListSerializer(events, many=True, context={'request': request}).data,
             'attendance_grid': sectioned_attendance_grid
         }
+
+    @action(detail=True, methods=['get'])
+    def attendance_changes(self, request, pk=None):
+        """
+        Get attendance rows changed since the last sync, plus tombstones of deleted rows.
         
-        return Response(response_data)
+        Pass the `sync_token` of the previous response as `?since=`; without it
+        a full snapshot is returned.
+        """
+        from api.attendance.sync import get_attendance_delta, parse_sync_token, InvalidSyncToken
+        
+        season = self.get_object()
+        try:
+            since = parse_sync_token(request.query_params.get('since'))
+        except InvalidSyncToken:
+            return Response({'detail': 'Nieprawidłowy token synchronizacji.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(get_attendance_delta(season, since))
+    
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def stream_ticket(self, request, pk=None):
+        """
+        Issue a short-lived ticket for the season's live attendance stream.
+        
+        `EventSource` cannot send the JWT in a header, so the stream is opened
+        with `?ticket=` instead; the ticket is only valid for this user and season.
+        """
+        from django.urls import reverse
+        from api.attendance.streams import make_stream_ticket, STREAM_TICKET_MAX_AGE
+        
+        season = self.get_object()
+        if not season.can_user_view_attendance(request.user):
+            return Response({'detail': 'Brak dostępu do obecności w tym sezonie.'}, status=status.HTTP_403_FORBIDDEN)
+        
+        return Response({
+            'ticket': make_stream_ticket(request.user, season),
+            'expires_in': STREAM_TICKET_MAX_AGE,
+            'stream_url': reverse('season-attendance-stream', kwargs={'season_id': season.pk}),
+        })
+
+    @action(detail=True, methods=['post'], permission_classes=[IsBoardMember])
+    def attendance_sync(self, request, pk=None):
+        """
+        Reconcile a batch of offline attendance changes in one round trip.
+        
+        Each change names the `base_version` of the row it was made on. Changes
+        made on the current version are applied; the others are returned as
+        `conflicts` with the server row. The response also carries the delta
+        since `since` (as in `attendance_changes`), including applied rows.
+        """
+        from api.attendance.serializers import AttendanceSyncSerializer
+        from api.attendance.sync import (
+            apply_attendance_changes, get_attendance_delta, parse_sync_token, InvalidSyncToken
+        )
+        
+        season = self.get_object()
+        serializer = AttendanceSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            since = parse_sync_token(serializer.validated_data.get('since'))
+        except InvalidSyncToken:
+            return Response({'detail': 'Nieprawidłowy token synchronizacji.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        applied, conflicts, errors = apply_attendance_changes(
+            season, serializer.validated_data.get('changes', []), marked_by=request.user
+        )
+        return Response({
+            'applied': applied,
+            'conflicts': conflicts,
+            'errors': errors,
+            **get_attendance_delta(season, since),
+        })
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsBoardMember])
+    def import_attendance(self, request, pk=None):
+        """
+        Import attendance of this season from an uploaded CSV file (`file`).
+
+        With `dry_run=true` nothing is written and the response only reports
+        what would change. Invalid rows abort the whole import.
+        """
+        from api.attendance.imports import AttendanceImporter, AttendanceImportError, open_csv_upload
+
+        season = self.get_object()
+        uploaded_file = request.FILES.get('file')
+        if uploaded_file is None:
+            return Response({'detail': 'Nie przesłano pliku CSV.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        try:
+            report = AttendanceImporter(season, marked_by=request.user).run(
+                open_csv_upload(uploaded_file), dry_run=dry_run
+            )
+        except (AttendanceImportError, UnicodeDecodeError) as e:
+            detail = str(e) if isinstance(e, AttendanceImportError) else 'Plik musi być zapisany w kodowaniu UTF-8.'
+            return Response({'detail': detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_status = status.HTTP_400_BAD_REQUEST if report['error_count'] else status.HTTP_200_OK
+        return Response(report, status=response_status)
 
     @action(detail=True, methods=['post'], permission_classes=[IsBoardMemberOrReadOnly])
     def add_musicians(self, request, pk=None):
         """Add musicians to this season and create attendance records for all events."""
-        from api.attendance.models import Attendance
-        
         season = self.get_object()
         musician_ids = request.data.get('musician_ids', [])
         
         if not musician_ids:
             return Response({'detail': 'Brak podanych ID muzyków.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get valid musician profiles
-        musicians = MusicianProfile.objects.filter(id__in=musician_ids, active=True)
-        if not musicians.exists():
+        if not MusicianProfile.objects.filter(id__in=musician_ids, active=True).exists():
             return Response({'detail': 'Nie znaleziono aktywnych muzyków.'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Add musicians to season and create attendance records
-        added_count = 0
-        created_attendances_count = 0
-        
-        for musician in musicians:
-            if not season.musicians.filter(id=musician.id).exists():
-                # Add musician to season
-                season.musicians.add(musician)
-                added_count += 1
-                
-                # Create attendance records (as absent - 0.0) for all events in this season
-                season_events = season.events.all()
-                for event in season_events:
-                    # Create attendance only if it doesn't exist
-                    attendance, created = Attendance.objects.get_or_create(
-                        user=musician.user,
-                        event=event,
-                        defaults={'present': 0.0}
-                    )
-                    if created:
-                        created_attendances_count += 1
+        # Musicians already in the season are skipped, existing attendance records are kept
+        added, created_attendances = season.add_musicians(musician_ids)
         
         return Response({
-            'detail': f'Dodano {added_count} muzyków do sezonu "{season.name}".',
-            'added_count': added_count,
-            'created_attendances': created_attendances_count,
+            'detail': f'Dodano {len(added)} muzyków do sezonu "{season.name}".',
+            'added_count': len(added),
+            'created_attendances': created_attendances,
             'total_musicians': season.musicians.count()
         }, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], permission_classes=[IsBoardMemberOrReadOnly])
     def remove_musicians(self, request, pk=None):
         """Remove musicians from this season and delete their attendances."""
-        from api.attendance.models import Attendance
-        
         season = self.get_object()
         musician_ids = request.data.get('musician_ids', [])
         
         if not musician_ids:
             return Response({'detail': 'Brak podanych ID muzyków.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get user IDs for musicians to be removed
-        musicians_to_remove = season.musicians.filter(id__in=musician_ids)
-        user_ids = list(musicians_to_remove.values_list('user_id', flat=True))
-        
-        # Remove musicians from season and delete their attendances
-        removed_count = 0
-        deleted_attendances_count = 0
-        
-        for musician_id in musician_ids:
-            if season.musicians.filter(id=musician_id).exists():
-                # Delete all attendances for this musician's user in events from this season
-                musician = season.musicians.get(id=musician_id)
-                deleted = Attendance.objects.filter(
-                    user_id=musician.user_id,
-                    event__season=season
-                ).delete()
-                deleted_attendances_count += deleted[0] if deleted[0] else 0
-                
-                # Remove musician from season
-                season.musicians.remove(musician_id)
-                removed_count += 1
+        removed, deleted_attendances = season.remove_musicians(musician_ids)
         
         return Response({
-            'detail': f'Usunięto {removed_count} muzyków z sezonu "{season.name}".',
-            'removed_count': removed_count,
-            'deleted_attendances': deleted_attendances_count,
+            'detail': f'Usunięto {len(removed)} muzyków z sezonu "{season.name}".',
+            'removed_count': len(removed),
+            'deleted_attendances': deleted_attendances,
             'total_musicians': season.musicians.count()
         }, status=status.HTTP_200_OK)
 
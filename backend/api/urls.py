@@ -54,6 +54,9 @@ urlpatterns = [
     # Forum
     path('forum/', include('api.forum.urls')),  
     
+    # Reports & exports
+    path('reports/', include('api.reports.urls')),
+    
     # Health check
     path('health/', lambda request: HttpResponse('OK'), name='health_check'),
 ]
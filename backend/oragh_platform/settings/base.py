@@ -49,6 +49,9 @@ LOCAL_APPS = [
     
     # Phase 6: Forum
     'api.forum',  
+    
+    # Background reports & exports
+    'api.reports',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -114,6 +117,10 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Generated reports are kept outside MEDIA_ROOT and only served through the
+# authenticated download endpoint (see api.reports.views)
+REPORTS_ROOT = Path(os.getenv('REPORTS_ROOT', BASE_DIR / 'private_media' / 'reports'))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -162,6 +169,19 @@ FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
 # Site name for emails
 SITE_NAME = 'ORAGH Platform'
 
+# Worker threads per process for background report jobs (see api.reports.workers)
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '2'))
+# Worker processes per web process for CPU-heavy report jobs (season reports)
+REPORT_PROCESS_WORKERS = int(os.getenv('REPORT_PROCESS_WORKERS', '1'))
+# Seconds after which an unfinished report job is considered lost and marked stale
+REPORT_JOB_TIMEOUT = int(os.getenv('REPORT_JOB_TIMEOUT', '1800'))
+
+# Pub/sub broker for live attendance streams (see api.attendance.pubsub)
+ATTENDANCE_BROKER = 'api.attendance.pubsub.LocalBroker'
+
+# Require the short-lived event code for self check-in (see api.attendance.checkin)
+ATTENDANCE_CHECKIN_REQUIRE_CODE = os.getenv('ATTENDANCE_CHECKIN_REQUIRE_CODE', 'False').lower() in ('true', '1', 'yes')
+
 # File upload settings
 MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024  # 2MB
@@ -112,6 +112,9 @@ CACHES = {
     }
 }
 
+# Live attendance streams run in a separate ASGI process - relay notifications through PostgreSQL
+ATTENDANCE_BROKER = 'api.attendance.pubsub.PostgresBroker'
+
 # Session configuration - using database backend
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 86400  # 24 hours
\ No newline at end of file
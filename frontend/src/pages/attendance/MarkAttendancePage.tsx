@@ -64,7 +64,7 @@ const MarkAttendancePage: React.FC = () => {
             setSeasonMusicians(flattenedMusicians)
           } catch (err) {
             // Fallback to the old method if attendance grid fails
-            const seasonData = await seasonService.getSeason(event.season)
+            const seasonData = await seasonService.getSeason(event.season, ['musicians'])
             setSeasonMusicians(seasonData.musicians || [])
           }
         }
@@ -103,7 +103,7 @@ const MarkAttendancePage: React.FC = () => {
           setSeasonMusicians(flattenedMusicians)
         } catch (err) {
           // Fallback to the old method if attendance grid fails
-          const seasonData = await seasonService.getSeason(data.season)
+          const seasonData = await seasonService.getSeason(data.season, ['musicians'])
           setSeasonMusicians(seasonData.musicians || [])
         }
       } catch (err) {
@@ -74,7 +74,7 @@ const AttendanceForm: React.FC<AttendanceFormProps> = ({
       // First get the event to know which season
       const event = await attendanceService.getEvent(eventId)
       if (event.season) {
-        const seasonData = await seasonService.getSeason(event.season)
+        const seasonData = await seasonService.getSeason(event.season, ['musicians'])
         const musiciansData = seasonData.musicians || []
         setSeasonMusicians(musiciansData)
         // Load existing attendance for editing
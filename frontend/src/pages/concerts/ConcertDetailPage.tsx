@@ -82,7 +82,7 @@ const ConcertDetailPage: React.FC = () => {
     }
 
     try {
-      if (currentConcert.is_registered) {
+      if (currentConcert.is_registered || currentConcert.is_waitlisted) {
         await unregisterFromConcert(currentConcert.id)
       } else {
         await registerForConcert(currentConcert.id)
@@ -125,6 +125,11 @@ const ConcertDetailPage: React.FC = () => {
     return currentConcert.is_registered
   }
 
+  const isUserWaitlisted = () => {
+    if (!user || !currentConcert) return false
+    return currentConcert.is_waitlisted
+  }
+
   if (isLoading && !currentConcert) {
     return (
       <Container maxWidth="lg" sx={{ py: 4 }}>
@@ -273,6 +278,8 @@ const ConcertDetailPage: React.FC = () => {
                   fontSize: { xs: '0.875rem', md: '1rem' } 
                 }}>
                   {currentConcert.participants_count}
+                  {currentConcert.capacity !== null && ` / ${currentConcert.capacity}`}
+                  {currentConcert.waitlist_count > 0 && ` (lista rezerwowa: ${currentConcert.waitlist_count})`}
                 </Typography>
               </Box>
             </Box>
@@ -367,7 +374,7 @@ const ConcertDetailPage: React.FC = () => {
               disabled={registrationLoading.has(currentConcert.id)}
               variant="contained"
               size="large"
-              color={isUserRegistered() ? "error" : "success"}
+              color={isUserRegistered() || isUserWaitlisted() ? "error" : "success"}
               sx={{ 
                 px: { xs: 2, md: 4 }, 
                 py: { xs: 1, md: 1.5 },
@@ -379,7 +386,9 @@ const ConcertDetailPage: React.FC = () => {
             >
               {isUserRegistered()
                 ? 'Wypisz się z koncertu'
-                : 'Zapisz się na koncert'
+                : isUserWaitlisted()
+                  ? 'Wypisz się z listy rezerwowej'
+                  : 'Zapisz się na koncert'
               }
             </Button>
           </Box>
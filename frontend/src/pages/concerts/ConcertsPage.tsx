@@ -291,6 +291,14 @@ const ConcertsPage: React.FC = () => {
                               variant="outlined"
                             />
                           )}
+                          {user?.musician_profile && concert.is_waitlisted && (
+                            <Chip 
+                              label="Lista rezerwowa" 
+                              color="warning" 
+                              size="small"
+                              variant="outlined"
+                            />
+                          )}
                         </Box>
                       </Box>
                     </Box>
@@ -320,7 +328,7 @@ const ConcertsPage: React.FC = () => {
                         <Box display="flex" alignItems="center" gap={1}>
                           <PeopleIcon fontSize="small" color="action" />
                           <Typography variant="body2">
-                            {concert.participants_count} uczestników
+                            {concert.participants_count}{concert.capacity !== null && ` / ${concert.capacity}`} uczestników
                           </Typography>
                         </Box>
                       </Grid2>
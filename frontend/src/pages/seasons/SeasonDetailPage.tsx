@@ -172,7 +172,7 @@ const SeasonDetailPage: React.FC = () => {
     (musician.instrument?.toLowerCase().includes(searchTerm.toLowerCase()))
   )
 
-  const filteredSeasonMusicians = selectedSeason?.musicians.filter(musician =>
+  const filteredSeasonMusicians = selectedSeason?.musicians?.filter(musician =>
     `${musician.user.first_name} ${musician.user.last_name}`.toLowerCase().includes(searchTermRemove.toLowerCase()) ||
     musician.user.email.toLowerCase().includes(searchTermRemove.toLowerCase()) ||
     (musician.instrument?.toLowerCase().includes(searchTermRemove.toLowerCase()))
@@ -59,6 +59,43 @@ export interface Attendance {
   created_at: string
   updated_at: string
 }
+// Flat attendance row returned by the attendance list; related objects are side-loaded
+export interface AttendanceRecord {
+  id: number
+  user: number
+  event: number
+  present: number
+  is_present: boolean
+  is_half: boolean
+  is_full: boolean
+  is_absent: boolean
+  marked_by: number | null
+  created_at: string
+  updated_at: string
+}
+
+export interface AttendanceUser {
+  id: number
+  username: string
+  first_name: string
+  last_name: string
+  instrument: string | null
+}
+
+export interface AttendanceEvent {
+  id: number
+  name: string
+  date: string
+  type: 'concert' | 'rehearsal' | 'soundcheck'
+  season: number
+  season_name: string
+  attendance_stats?: Event['attendance_stats']
+}
+
+export interface AttendanceListResponse extends PaginatedResponse<AttendanceRecord> {
+  users: AttendanceUser[]
+  events: AttendanceEvent[]
+}
 
 export interface AttendanceGrid {
   season: Season
@@ -120,6 +157,7 @@ export interface AttendanceFilters {
   event?: number
   season?: number
   type?: 'present' | 'absent' | 'half' | 'full'
+  expand?: 'stats'
   page?: number
   page_size?: number
 }
@@ -187,7 +225,7 @@ class AttendanceService {
   }
 
   // Attendance records
-  async getAttendances(filters: AttendanceFilters = {}): Promise<PaginatedResponse<Attendance>> {
+  async getAttendances(filters: AttendanceFilters = {}): Promise<AttendanceListResponse> {
     const params = new URLSearchParams()
     
     if (filters.user) {
@@ -202,6 +240,9 @@ class AttendanceService {
     if (filters.type) {
       params.append('type', filters.type)
     }
+    if (filters.expand) {
+      params.append('expand', filters.expand)
+    }
     if (filters.page) {
       params.append('page', filters.page.toString())
     }
@@ -9,8 +9,10 @@ export interface Concert {
   description?: string
   setlist?: string
   status: 'planned' | 'confirmed' | 'completed' | 'cancelled'
+  capacity: number | null
   participants_count: number
   is_registered: boolean
+  is_waitlisted: boolean
   can_edit?: boolean
   can_delete?: boolean
   created_by: {
@@ -24,7 +26,15 @@ export interface Concert {
   date_modified: string
 }
 
+export interface ConcertSectionLimit {
+  instrument: string
+  capacity: number
+  registered_count?: number
+}
+
 export interface ConcertDetail extends Concert {
+  section_limits: ConcertSectionLimit[]
+  waitlist_count: number
   participants: Array<{
     id: number
     user: {
@@ -46,6 +56,16 @@ export interface ConcertCreateData {
   description?: string
   setlist?: string
   status?: 'planned' | 'confirmed' | 'completed' | 'cancelled'
+  capacity?: number | null
+  section_limits?: ConcertSectionLimit[]
+}
+
+export interface ConcertRegistrationResult {
+  message: string
+  status: 'registered' | 'waitlisted' | 'unregistered' | 'left_waitlist'
+  participants_count: number
+  is_registered: boolean
+  is_waitlisted: boolean
 }
 
 export interface ConcertUpdateData extends Partial<ConcertCreateData> {}
@@ -128,11 +148,7 @@ class ConcertService {
   }
 
   // Register for concert
-  async registerForConcert(id: number): Promise<{ 
-    message: string; 
-    participants_count: number; 
-    is_registered: boolean;
-  }> {
+  async registerForConcert(id: number): Promise<ConcertRegistrationResult> {
     const response = await apiClient.post(`${this.basePath}/${id}/register/`, {
       action: 'register'
     })
@@ -140,11 +156,7 @@ class ConcertService {
   }
 
   // Unregister from concert
-  async unregisterFromConcert(id: number): Promise<{ 
-    message: string; 
-    participants_count: number; 
-    is_registered: boolean;
-  }> {
+  async unregisterFromConcert(id: number): Promise<ConcertRegistrationResult> {
     const response = await apiClient.post(`${this.basePath}/${id}/register/`, {
       action: 'unregister'
     })
@@ -21,7 +21,8 @@ export interface SeasonDetail extends Season {
     total_attendances: number
     attendance_rate: number
   }
-  musicians: Array<{
+  // Only included when requested with `expand: ['musicians']`
+  musicians?: Array<{
     id: number
     user: {
       id: number
@@ -108,13 +109,15 @@ class SeasonService {
     return response.data
   }
 
-  async getSeason(id: number): Promise<SeasonDetail> {
-    const response = await apiClient.get(`${this.basePath}/${id}/`)
+  async getSeason(id: number, expand: Array<'musicians'> = []): Promise<SeasonDetail> {
+    const params = expand.length ? { expand: expand.join(',') } : undefined
+    const response = await apiClient.get(`${this.basePath}/${id}/`, { params })
     return response.data
   }
 
-  async getCurrentSeason(): Promise<SeasonDetail> {
-    const response = await apiClient.get(`${this.basePath}/current/`)
+  async getCurrentSeason(expand: Array<'musicians'> = []): Promise<SeasonDetail> {
+    const params = expand.length ? { expand: expand.join(',') } : undefined
+    const response = await apiClient.get(`${this.basePath}/current/`, { params })
     return response.data
   }
 
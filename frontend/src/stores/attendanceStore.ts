@@ -3,7 +3,9 @@ import { devtools } from 'zustand/middleware'
 import attendanceService, {
   Event,
   EventDetail,
-  Attendance,
+  AttendanceRecord,
+  AttendanceUser,
+  AttendanceEvent,
   AttendanceGrid,
   EventCreateData,
   EventUpdateData,
@@ -24,7 +26,9 @@ interface AttendanceState {
   eventError: string | null
 
   // Attendance
-  attendances: Attendance[]
+  attendances: AttendanceRecord[]
+  attendanceUsers: Record<number, AttendanceUser>
+  attendanceEvents: Record<number, AttendanceEvent>
   attendanceGrid: AttendanceGrid | null
   attendanceLoading: boolean
   attendanceTotalCount: number
@@ -71,6 +75,8 @@ export const useAttendanceStore = create<AttendanceState>()(
       eventError: null,
 
       attendances: [],
+      attendanceUsers: {},
+      attendanceEvents: {},
       attendanceGrid: null,
       attendanceLoading: false,
       attendanceTotalCount: 0,
@@ -233,8 +239,16 @@ export const useAttendanceStore = create<AttendanceState>()(
           const finalFilters = { ...get().attendanceFilters, ...filters }
           const response = await attendanceService.getAttendances(finalFilters)
           
+          // Users and events are side-loaded once per page, keyed by id
+          const users = append ? { ...get().attendanceUsers } : {}
+          response.users.forEach((user) => { users[user.id] = user })
+          const events = append ? { ...get().attendanceEvents } : {}
+          response.events.forEach((event) => { events[event.id] = event })
+
           set({
             attendances: append ? [...get().attendances, ...response.results] : response.results,
+            attendanceUsers: users,
+            attendanceEvents: events,
             attendanceTotalCount: response.count,
             attendanceHasNext: !!response.next,
             attendanceCurrentPage: finalFilters.page || 1,
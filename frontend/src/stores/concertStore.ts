@@ -216,7 +216,8 @@ export const useConcertStore = create<ConcertState>()(
               ? { 
                   ...concert, 
                   participants_count: result.participants_count,
-                  is_registered: result.is_registered
+                  is_registered: result.is_registered,
+                  is_waitlisted: result.is_waitlisted
                 }
               : concert
           )
@@ -279,7 +280,8 @@ export const useConcertStore = create<ConcertState>()(
               ? { 
                   ...concert, 
                   participants_count: result.participants_count,
-                  is_registered: result.is_registered
+                  is_registered: result.is_registered,
+                  is_waitlisted: result.is_waitlisted
                 }
               : concert
           )
@@ -49,7 +49,7 @@ export const useSeasonStore = create<SeasonStore>((set, get) => ({
   fetchSeason: async (id: number) => {
     set({ isLoading: true, error: null })
     try {
-      const season = await seasonService.getSeason(id)
+      const season = await seasonService.getSeason(id, ['musicians'])
       set({ selectedSeason: season, isLoading: false })
     } catch (error: any) {
       set({ 